@@ -1,25 +1,31 @@
 import csv
 import io
+from contextlib import nullcontext
 from decimal import Decimal
 
 import numpy
-from django.core.exceptions import ObjectDoesNotExist
 from django.core.files import File
 from django.db import transaction
 from django.forms import Form
 from pydash import get
-from scipy.stats import chisquare
 
 from benford.conf import (
-    DEFAULT_BASE, BENFORD_LAW_COMPLIANCE_STAT_SIG, DEFAULT_RELEVANT_COLUMN, DEFAULT_DELIMITER,
-    ALLOWED_DELIMITERS,
+    DEFAULT_BASE, DEFAULT_RELEVANT_COLUMN, DEFAULT_DELIMITER,
+    ALLOWED_DELIMITERS, BENFORD_UPLOAD_CHUNK_SIZE, BENFORD_ANALYSIS_WORKERS, BENFORD_DIGIT_TESTS,
 )
 from benford.core import (
-    get_first_significant_digit, get_expected_distribution, get_expected_distribution_flat,
-    count_occurences_with_percentage, get_degrees_of_freedom_for_base,
+    get_expected_distribution, get_expected_distribution_flat,
+    count_occurences_with_percentage,
+    iter_counted_batches, merge_test_occurences, get_digit_test_range, FIRST_DIGIT_TEST,
+    get_compliance_critical_value, get_count_vector, get_expected_probabilities,
+    compute_statistics, DigitStatistics,
 )
-from benford.exceptions import NoSignificantDigitFound
-from benford.models import Dataset, SignificantDigit, DatasetRow
+from benford.metrics import compute_conformity_metrics, ConformityMetrics
+from benford.loaders import get_row_loader, get_existing_row_loader
+from benford.models import Dataset, SignificantDigit
+from benford.parallel import count_file_in_parallel
+from benford.scan import scan_file
+from benford.streams import ChunkedTextReader
 
 
 class BenfordAnalyzer:
@@ -31,34 +37,74 @@ class BenfordAnalyzer:
             title: str = '',
             input_data=None,
             delimiter=DEFAULT_DELIMITER,
+            relevant_column: int = DEFAULT_RELEVANT_COLUMN,
+            has_header: bool = False,
+            progress_callback=None,
+            first_line: int = 0,
+            tests=BENFORD_DIGIT_TESTS,
+            test_occurences: dict = None,
     ):
-        self.dataset = dataset or Dataset(title=title)
+        self.dataset = dataset or Dataset(title=title, base=base)
         self.percentages = {}
         self.input_data = input_data
         self.delimiter = delimiter
-
-        if dataset is not None:
+        self.relevant_column = relevant_column
+        self.has_header = has_header
+        self.progress_callback = progress_callback
+        # Line number of the first line of `input_data` (non-zero when
+        # appending to a dataset) and number of lines read by `analyze()`.
+        self.first_line = first_line
+        self.line_count = None
+        # Digit tests counted along with the first digit (decimal digits only).
+        self.tests = tuple(tests) if self.dataset.base == 10 else ()
+
+        # Results stored by `save()`, used instead of recomputing them.
+        self._stored_summary = None
+
+        if dataset is not None and dataset.has_statistics:
+            self._load_statistics(dataset)
+        elif dataset is not None:
             self._occurences = dataset.get_occurences_summary()
         else:
             self._occurences = occurences or {}
+        if dataset is not None:
+            self._test_occurences = dataset.get_test_occurences()
+        else:
+            self._test_occurences = test_occurences or {}
 
         self._error_rows = error_rows or set()
-        self._total_occurences = sum(occurences.values()) if occurences else 0
-        self._base = base
+        self._total_occurences = sum(self._occurences.values())
+        self._base = self.dataset.base
 
-        if self._occurences:
+        if self._occurences and not self.percentages:
             self.calculate_percentages()
 
+    def _load_statistics(self, dataset: Dataset):
+        self._stored_summary = [
+            AnalyzerSummaryRow(
+                digit=row['digit'],
+                occurences=row['occurences'],
+                percentage=Decimal(row['percentage']),
+                expected_percentage=Decimal(row['expected_percentage']))
+            for row in dataset.summary
+        ]
+        self._occurences = dict(
+            (row.digit, row.occurences) for row in self._stored_summary if row.occurences)
+        self.percentages = dict(
+            (row.digit, row.percentage) for row in self._stored_summary if row.occurences)
+
     @classmethod
     def create_from_model(cls, dataset: Dataset):
         return BenfordAnalyzer(dataset=dataset)
 
     @classmethod
-    def create_from_form(cls, form: Form):
+    def create_from_form(cls, form: Form, save: bool = False):
         kwargs = {
-            'relevant_column': get(form.cleaned_data, 'relevant_column', 0) or 0,
+            'save': save,
+            'relevant_column': get(form.cleaned_data, 'relevant_column'),
             'has_header': get(form.cleaned_data, 'has_header', False),
             'title': form.cleaned_data['title'],
+            'base': get(form.cleaned_data, 'base') or DEFAULT_BASE,
         }
         data_file = form.cleaned_data['data_file']
         if data_file:
@@ -71,67 +117,146 @@ class BenfordAnalyzer:
         return cls.create_from_csv(io.StringIO(payload), **kwargs)
 
     @classmethod
-    def create_from_file(cls, data_file: File, **kwargs):
+    def create_from_file(cls, data_file: File, chunk_size: int = BENFORD_UPLOAD_CHUNK_SIZE, **kwargs):
         return cls.create_from_csv(
-            io.StringIO(data_file.read().decode('utf-8')), **kwargs)
+            ChunkedTextReader(data_file, chunk_size=chunk_size), **kwargs)
 
     @classmethod
-    def create_from_csv(
+    def create_from_path(
+            cls, path: str, save: bool = False, workers: int = BENFORD_ANALYSIS_WORKERS, **kwargs):
+        """
+        Creates an analyzer for a CSV file on the server's disk.
+
+        With `save=True` the dataset is saved right away in a single pass
+        over the file. Otherwise only digits are counted, from the
+        memory-mapped file without decoding it (see `analyze_path()`).
+        The file is closed when this returns, so a later `save()` saves
+        digits and statistics, but no rows.
+        """
+        with open(path, 'rb') as data_file:
+            analyzer = cls.open_csv(ChunkedTextReader(data_file), **kwargs)
+            if save:
+                analyzer.save()
+            else:
+                analyzer.analyze_path(path, workers)
+                analyzer.input_data = None
+        return analyzer
+
+    @classmethod
+    def create_from_csv(cls, input_data: io.StringIO, save: bool = False, **kwargs):
+        """
+        Creates an analyzer for CSV `input_data`.
+
+        With `save=True` the dataset is saved right away: digits are counted
+        and rows are persisted in a single pass over the input. Otherwise
+        only digits are counted and rows are persisted by a later `save()`.
+        """
+        analyzer = cls.open_csv(input_data, **kwargs)
+        if save:
+            analyzer.save()
+        else:
+            analyzer.analyze()
+        return analyzer
+
+    @classmethod
+    def open_csv(
             cls,
             input_data: io.StringIO,
             delimiter='\t',
             relevant_column: int = None,
             has_header: bool = False,
-            title: str = '',
+            **kwargs,
     ):
-        assert delimiter in ALLOWED_DELIMITERS, \
+        """
+        Creates an analyzer for CSV `input_data` without analyzing it yet.
+        Only the first line is read to detect the delimiter and the relevant
+        column (unless they are given). Remaining `kwargs` are passed to the
+        constructor.
+        """
+        assert delimiter is None or delimiter in ALLOWED_DELIMITERS, \
             f"The `delimiter` argument must be one of {ALLOWED_DELIMITERS}. " \
             f"Got `{delimiter}` instead."
 
         first_line: str = input_data.readline()
         delimiter = delimiter or auto_detect_delimiter(first_line) or DEFAULT_DELIMITER
-        relevant_column = relevant_column or find_relevant_column(first_line)
-
-        occurences = {}
-        input_data.seek(0)
-        reader = csv.reader(input_data, delimiter=delimiter)
-        row_i = 0
-        _error_rows = set()
-
-        if has_header:
-            # Skip first row (header).
-            next(reader)
-
-        for row in reader:
-            _invalid_row = False
-            try:
-                significant_digit = get_first_significant_digit(row[relevant_column])
-            except (NoSignificantDigitFound, IndexError):
-                significant_digit = None
-                _error_rows.add(row_i)
-            finally:
-                row_i += 1
-
-            if significant_digit is None:
-                continue
-
-            if significant_digit not in occurences:
-                occurences[significant_digit] = 1
-            else:
-                occurences[significant_digit] += 1
+        if relevant_column is None:
+            relevant_column = find_relevant_column(first_line)
 
         return BenfordAnalyzer(
-            occurences,
-            error_rows=_error_rows, title=title,
-            input_data=input_data, delimiter=delimiter)
+            input_data=input_data, delimiter=delimiter,
+            relevant_column=relevant_column, has_header=has_header, **kwargs)
+
+    def analyze(self, row_loader=None) -> None:
+        """
+        Parses `input_data` once and counts first significant digits batch
+        by batch. If `row_loader` is given, each batch of parsed rows is also
+        persisted, so the input doesn't have to be read twice.
+
+        Error rows are identified by their line number in the input (the
+        same number as `DatasetRow.line`).
+        """
+        occurences = {}
+        test_occurences = dict((test, {}) for test in self.tests)
+        error_rows = set()
+        self.input_data.seek(0)
+        reader = csv.reader(self.input_data, delimiter=self.delimiter)
+        skip_line = self.first_line if self.has_header else None
+        line_count = 0
+
+        for batch in iter_counted_batches(
+                enumerate(reader, self.first_line), self.relevant_column,
+                occurences, error_rows, skip_line, test_occurences=test_occurences,
+                base=self.base):
+            line_count = batch[-1][0] + 1 - self.first_line
+            if row_loader is not None:
+                row_loader.write(batch, error_rows)
+            if self.progress_callback is not None:
+                self.progress_callback(line_count)
+
+        if row_loader is not None:
+            row_loader.close()
+
+        self.line_count = line_count
+        self._set_results(occurences, error_rows, test_occurences)
+
+    def analyze_path(self, path: str, workers: int = BENFORD_ANALYSIS_WORKERS) -> None:
+        """
+        Same as `analyze()` for `input_data` read from file at `path`, but
+        the bytes of the file are scanned directly (`benford.scan`), by
+        a pool of processes if there is more than one worker
+        (`benford.parallel`). Falls back to `analyze()` if quoted values
+        span several lines or digits aren't decimal.
+        """
+        if self.base != 10:
+            self.analyze()
+            return
+        if workers > 1:
+            result = count_file_in_parallel(
+                path, self.delimiter, self.relevant_column, self.has_header, workers, self.tests)
+        else:
+            result = scan_file(
+                path, self.delimiter, self.relevant_column, self.has_header, tests=self.tests)
+        if result is None:
+            self.analyze()
+            return
+        occurences, error_rows, self.line_count, test_occurences = result
+        self._set_results(occurences, error_rows, test_occurences)
+
+    def _set_results(self, occurences: dict, error_rows: set, test_occurences: dict):
+        self._occurences = occurences
+        self._test_occurences = test_occurences
+        self._error_rows = error_rows
+        self._total_occurences = sum(occurences.values())
+        if occurences:
+            self.calculate_percentages()
 
     @staticmethod
-    def get_expected_distribution(digit, base=DEFAULT_BASE):
-        return get_expected_distribution(digit, base)
+    def get_expected_distribution(digit, base=DEFAULT_BASE, test=FIRST_DIGIT_TEST):
+        return get_expected_distribution(digit, base, test)
 
     @staticmethod
-    def get_expected_distribution_flat(base=DEFAULT_BASE):
-        return get_expected_distribution_flat(base)
+    def get_expected_distribution_flat(base=DEFAULT_BASE, test=FIRST_DIGIT_TEST):
+        return get_expected_distribution_flat(base, test)
 
     @property
     def base(self):
@@ -145,6 +270,13 @@ class BenfordAnalyzer:
     def occurences(self):
         return self._occurences
 
+    @property
+    def test_occurences(self) -> dict:
+        """
+        Occurences of other digit tests than the first digit, by test.
+        """
+        return self._test_occurences
+
     @property
     def total_occurences(self):
         return self._total_occurences
@@ -167,82 +299,179 @@ class BenfordAnalyzer:
     def get_observed_distribution(self, digit: int) -> Decimal:
         return get(self.percentages, str(digit), Decimal('0'))
 
-    def get_observed_distribution_flat(self, base=DEFAULT_BASE):
-        result = numpy.zeros(base - 1)
+    def get_observed_distribution_flat(self, base=None):
+        result = numpy.zeros((base or self.base) - 1)
         for digit, percent in self.percentages.items():
             result[digit - 1] = percent
         return result
 
-    def get_chisq_test_statistic(self, base=DEFAULT_BASE):
-        c = chisquare(
-            f_obs=list(map(lambda x: float(x), self.get_observed_distribution_flat(base))),
-            f_exp=list(map(lambda x: float(x), self.get_expected_distribution_flat(base))),
-            ddof=get_degrees_of_freedom_for_base(base),
-        )
-        return c[0]
+    def get_digit_statistics(self, base=None, test=FIRST_DIGIT_TEST) -> DigitStatistics:
+        """
+        Chi-squared test, MAD and Z-statistics of the counted digits of
+        a digit `test`.
+        """
+        base = base or self.base
+        occurences = self.occurences if test == FIRST_DIGIT_TEST else self.test_occurences[test]
+        return compute_statistics(
+            get_count_vector(occurences, base, test), get_expected_probabilities(base, test))
+
+    def get_conformity_metrics(self, test=FIRST_DIGIT_TEST) -> ConformityMetrics:
+        """
+        MAD and Nigrini's conformity level, Kolmogorov-Smirnov, Z-statistics
+        and KL divergence of a digit `test` (see `benford.metrics`).
+        """
+        occurences = self.occurences if test == FIRST_DIGIT_TEST else self.test_occurences[test]
+        return compute_conformity_metrics(get_count_vector(occurences, self.base, test), self.base, test)
+
+    def get_chisq_test(self, base=None) -> tuple:
+        """
+        :return: Chi-squared test statistic and its p-value.
+        """
+        statistics = self.get_digit_statistics(base)
+        return float(statistics.chisq_statistic), float(statistics.p_value)
+
+    def get_chisq_test_statistic(self, base=None):
+        return self.get_chisq_test(base)[0]
 
     @property
     def is_compliant_with_benford_law(self) -> bool:
-        return self.get_chisq_test_statistic() <= BENFORD_LAW_COMPLIANCE_STAT_SIG
+        if self._stored_summary is not None:
+            return self.dataset.is_compliant
+        return self.get_chisq_test_statistic() <= get_compliance_critical_value(self.base)
+
+    def get_statistics(self) -> dict:
+        """
+        Analysis results stored on the dataset, so that it can be displayed
+        without computing them again.
+        """
+        statistics = {
+            'total_occurences': self.total_occurences,
+            'chisq_statistic': None,
+            'p_value': None,
+            'is_compliant': False,
+            'mad': None,
+            'conformity': '',
+            'ks_statistic': None,
+            'ks_critical_value': None,
+            'kl_divergence': None,
+            'summary': [
+                {
+                    'digit': row.digit,
+                    'occurences': row.occurences,
+                    'percentage': str(row.percentage),
+                    'expected_percentage': str(row.expected_percentage),
+                }
+                for row in self.get_summary()
+            ],
+        }
+        if self.total_occurences:
+            metrics = self.get_conformity_metrics()
+            statistics.update({
+                'chisq_statistic': float(metrics.chisq_statistic),
+                'p_value': float(metrics.p_value),
+                'mad': float(metrics.mad),
+                'conformity': metrics.conformity or '',
+                'ks_statistic': float(metrics.ks_statistic),
+                'ks_critical_value': float(metrics.ks_critical_value),
+                'kl_divergence': float(metrics.kl_divergence),
+            })
+            statistics['is_compliant'] = \
+                statistics['chisq_statistic'] <= get_compliance_critical_value(self.base)
+        return statistics
 
     def get_digits_list(self):
         return range(1, self.base)
 
-    def save(self) -> Dataset:
-        with transaction.atomic():
-            dataset = self._perform_save()
+    def save(self, atomic: bool = True) -> Dataset:
+        """
+        Saves the dataset, its rows and significant digits. With
+        `atomic=False` rows are committed batch by batch, e.g. so that
+        progress of a long running analysis is visible to other connections.
+        """
+        with transaction.atomic() if atomic else nullcontext():
+            if self.input_data is not None or self.line_count is not None:
+                self.dataset.delimiter = self.delimiter
+                self.dataset.relevant_column = self.relevant_column
+            self.dataset.save()
             self._save_data_rows()
+            dataset = self._perform_save()
+            self.save_statistics()
         return dataset
 
-    def _perform_save(self) -> Dataset:
-        self.dataset.save()
-        new_digits = []
-        existing_digits = []
-
-        for digit, occurences in self.occurences.items():
-            try:
-                significant_digit = self.dataset.significant_digits.get(digit=digit)
-                significant_digit.occurences = occurences
-                existing_digits.append(significant_digit)
-            except ObjectDoesNotExist:
-                significant_digit = SignificantDigit(
-                    dataset=self.dataset,
-                    digit=digit,
-                    occurences=occurences)
-                new_digits.append(significant_digit)
-
-        if new_digits:
-            SignificantDigit.objects.bulk_create(new_digits)
-
-        if existing_digits:
-            SignificantDigit.objects.bulk_create(existing_digits, ['occurences', ])
+    def save_statistics(self):
+        statistics = self.get_statistics()
+        for field, value in statistics.items():
+            setattr(self.dataset, field, value)
+        self.dataset.save(update_fields=list(statistics))
 
+    def _perform_save(self) -> Dataset:
+        SignificantDigit.objects.set_occurences(self.dataset, self.occurences)
+        self.dataset.test_occurences = self.test_occurences
+        self.dataset.save(update_fields=['test_occurences'])
         return self.dataset
 
     def _save_data_rows(self):
         """
-        Save user data input to browse later.
+        Save user data input to browse later. Rows are written in batches
+        while digits are counted in the same pass over the input.
         """
         if self.input_data is None:
+            if self.line_count is not None:
+                # Digits were counted from a file that is closed by now.
+                self.dataset.row_storage = Dataset.ROW_STORAGE_NONE
+                self.dataset.line_count = self.line_count
+                self.dataset.error_count = self.error_count
+                self.dataset.save(update_fields=['row_storage', 'line_count', 'error_count'])
             return
-        self.input_data.seek(0)
-        line = 0
-        rows = []
-        reader = csv.reader(self.input_data, delimiter=self.delimiter)
-
-        while True:
-            try:
-                row = next(reader)
-            except StopIteration:
-                break
-            rows.append(DatasetRow(
-                dataset=self.dataset,
-                line=line, data=row,
-                has_error=line in self.error_rows))
-            line += 1
+        row_loader = get_row_loader(self.dataset)
+        if self.dataset.row_storage != row_loader.storage:
+            self.dataset.row_storage = row_loader.storage
+            self.dataset.save(update_fields=['row_storage'])
+        self.analyze(row_loader=row_loader)
+        self.dataset.line_count = self.line_count
+        self.dataset.error_count = self.error_count
+        self.dataset.save(update_fields=['line_count', 'error_count'])
+
+    def append(self, input_data: io.StringIO, has_header: bool = False):
+        """
+        Appends rows from CSV `input_data` to the saved dataset. Only the new
+        rows are parsed: their lines are numbered after the existing ones and
+        their digit counts are added to the stored `SignificantDigit`s, from
+        which statistics are refreshed.
 
-        # Bulk save rows.
-        DatasetRow.objects.bulk_create(rows)
+        `input_data` is parsed the same way as the original input (delimiter
+        and relevant column stored on the dataset).
+        """
+        with transaction.atomic():
+            # Concurrent appends must not reuse the same line numbers.
+            dataset = Dataset.objects.select_for_update().get(pk=self.dataset.pk)
+            appended = BenfordAnalyzer.open_csv(
+                input_data, delimiter=dataset.delimiter,
+                relevant_column=dataset.relevant_column, has_header=has_header,
+                first_line=dataset.line_count, tests=dataset.get_test_occurences(),
+                base=dataset.base)
+            appended.analyze(row_loader=get_existing_row_loader(dataset))
+
+            self.dataset = dataset
+            SignificantDigit.objects.add_occurences(dataset, appended.occurences)
+            self._stored_summary = None
+            self._set_results(
+                dataset.get_occurences_summary(), self._error_rows | appended.error_rows,
+                merge_test_occurences(dataset.get_test_occurences(), appended.test_occurences))
+            dataset.line_count += appended.line_count
+            dataset.error_count += appended.error_count
+            dataset.test_occurences = self.test_occurences
+            dataset.save(update_fields=['line_count', 'error_count', 'test_occurences'])
+            self.save_statistics()
+        return appended
+
+    def append_from_form(self, form: Form):
+        data_file = form.cleaned_data['data_file']
+        if data_file:
+            input_data = ChunkedTextReader(data_file)
+        else:
+            input_data = io.StringIO(form.cleaned_data['data_raw'])
+        return self.append(input_data, has_header=get(form.cleaned_data, 'has_header', False))
 
     def get_occurences_for_digit(self, digit) -> int:
         return get(self.occurences, digit, 0) or 0
@@ -250,14 +479,33 @@ class BenfordAnalyzer:
     def get_percentage_for_digit(self, digit) -> int:
         return get(self.percentages, digit, 0) or 0
 
+    def get_test_summary(self, test: str) -> list:
+        """
+        Summary of a digit test (see `get_summary()`); percentages are
+        rounded to two decimal places as tests of two digits have many
+        small ones.
+        """
+        occurences = get(self.test_occurences, test, {})
+        percentages = count_occurences_with_percentage(occurences, 2) if occurences else {}
+        return [
+            AnalyzerSummaryRow(
+                digit=d,
+                occurences=occurences.get(d, 0),
+                percentage=percentages.get(d, 0),
+                expected_percentage=get_expected_distribution(d, self.base, test, 2))
+            for d in get_digit_test_range(test, self.base)
+        ]
+
     def get_summary(self):
+        if self._stored_summary is not None:
+            return self._stored_summary
         summary = []
         for d in self.get_digits_list():
             row = AnalyzerSummaryRow(
                 digit=d,
                 occurences=self.get_occurences_for_digit(d),
                 percentage=self.get_percentage_for_digit(d),
-                expected_percentage=self.get_expected_distribution(d),
+                expected_percentage=self.get_expected_distribution(d, self.base),
             )
             summary.append(row)
         return summary
@@ -0,0 +1,320 @@
+"""
+JSON API. Datasets are created from the same fields as the upload form,
+their analysis results are read as JSON and their rows are exported as
+NDJSON or CSV. Responses carry ETags, so clients can skip unchanged
+datasets with conditional requests. Large files can be uploaded in parts
+(see `benford.uploads`).
+"""
+import hashlib
+import json
+
+from django import forms
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from benford.analyzer import BenfordAnalyzer
+from benford.conf import BENFORD_ASYNC_ANALYSIS, BENFORD_UPLOAD_PART_MAX_SIZE
+from benford.exceptions import UploadError
+from benford.export import EXPORT_FORMATS, iter_export
+from benford.forms import DatasetUploadForm, ChunkedUploadForm
+from benford.jobs import enqueue_analysis
+from benford.models import Dataset, AnalysisJob, ChunkedUpload
+from benford.storage import iter_dataset_rows
+from benford.uploads import start_upload, receive_part, complete_upload
+
+# JSON types of the values of form fields.
+JSON_FIELD_TYPES = (
+    (forms.BooleanField, bool),
+    (forms.IntegerField, int),
+    (forms.CharField, str),
+    (forms.ChoiceField, str),
+)
+JSON_TYPE_NAMES = {bool: 'boolean', int: 'integer', str: 'string'}
+
+
+def get_dataset_status(dataset: Dataset) -> str:
+    if dataset.is_uploading:
+        return 'uploading'
+    job = dataset.get_analysis_job()
+    return AnalysisJob.STATUS_DONE if job is None else job.status
+
+
+def serialize_summary(summary: list) -> list:
+    return [
+        {
+            'digit': row.digit,
+            'occurences': row.occurences,
+            'percentage': row.percentage,
+            'expected_percentage': row.expected_percentage,
+        }
+        for row in summary
+    ]
+
+
+def serialize_dataset(dataset: Dataset) -> dict:
+    """
+    Dataset with its analysis results (`None` until it's analyzed).
+    """
+    status = get_dataset_status(dataset)
+    data = {
+        'slug': dataset.slug,
+        'title': dataset.title,
+        'created_at': dataset.created_at,
+        'base': dataset.base,
+        'status': status,
+        'line_count': dataset.line_count,
+        'error_count': dataset.error_count,
+        'url': reverse('benford:api_dataset', kwargs={'slug': dataset.slug}),
+        'rows_url': reverse(
+            'benford:api_dataset_rows', kwargs={'slug': dataset.slug, 'export_format': 'ndjson'})
+        if dataset.has_rows else None,
+        'statistics': None,
+        'summary': None,
+        'tests': None,
+    }
+    if status != AnalysisJob.STATUS_DONE:
+        return data
+
+    analyzer = BenfordAnalyzer.create_from_model(dataset)
+    statistics = {
+        'total_occurences': dataset.total_occurences,
+        'chisq_statistic': dataset.chisq_statistic,
+        'p_value': dataset.p_value,
+        'is_compliant': dataset.is_compliant,
+    }
+    if dataset.total_occurences:
+        statistics.update({
+            'mad': dataset.mad,
+            'conformity': dataset.conformity or None,
+            'ks_statistic': dataset.ks_statistic,
+            'ks_critical_value': dataset.ks_critical_value,
+            'kl_divergence': dataset.kl_divergence,
+        })
+    data['statistics'] = statistics
+    data['summary'] = serialize_summary(analyzer.get_summary())
+    data['tests'] = dict(
+        (test, serialize_summary(analyzer.get_test_summary(test)))
+        for test in analyzer.test_occurences)
+    return data
+
+
+def get_dataset_etag(dataset: Dataset) -> str:
+    """
+    ETag of the serialized dataset from its stored fields, so that it's
+    only serialized for clients that don't have it already.
+    """
+    fields = [
+        dataset.slug, dataset.title, get_dataset_status(dataset), dataset.base, dataset.row_storage,
+        dataset.line_count, dataset.error_count, dataset.total_occurences, dataset.summary,
+        dataset.test_occurences, dataset.chisq_statistic, dataset.p_value, dataset.is_compliant,
+        dataset.mad, dataset.conformity, dataset.ks_statistic, dataset.ks_critical_value,
+        dataset.kl_divergence,
+    ]
+    return quote_etag(hashlib.sha1(json.dumps(fields, cls=DjangoJSONEncoder).encode('utf-8')).hexdigest())
+
+
+def serialize_upload(upload: ChunkedUpload) -> dict:
+    return {
+        'slug': upload.dataset.slug,
+        'next_part': upload.next_part,
+        'bytes_received': upload.bytes_received,
+        'line_count': upload.dataset.line_count,
+        'completed': upload.is_complete,
+        'url': reverse('benford:api_upload', kwargs={'slug': upload.dataset.slug}),
+        'dataset_url': reverse('benford:api_dataset', kwargs={'slug': upload.dataset.slug}),
+    }
+
+
+def get_error_response(message: str, status: int = 400):
+    return JsonResponse({'errors': {'__all__': [{'message': message, 'code': ''}]}}, status=status)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class DatasetCollectionApiView(View):
+    """
+    Creates a dataset from a JSON object or a multipart form with the
+    fields of `DatasetUploadForm` (`data_raw` or `data_file`, `title`,
+    `relevant_column`, `has_header`, `base`).
+    """
+    async_analysis = BENFORD_ASYNC_ANALYSIS
+
+    def post(self, request):
+        if request.content_type == 'application/json':
+            try:
+                data = load_json_object(request)
+            except ValueError:
+                return get_error_response('Invalid JSON.')
+            form = DatasetUploadForm(data)
+            is_valid = is_valid_json_form(form, data)
+        else:
+            form = DatasetUploadForm(request.POST, request.FILES)
+            is_valid = form.is_valid()
+        if not is_valid:
+            return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+
+        if self.async_analysis:
+            dataset = enqueue_analysis(form).dataset
+        else:
+            dataset = BenfordAnalyzer.create_from_form(form, save=True).dataset
+        response = JsonResponse(serialize_dataset(dataset), status=201)
+        response['Location'] = reverse('benford:api_dataset', kwargs={'slug': dataset.slug})
+        return response
+
+
+def load_json_object(request) -> dict:
+    """
+    JSON object in the request body, empty if there is no body.
+
+    :raise ValueError: If the body isn't a JSON object.
+    """
+    data = json.loads(request.body or '{}')
+    if not isinstance(data, dict):
+        raise ValueError('A JSON object is expected.')
+    return data
+
+
+def is_valid_json_form(form: forms.Form, data: dict) -> bool:
+    """
+    Same as `form.is_valid()` for a form bound to JSON `data`, but values
+    of other JSON types than their fields expect are errors too, instead
+    of being coerced (e.g. `5` for text or `"1"` for a number).
+    """
+    form.is_valid()
+    for name, field in form.fields.items():
+        value = data.get(name)
+        expected = next(
+            (json_type for field_class, json_type in JSON_FIELD_TYPES if isinstance(field, field_class)), None)
+        if value is None or expected is None:
+            continue
+        if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            form.add_error(name, forms.ValidationError(
+                f'A JSON {JSON_TYPE_NAMES[expected]} is expected.', code='invalid'))
+    return not form.errors
+
+
+class DatasetApiView(View):
+    def get(self, request, slug):
+        dataset = get_object_or_404(Dataset, slug=slug)
+        if not dataset.has_statistics and dataset.is_analyzed:
+            # Datasets saved before analysis results were stored.
+            BenfordAnalyzer.create_from_model(dataset).save_statistics()
+
+        etag = get_dataset_etag(dataset)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = JsonResponse(serialize_dataset(dataset))
+        response['ETag'] = etag
+        return response
+
+
+class DatasetRowsApiView(View):
+    """
+    Streams all rows (or only erroneous rows with `?errors`) of a dataset
+    as NDJSON or CSV. CSV rows are written with the dataset's delimiter.
+    """
+
+    def get(self, request, slug, export_format):
+        dataset = get_object_or_404(Dataset, slug=slug)
+        if not dataset.is_analyzed:
+            return get_error_response('The dataset is still being analyzed.', status=409)
+        if not dataset.has_rows:
+            return get_error_response('Rows of the dataset are not stored.', status=404)
+
+        errors_only = 'errors' in request.GET
+        # Rows are only ever appended.
+        etag = quote_etag(f'{dataset.slug}-{dataset.line_count}-{errors_only:d}-{export_format}')
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            rows = iter_dataset_rows(dataset, errors_only=errors_only)
+            response = StreamingHttpResponse(
+                iter_export(rows, export_format, dataset.delimiter),
+                content_type=EXPORT_FORMATS[export_format])
+        response['ETag'] = etag
+        return response
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class UploadCollectionApiView(View):
+    """
+    Starts a chunked upload with the fields of `ChunkedUploadForm` (as
+    a JSON object). Parts are then sent to `UploadPartApiView`.
+    """
+
+    def post(self, request):
+        try:
+            data = load_json_object(request)
+        except ValueError:
+            return get_error_response('Invalid JSON.')
+        form = ChunkedUploadForm(data)
+        if not is_valid_json_form(form, data):
+            return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+
+        upload = start_upload(form)
+        response = JsonResponse(serialize_upload(upload), status=201)
+        response['Location'] = reverse('benford:api_upload', kwargs={'slug': upload.dataset.slug})
+        return response
+
+
+class UploadApiView(View):
+    """
+    State of a chunked upload, e.g. the next part to send when resuming it.
+    """
+
+    def get(self, request, slug):
+        upload = get_object_or_404(ChunkedUpload.objects.select_related('dataset'), dataset__slug=slug)
+        return JsonResponse(serialize_upload(upload))
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class UploadPartApiView(View):
+    """
+    Receives a part of a chunked upload. The body is the raw part, its
+    SHA-256 checksum (hex) is sent in the `X-Content-SHA256` header.
+    """
+
+    def put(self, request, slug, number):
+        upload = get_object_or_404(ChunkedUpload, dataset__slug=slug)
+        checksum = request.headers.get('X-Content-SHA256')
+        if not checksum:
+            return get_error_response('The X-Content-SHA256 header is required.')
+        if int(request.META.get('CONTENT_LENGTH') or 0) > BENFORD_UPLOAD_PART_MAX_SIZE:
+            return get_error_response(
+                f'Parts must not be larger than {BENFORD_UPLOAD_PART_MAX_SIZE} bytes.', status=413)
+
+        # `request.body` is limited to DATA_UPLOAD_MAX_MEMORY_SIZE.
+        data = request.read(BENFORD_UPLOAD_PART_MAX_SIZE)
+        try:
+            upload = receive_part(upload, number, data, checksum)
+        except UploadError as e:
+            return get_error_response(str(e), status=e.status)
+        return JsonResponse(serialize_upload(upload))
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class UploadCompleteApiView(View):
+    """
+    Completes a chunked upload and returns its dataset. The number of sent
+    parts may be given (`{"part_count": n}`) to check that none is missing.
+    """
+
+    def post(self, request, slug):
+        upload = get_object_or_404(ChunkedUpload, dataset__slug=slug)
+        try:
+            part_count = load_json_object(request).get('part_count')
+        except ValueError:
+            return get_error_response('Invalid JSON.')
+        if part_count is not None and not isinstance(part_count, int):
+            return get_error_response('The part count must be an integer.')
+
+        try:
+            upload = complete_upload(upload, part_count)
+        except UploadError as e:
+            return get_error_response(str(e), status=e.status)
+        return JsonResponse(serialize_dataset(upload.dataset))
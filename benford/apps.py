@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class BenfordConfig(AppConfig):
     name = 'benford'
+
+    def ready(self):
+        from benford import signals  # noqa: F401
@@ -0,0 +1,53 @@
+"""
+Async upload view for the ASGI deployment (`frankbenford.asgi`), routed
+instead of `DatasetUploadView` with `BENFORD_ASYNC_VIEWS`.
+
+Sync views (e.g. the dashboard) are all run in Django's single thread for
+sync code, so the slow parts of an upload run in pool threads instead:
+parsing the (possibly huge) request body into the form and validating it,
+and the analysis. Only queueing a job, a quick ORM write, runs in Django's
+thread.
+"""
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+
+from benford.analyzer import BenfordAnalyzer
+from benford.conf import BENFORD_ASYNC_ANALYSIS
+from benford.forms import DatasetUploadForm
+from benford.jobs import enqueue_analysis
+from benford.models import Dataset
+
+
+def get_upload_form(request) -> DatasetUploadForm:
+    # The request body is already spooled by the ASGI handler; parsing it
+    # copies uploaded files again and validating them reads from disk.
+    form = DatasetUploadForm(request.POST, request.FILES)
+    form.is_valid()
+    return form
+
+
+def analyze_upload(form: DatasetUploadForm) -> Dataset:
+    try:
+        return BenfordAnalyzer.create_from_form(form, save=True).dataset
+    finally:
+        # Pool threads are not request threads, so their connections
+        # wouldn't be closed otherwise.
+        connections.close_all()
+
+
+async def upload_dataset(request, async_analysis: bool = BENFORD_ASYNC_ANALYSIS):
+    if request.method != 'POST':
+        return TemplateResponse(request, 'benford/form.html', {'form': DatasetUploadForm()})
+
+    form = await sync_to_async(get_upload_form, thread_sensitive=False)(request)
+    if not form.is_valid():
+        return TemplateResponse(request, 'benford/form.html', {'form': form})
+
+    if async_analysis:
+        dataset = (await sync_to_async(enqueue_analysis, thread_sensitive=True)(form)).dataset
+    else:
+        dataset = await sync_to_async(analyze_upload, thread_sensitive=False)(form)
+    return redirect('benford:dataset_detail', slug=dataset.slug)
+
@@ -2,11 +2,9 @@ from django.conf import settings
 
 DEFAULT_BASE = getattr(settings, 'BENFORD_DEFAULT_BASE', 10)
 
-# Assessment whether given data is statistically significant.
-# Value taken from:
-# https://ib.bioninja.com.au/higher-level/topic-10-genetics-and-evolu/102-inheritance/chi-squared-table.html
-# Not sure here... :(
-BENFORD_LAW_COMPLIANCE_STAT_SIG = 14.68
+# Significance level of the chi-squared test whether given data complies
+# with Benford's law.
+BENFORD_LAW_COMPLIANCE_SIGNIFICANCE = getattr(settings, 'BENFORD_LAW_COMPLIANCE_SIGNIFICANCE', 0.1)
 
 # Delimiters we accept from user. They are recognized by the order in the list.
 ALLOWED_DELIMITERS = ["\t", ";", ","]
@@ -16,3 +14,61 @@ DEFAULT_DELIMITER = "\t"
 # If we don't provide the relevant column in a dataset and it's not recognized
 # automatically (no number) we assume the following column index.
 DEFAULT_RELEVANT_COLUMN = 0
+
+# How many values are collected from the input before their significant
+# digits are counted in one vectorized pass.
+BENFORD_ANALYSIS_BATCH_SIZE = getattr(settings, 'BENFORD_ANALYSIS_BATCH_SIZE', 10000)
+
+# Uploaded files are read and decoded in chunks of this many bytes.
+BENFORD_UPLOAD_CHUNK_SIZE = getattr(settings, 'BENFORD_UPLOAD_CHUNK_SIZE', 64 * 1024)
+
+# How dataset rows are written to the database: `copy` (PostgreSQL only),
+# `bulk_create`, `blocks` (compressed blocks of rows) or `auto` to pick
+# `copy` whenever the backend supports it.
+BENFORD_ROW_LOADER = getattr(settings, 'BENFORD_ROW_LOADER', 'auto')
+
+# Analyze uploaded datasets in background workers (`manage.py benford_worker`)
+# instead of inside the upload request.
+BENFORD_ASYNC_ANALYSIS = getattr(settings, 'BENFORD_ASYNC_ANALYSIS', False)
+
+# How often (in seconds) an idle worker checks for new jobs.
+BENFORD_WORKER_POLL_INTERVAL = getattr(settings, 'BENFORD_WORKER_POLL_INTERVAL', 2)
+
+# Minimal interval (in seconds) between updates of a running job's progress.
+BENFORD_JOB_PROGRESS_INTERVAL = getattr(settings, 'BENFORD_JOB_PROGRESS_INTERVAL', 1)
+
+# Running jobs whose worker hasn't reported progress for this long (in
+# seconds) are failed, e.g. when the worker was killed.
+BENFORD_JOB_LEASE_TIMEOUT = getattr(settings, 'BENFORD_JOB_LEASE_TIMEOUT', 10 * 60)
+
+# How long (in seconds) browsers may cache graph images. Image URLs change
+# together with the data, so this can be long.
+BENFORD_GRAPH_MAX_AGE = getattr(settings, 'BENFORD_GRAPH_MAX_AGE', 60 * 60 * 24)
+
+# Format of graph images on the dataset page: `png` (rendered with
+# matplotlib and cached) or `svg` (built without matplotlib).
+BENFORD_GRAPH_FORMAT = getattr(settings, 'BENFORD_GRAPH_FORMAT', 'png')
+
+# Number of rows in a compressed block (`blocks` row loader).
+BENFORD_ROW_BLOCK_SIZE = getattr(settings, 'BENFORD_ROW_BLOCK_SIZE', 10000)
+
+# Number of processes analyzing a file on disk (`BenfordAnalyzer.create_from_path`).
+# With `1` files are analyzed in the current process.
+BENFORD_ANALYSIS_WORKERS = getattr(settings, 'BENFORD_ANALYSIS_WORKERS', 1)
+
+# Size (in bytes) of the line-aligned parts of a file handed to each process.
+BENFORD_PARALLEL_CHUNK_SIZE = getattr(settings, 'BENFORD_PARALLEL_CHUNK_SIZE', 16 * 1024 * 1024)
+
+# Digit tests counted along with the first significant digit, in the same
+# pass over the input: `second`, `first_two` and `last_two` (digits).
+BENFORD_DIGIT_TESTS = getattr(settings, 'BENFORD_DIGIT_TESTS', ('second', 'first_two', 'last_two'))
+
+# Number of rows fetched at once when rows are exported (streamed).
+BENFORD_EXPORT_CHUNK_SIZE = getattr(settings, 'BENFORD_EXPORT_CHUNK_SIZE', 2000)
+
+# Route the upload page to an async view (`benford.async_views`), for
+# deployments served by an ASGI server.
+BENFORD_ASYNC_VIEWS = getattr(settings, 'BENFORD_ASYNC_VIEWS', False)
+
+# Maximal size (in bytes) of a part of a chunked upload (`benford.uploads`).
+BENFORD_UPLOAD_PART_MAX_SIZE = getattr(settings, 'BENFORD_UPLOAD_PART_MAX_SIZE', 64 * 1024 * 1024)
@@ -1,10 +1,17 @@
+import functools
 import math
 import re
 from decimal import Decimal
+from fractions import Fraction
+from types import MappingProxyType
+from typing import NamedTuple
 
-from benford.conf import DEFAULT_BASE
+import numpy
+from scipy.stats import chi2
+
+from benford.conf import DEFAULT_BASE, BENFORD_ANALYSIS_BATCH_SIZE, BENFORD_LAW_COMPLIANCE_SIGNIFICANCE
 from benford.exceptions import NoSignificantDigitFound
-from benford.utils import calc_percentage, round_decimal
+from benford.utils import round_decimal, iter_batches
 
 EXPECTED_BENFORD_LAW_DISTRIBUTION = {
     1: Decimal('30.1'),
@@ -19,11 +26,23 @@ EXPECTED_BENFORD_LAW_DISTRIBUTION = {
 }
 
 
-def get_expected_distribution_flat(base=DEFAULT_BASE):
-    return [get_expected_distribution(i + 1) for i in range(base - 1)]
+# Digit tests: which digits of a value are counted.
+FIRST_DIGIT_TEST = 'first'
+SECOND_DIGIT_TEST = 'second'
+FIRST_TWO_DIGITS_TEST = 'first_two'
+LAST_TWO_DIGITS_TEST = 'last_two'
+DIGIT_TESTS = (FIRST_DIGIT_TEST, SECOND_DIGIT_TEST, FIRST_TWO_DIGITS_TEST, LAST_TWO_DIGITS_TEST)
+
+# Values longer than this (in characters) aren't put in the vectorized
+# columns of a batch, whose memory grows with the longest value.
+MAX_VECTORIZED_VALUE_LENGTH = 256
+
+
+def get_expected_distribution_flat(base=DEFAULT_BASE, test=FIRST_DIGIT_TEST):
+    return list(get_expected_percentages(base, test).values())
 
 
-def get_expected_distribution(digit, base=DEFAULT_BASE):
+def get_expected_distribution(digit, base=DEFAULT_BASE, test=FIRST_DIGIT_TEST, decimal_places=1):
     """
     Calculates probability of occurence of `digit` as first digit in a number
     for a given base (decimal as default).
@@ -31,18 +50,140 @@ def get_expected_distribution(digit, base=DEFAULT_BASE):
     Implementation based on:
     https://en.wikipedia.org/wiki/Benford%27s_law#Benford's_law_in_other_bases
 
-    :param digit: First significant digit to be checked.
+    :param digit: First significant digit to be checked (or digits
+        of another `test`, see `get_expected_probability`).
     :param base: Base to calculate for.
-    :return:
+    :param test: Digit test, first significant digit by default.
+    :return: Percentage rounded to `decimal_places`.
     """
     assert base >= 2, 'Base must be greater or equal 2'
-    return round_decimal(100 * math.log(1 + 1 / digit, base), 1)
+    percentages = get_expected_percentages(base, test, decimal_places)
+    if digit in percentages:
+        return percentages[digit]
+    return round_decimal(100 * get_expected_probability(digit, base, test), decimal_places)
+
+
+@functools.lru_cache(maxsize=None)
+def get_expected_percentages(base=DEFAULT_BASE, test=FIRST_DIGIT_TEST, decimal_places=1) -> dict:
+    """
+    Expected percentages of all digits of a digit `test` in `base`,
+    computed once per base and test. The returned mapping is read-only.
+    """
+    return MappingProxyType(dict(
+        (digit, round_decimal(100 * probability, decimal_places))
+        for digit, probability in zip(
+            get_digit_test_range(test, base), get_expected_probabilities(base, test))))
+
+
+@functools.lru_cache(maxsize=None)
+def get_expected_probabilities(base=DEFAULT_BASE, test=FIRST_DIGIT_TEST) -> numpy.ndarray:
+    """
+    Expected probabilities of all digits of a digit `test` in `base`
+    (in the order of `get_digit_test_range`), computed once per base and
+    test. The returned array is read-only.
+    """
+    probabilities = numpy.array([
+        get_expected_probability(digit, base, test) for digit in get_digit_test_range(test, base)])
+    probabilities.flags.writeable = False
+    return probabilities
+
+
+@functools.lru_cache(maxsize=None)
+def get_compliance_critical_value(base=DEFAULT_BASE) -> float:
+    """
+    Chi-squared statistic up to which first digits in `base` are considered
+    compliant with Benford's law, at `BENFORD_LAW_COMPLIANCE_SIGNIFICANCE`
+    and the same degrees of freedom as the p-value of `compute_statistics()`.
+    """
+    return float(chi2.isf(BENFORD_LAW_COMPLIANCE_SIGNIFICANCE, get_degrees_of_freedom_for_base(base)))
+
+
+class DigitStatistics(NamedTuple):
+    chisq_statistic: float
+    p_value: float
+    mad: float
+    z_statistics: numpy.ndarray
+
+
+def get_count_vector(occurences: dict, base=DEFAULT_BASE, test=FIRST_DIGIT_TEST) -> numpy.ndarray:
+    """
+    Occurences of all digits of a digit `test` in `base` as a float64 array
+    in the order of `get_digit_test_range` (and `get_expected_probabilities`).
+    """
+    digits = get_digit_test_range(test, base)
+    counts = numpy.zeros(len(digits))
+    for digit, count in occurences.items():
+        if digit in digits:
+            counts[digit - digits.start] = count
+    return counts
+
+
+def compute_statistics(counts: numpy.ndarray, probabilities: numpy.ndarray) -> DigitStatistics:
+    """
+    Chi-squared test, mean absolute deviation and per-digit Z-statistics
+    of observed digit `counts` against expected `probabilities`.
+
+    `counts` is a count vector or a matrix with one count vector per row,
+    which are all evaluated at once. Statistics are computed on raw counts
+    in float64; round them only for display. Rows without any counts
+    yield NaN.
+    """
+    counts = numpy.asarray(counts, dtype=numpy.float64)
+    total = counts.sum(axis=-1, keepdims=True)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        expected_counts = probabilities * total
+        chisq_statistic = numpy.sum((counts - expected_counts) ** 2 / expected_counts, axis=-1)
+
+        deviations = numpy.abs(counts / total - probabilities)
+        # Nigrini's Z-statistic with a continuity correction that is only
+        # applied when it is smaller than the deviation.
+        correction = numpy.minimum(1 / (2 * total), deviations)
+        z_statistics = (deviations - correction) / numpy.sqrt(probabilities * (1 - probabilities) / total)
+
+    return DigitStatistics(
+        chisq_statistic=chisq_statistic,
+        p_value=chi2.sf(chisq_statistic, counts.shape[-1] - 1),
+        mad=deviations.mean(axis=-1),
+        z_statistics=z_statistics,
+    )
+
+
+def get_expected_probability(digit, base=DEFAULT_BASE, test=FIRST_DIGIT_TEST) -> float:
+    """
+    Probability of `digit` in a digit `test` under Benford's law:
+
+    - `first`: first significant digit,
+    - `second`: second digit (any first digit),
+    - `first_two`: first two digits as a number (e.g. 10 to 99),
+    - `last_two`: last two digits, which are expected to be uniform.
+    """
+    if test in (FIRST_DIGIT_TEST, FIRST_TWO_DIGITS_TEST):
+        return math.log(1 + 1 / digit, base)
+    if test == SECOND_DIGIT_TEST:
+        return sum(math.log(1 + 1 / (base * first + digit), base) for first in range(1, base))
+    if test == LAST_TWO_DIGITS_TEST:
+        return 1 / base ** 2
+    raise ValueError(f'Unknown digit test `{test}`.')
+
+
+def get_digit_test_range(test=FIRST_DIGIT_TEST, base=DEFAULT_BASE) -> range:
+    """
+    All digits (or two-digit numbers) a digit `test` can count.
+    """
+    return {
+        FIRST_DIGIT_TEST: range(1, base),
+        SECOND_DIGIT_TEST: range(0, base),
+        FIRST_TWO_DIGITS_TEST: range(base, base ** 2),
+        LAST_TWO_DIGITS_TEST: range(0, base ** 2),
+    }[test]
 
 
 re_first_sig_digit = re.compile(r'[1-9]')
 
 
-def get_first_significant_digit(value) -> int:
+def get_first_significant_digit(value, base=DEFAULT_BASE) -> int:
+    if base != 10:
+        return _get_first_significant_digit_in_base(value, base)
     string = str(value)
     match = re_first_sig_digit.search(string)
     if match and match.group():
@@ -50,6 +191,315 @@ def get_first_significant_digit(value) -> int:
     raise NoSignificantDigitFound(value)
 
 
+def _get_first_significant_digit_in_base(value, base: int) -> int:
+    """
+    First significant digit of a (decimal) number written in `base`, computed with
+    exact rational arithmetic. Only numbers (or their string
+    representations) have digits in other bases.
+    """
+    try:
+        number = abs(Fraction(value) if isinstance(value, int) else Fraction(float(value)))
+    except (TypeError, ValueError, OverflowError):
+        raise NoSignificantDigitFound(value)
+    if not number:
+        raise NoSignificantDigitFound(value)
+
+    exponent = math.floor(math.log(number, base))
+    while Fraction(base) ** exponent > number:
+        exponent -= 1
+    while Fraction(base) ** (exponent + 1) <= number:
+        exponent += 1
+    return int(number / Fraction(base) ** exponent)
+
+
+def get_first_significant_digits(values, base=DEFAULT_BASE) -> numpy.ndarray:
+    """
+    Vectorized counterpart of `get_first_significant_digit`: finds the first
+    significant digit of every value in a column in one pass.
+
+    String columns (NumPy `bytes_` or `str_` arrays) are scanned character by
+    character for the first `[1-9]`, exactly like the regular expression
+    used by `get_first_significant_digit`. Float columns are handled with
+    log10/floor arithmetic.
+
+    In other bases than decimal, values are parsed as numbers: integers
+    are divided by `base` until they have a single digit and other
+    numbers are handled with logarithms (see `get_first_significant_digits_in_base`).
+
+    :param values: Column of values (array or sequence).
+    :param base: Base in which leading digits are examined (values are
+        always read as decimal numbers).
+    :return: Array of digits; `0` marks values without a significant digit.
+    """
+    values = numpy.asarray(values)
+    if base != 10:
+        return get_first_significant_digits_in_base(values, base)
+    if values.dtype.kind in ('S', 'U'):
+        return _get_first_significant_digits_from_strings(values)
+    if values.dtype.kind in ('i', 'u', 'b', 'O'):
+        # Integers may exceed float precision, so we scan their digits.
+        return _get_first_significant_digits_from_strings(values.astype(str))
+    return _get_first_significant_digits_from_numbers(values)
+
+
+def _get_first_significant_digits_from_strings(values: numpy.ndarray) -> numpy.ndarray:
+    values = numpy.ascontiguousarray(values.ravel())
+    if not values.size or not values.itemsize:
+        return numpy.zeros(values.size, dtype=numpy.int8)
+
+    # Look at the raw characters: one byte each for `bytes_`, one UCS-4
+    # code point each for `str_`.
+    code_unit = numpy.uint8 if values.dtype.kind == 'S' else numpy.uint32
+    chars = values.view(code_unit).reshape(values.size, -1)
+    is_digit = (chars >= ord('1')) & (chars <= ord('9'))
+    first = is_digit.argmax(axis=1)
+    rows = numpy.arange(values.size)
+    found = is_digit[rows, first]
+    return numpy.where(found, chars[rows, first] - ord('0'), 0).astype(numpy.int8)
+
+
+def _get_first_significant_digits_from_numbers(values: numpy.ndarray) -> numpy.ndarray:
+    values = values.ravel().astype(numpy.float64)
+    magnitudes = numpy.abs(values)
+    valid = numpy.isfinite(magnitudes) & (magnitudes > 0)
+    magnitudes = numpy.where(valid, magnitudes, 1.0)
+
+    with numpy.errstate(over='ignore', divide='ignore', invalid='ignore'):
+        exponents = numpy.floor(numpy.log10(magnitudes))
+        powers = 10.0 ** exponents
+        mantissas = magnitudes / powers
+        leading = numpy.rint(mantissas)
+        # Powers of ten up to 10**22 are exact floats, so we can tell
+        # whether a value is exactly `digit * 10**n`.
+        exact = (exponents >= 0) & (exponents <= 22) & (leading * powers == magnitudes)
+        digits = numpy.where(exact, leading, numpy.floor(mantissas))
+        digits = numpy.where(numpy.isfinite(digits), digits, 0).astype(numpy.int8)
+        digits[digits == 10] = 1
+        digits[~valid] = 0
+
+        # Values within float rounding error of a digit boundary (e.g. 0.3 is
+        # stored as 0.29999...) are resolved by the reference implementation,
+        # which looks at the shortest decimal representation.
+        ambiguous = valid & ~exact & ~(numpy.abs(mantissas - leading) >= 1e-9)
+    for i in numpy.flatnonzero(ambiguous):
+        digits[i] = get_first_significant_digit(float(values[i]))
+    return digits
+
+
+def get_first_significant_digits_in_base(values, base: int) -> numpy.ndarray:
+    """
+    First significant digits of (decimal) numbers written in `base`.
+    Strings that aren't numbers have no significant digit.
+
+    :return: Array of digits (`int16`); `0` marks values without a significant digit.
+    """
+    values = numpy.asarray(values).ravel()
+    if values.dtype.kind in ('i', 'u', 'b'):
+        return _get_first_significant_digits_of_integers(
+            numpy.abs(values.astype(numpy.int64)).astype(numpy.uint64), base)
+    numbers = _parse_numbers(values)
+
+    magnitudes = numpy.abs(numbers)
+    valid = numpy.isfinite(magnitudes) & (magnitudes > 0)
+    # Integral values are exact in float64 up to 2**53.
+    integral = valid & (magnitudes < 2 ** 53) & (numpy.floor(magnitudes) == magnitudes)
+    digits = numpy.zeros(len(values), dtype=numpy.int16)
+    digits[integral] = _get_first_significant_digits_of_integers(
+        magnitudes[integral].astype(numpy.uint64), base)
+
+    others = valid & ~integral
+    with numpy.errstate(over='ignore', divide='ignore', invalid='ignore'):
+        exponents = numpy.floor(numpy.log(magnitudes[others]) / math.log(base))
+        mantissas = magnitudes[others] / numpy.power(float(base), exponents)
+    leading = numpy.floor(mantissas)
+    digits[others] = numpy.clip(numpy.nan_to_num(leading), 1, base - 1)
+
+    # Values close to a digit boundary are resolved exactly.
+    ambiguous = numpy.flatnonzero(others)[
+        ~(numpy.abs(mantissas - numpy.rint(mantissas)) >= 1e-9 * numpy.maximum(mantissas, 1))]
+    for i in ambiguous:
+        digits[i] = _get_first_significant_digit_in_base(float(numbers[i]), base)
+    return digits
+
+
+def _get_first_significant_digits_of_integers(magnitudes: numpy.ndarray, base: int) -> numpy.ndarray:
+    digits = magnitudes.copy()
+    while True:
+        multi_digit = digits >= base
+        if not multi_digit.any():
+            return digits.astype(numpy.int16)
+        digits[multi_digit] //= base
+
+
+def _parse_numbers(values: numpy.ndarray) -> numpy.ndarray:
+    """
+    Parses a column as float64; values that aren't numbers become NaN.
+    """
+    try:
+        return values.astype(numpy.float64)
+    except (TypeError, ValueError):
+        pass
+
+    def parse(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return math.nan
+    return numpy.fromiter((parse(v) for v in values), dtype=numpy.float64, count=len(values))
+
+
+def get_digit_test_values(values, tests=DIGIT_TESTS) -> dict:
+    """
+    Extracts digits for several digit `tests` from a column of values in
+    a single scan of its characters (values are treated as strings, like
+    by `get_first_significant_digits`).
+
+    Tests other than `first` need at least two digits starting with the
+    first significant one (e.g. `0.05` has none); their last-two digits
+    are the last two digit characters (`12.34` gives `34`).
+
+    :return: Dict of arrays by test; `-1` marks values a test doesn't apply to.
+    """
+    values = numpy.asarray(values)
+    if values.dtype.kind not in ('S', 'U'):
+        values = values.astype(str)
+    values = numpy.ascontiguousarray(values.ravel())
+    if not values.size or not values.itemsize:
+        return dict((test, numpy.full(values.size, -1, dtype=numpy.int16)) for test in tests)
+
+    code_unit = numpy.uint8 if values.dtype.kind == 'S' else numpy.uint32
+    chars = values.view(code_unit).reshape(values.size, -1)
+    numbers = chars.astype(numpy.int16) - ord('0')
+    is_digit = (chars >= ord('0')) & (chars <= ord('9'))
+    rows = numpy.arange(values.size)
+
+    first = (is_digit & (chars != ord('0'))).argmax(axis=1)
+    found = is_digit[rows, first] & (numbers[rows, first] > 0)
+    first_digits = numbers[rows, first]
+
+    result = {}
+    if FIRST_DIGIT_TEST in tests:
+        result[FIRST_DIGIT_TEST] = numpy.where(found, first_digits, -1)
+    if set(tests) - {FIRST_DIGIT_TEST}:
+        columns = numpy.arange(chars.shape[1])
+        after_first = is_digit & (columns > first[:, None])
+        second = after_first.argmax(axis=1)
+        has_two = found & after_first[rows, second]
+        second_digits = numbers[rows, second]
+
+        if SECOND_DIGIT_TEST in tests:
+            result[SECOND_DIGIT_TEST] = numpy.where(has_two, second_digits, -1)
+        if FIRST_TWO_DIGITS_TEST in tests:
+            result[FIRST_TWO_DIGITS_TEST] = numpy.where(has_two, 10 * first_digits + second_digits, -1)
+        if LAST_TWO_DIGITS_TEST in tests:
+            last = chars.shape[1] - 1 - is_digit[:, ::-1].argmax(axis=1)
+            before_last = is_digit & (columns < last[:, None])
+            penultimate = chars.shape[1] - 1 - before_last[:, ::-1].argmax(axis=1)
+            result[LAST_TWO_DIGITS_TEST] = numpy.where(
+                has_two, 10 * numbers[rows, penultimate] + numbers[rows, last], -1)
+    return result
+
+
+def count_digit_test_values(values: numpy.ndarray) -> dict:
+    """
+    Counts values returned by `get_digit_test_values`, leaving out the
+    `-1` marker and values that didn't occur.
+    """
+    values = numpy.asarray(values, dtype=numpy.intp)
+    counts = numpy.bincount(values[values >= 0])
+    return dict((int(v), int(counts[v])) for v in numpy.flatnonzero(counts))
+
+
+def merge_test_occurences(test_occurences: dict, other: dict) -> dict:
+    """
+    Adds occurences of every digit test in `other` into `test_occurences`
+    (in place).
+    """
+    for test, occurences in other.items():
+        merge_occurences(test_occurences.setdefault(test, {}), occurences)
+    return test_occurences
+
+
+def count_significant_digits(digits: numpy.ndarray, base=DEFAULT_BASE) -> dict:
+    """
+    Counts occurences of significant digits returned by
+    `get_first_significant_digits`. Digits that didn't occur (and the `0`
+    marker for invalid values) are left out.
+    """
+    counts = numpy.bincount(numpy.asarray(digits, dtype=numpy.intp), minlength=base)
+    return dict((d, int(counts[d])) for d in range(1, len(counts)) if counts[d])
+
+
+def merge_occurences(occurences: dict, other: dict) -> dict:
+    """
+    Adds occurences from `other` into `occurences` (in place).
+    """
+    for digit, count in other.items():
+        occurences[digit] = occurences.get(digit, 0) + count
+    return occurences
+
+
+def iter_counted_batches(
+        rows, relevant_column: int, occurences: dict, error_rows: set,
+        skip_line: int = None, batch_size: int = BENFORD_ANALYSIS_BATCH_SIZE,
+        test_occurences: dict = None, base: int = DEFAULT_BASE):
+    """
+    Counts first significant digits in the `relevant_column` of `(line, row)`
+    pairs, one vectorized pass per batch, and yields each batch once it's
+    counted. Counts are added to `occurences` and lines without a significant
+    digit (or without the column) to `error_rows`. Line `skip_line` (the
+    header) isn't counted.
+
+    Other digit tests are counted in the same pass into `test_occurences`,
+    a dict of occurences by test (its keys select the tests). They are
+    only supported for decimal digits (`base` 10).
+    """
+    for batch in iter_batches(rows, batch_size):
+        lines = []
+        values = []
+        for line, row in batch:
+            if line == skip_line:
+                continue
+            try:
+                values.append(row[relevant_column])
+                lines.append(line)
+            except IndexError:
+                error_rows.add(line)
+
+        if values:
+            # Columns are fixed-width arrays as wide as their longest value,
+            # so overlong values are counted one by one.
+            long_values = [i for i, value in enumerate(values) if len(value) > MAX_VECTORIZED_VALUE_LENGTH]
+            if long_values:
+                digits = numpy.zeros(len(values), dtype=numpy.int16)
+                short_values = numpy.ones(len(values), dtype=bool)
+                short_values[long_values] = False
+                digits[short_values] = _count_column(
+                    [value for value, short in zip(values, short_values) if short], base, test_occurences)
+                for i in long_values:
+                    digits[i] = _count_column(values[i:i + 1], base, test_occurences)[0]
+            else:
+                digits = _count_column(values, base, test_occurences)
+            merge_occurences(occurences, count_significant_digits(digits, base))
+            error_rows.update(lines[i] for i in numpy.flatnonzero(digits == 0))
+        yield batch
+
+
+def _count_column(values: list, base: int, test_occurences: dict) -> numpy.ndarray:
+    """
+    First significant digits of `values`; other digit tests are counted
+    into `test_occurences` (see `iter_counted_batches`).
+    """
+    column = numpy.array(values, dtype=str)
+    if test_occurences and base == 10:
+        test_values = get_digit_test_values(column, (FIRST_DIGIT_TEST, *test_occurences))
+        for test, test_column in test_values.items():
+            if test != FIRST_DIGIT_TEST:
+                merge_occurences(test_occurences[test], count_digit_test_values(test_column))
+        return numpy.maximum(test_values[FIRST_DIGIT_TEST], 0)
+    return get_first_significant_digits(column, base)
+
+
 def map_significant_digits(samples: iter):
     return map(lambda x: get_first_significant_digit(x), samples)
 
@@ -66,24 +516,32 @@ def count_occurences(samples: list, search_for_values=None) -> dict:
 
 
 def count_occurences_with_percentage(occurences: dict, decimal_places: int = 1):
-    result = {}
-    percent_remaining = Decimal('100')
-    total_occurences = sum(occurences.values())
-    k = None
-
-    for k, v in occurences.items():
-        v_percent = calc_percentage(v, total_occurences, decimal_places)
-        if v_percent > percent_remaining:
-            v_percent = percent_remaining
-        result[k] = v_percent
-        percent_remaining -= v_percent
-    if percent_remaining != 0:
-        result[k] += percent_remaining
-        percent_remaining = 0
-
-    assert percent_remaining == 0, 'Sum of occurence percentages is not 100%.'
-    return result
+    """
+    Percentages of `occurences` rounded half up to `decimal_places`,
+    adjusted so that they sum up to exactly 100.
+
+    Rounding is done on integers (hundredths of a percent for 2 decimal
+    places, etc.) so it is exact; `Decimal` is only used for the result.
+    """
+    if not occurences:
+        return {}
+    counts = numpy.fromiter(occurences.values(), dtype=numpy.int64, count=len(occurences))
+    scale = 100 * 10 ** decimal_places
+    total = int(counts.sum())
+    units = (2 * scale * counts + total) // (2 * total)
+
+    # Once rounding has used up the 100 %, the following percentages are cut.
+    remaining = numpy.clip(scale - (numpy.cumsum(units) - units), 0, None)
+    units = numpy.minimum(units, remaining)
+    units[-1] += scale - units.sum()
+
+    assert units.sum() == scale, 'Sum of occurence percentages is not 100%.'
+    return {
+        k: Decimal(int(v)).scaleb(-decimal_places)
+        for k, v in zip(occurences, units)
+    }
 
 
 def get_degrees_of_freedom_for_base(base):
-    return base - 1
+    # First digits are 1 to base - 1, and their counts sum to the total.
+    return base - 2
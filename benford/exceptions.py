@@ -1,2 +1,18 @@
 class NoSignificantDigitFound(Exception):
     pass
+
+
+class UploadError(Exception):
+    """
+    Rejected part of a chunked upload. `status` is the HTTP status of
+    the API response.
+    """
+    status = 400
+
+
+class ChecksumMismatch(UploadError):
+    pass
+
+
+class UnexpectedPart(UploadError):
+    status = 409
@@ -0,0 +1,46 @@
+import csv
+import json
+
+from benford.conf import BENFORD_EXPORT_CHUNK_SIZE
+from benford.utils import iter_batches
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class _Echo:
+    """
+    File-like object returning what is written, so that `csv.writer`
+    output can be yielded instead of buffered.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, delimiter: str, chunk_size: int = BENFORD_EXPORT_CHUNK_SIZE):
+    """
+    Yields `rows` (their data) as CSV text, `chunk_size` rows at a time.
+    """
+    writer = csv.writer(_Echo(), delimiter=delimiter, lineterminator='\n')
+    for batch in iter_batches(rows, chunk_size):
+        yield ''.join(writer.writerow(row.data) for row in batch)
+
+
+def iter_ndjson(rows, chunk_size: int = BENFORD_EXPORT_CHUNK_SIZE):
+    """
+    Yields `rows` as newline-delimited JSON objects with their line
+    number, data and error flag, `chunk_size` rows at a time.
+    """
+    for batch in iter_batches(rows, chunk_size):
+        yield ''.join(
+            json.dumps({'line': row.line, 'data': row.data, 'has_error': row.has_error}) + '\n'
+            for row in batch)
+
+
+def iter_export(rows, export_format: str, delimiter: str = ','):
+    if export_format == 'ndjson':
+        return iter_ndjson(rows)
+    return iter_csv(rows, delimiter)
@@ -4,6 +4,10 @@ from django import forms
 from pydash import get
 
 from crispy_forms_bootstrap5.forms import CrispyFormMixin
+from benford.conf import ALLOWED_DELIMITERS
+
+# Columns are stored in a `PositiveSmallIntegerField`.
+MAX_RELEVANT_COLUMN = 32767
 
 
 class DatasetUploadForm(CrispyFormMixin, forms.Form):
@@ -15,11 +19,15 @@ class DatasetUploadForm(CrispyFormMixin, forms.Form):
         widget=forms.Textarea(), required=False,
     )
     relevant_column = forms.IntegerField(
-        min_value=0, required=False,
+        min_value=0, max_value=MAX_RELEVANT_COLUMN, required=False,
         widget=forms.NumberInput(attrs={'placeholder': 'Auto'}))
     has_header = forms.BooleanField(
         required=False,
         label="Is first row a header?")
+    base = forms.IntegerField(
+        min_value=3, max_value=36, required=False,
+        help_text="Base in which leading digits are examined (decimal by default).",
+        widget=forms.NumberInput(attrs={'placeholder': '10'}))
 
     def clean(self):
         data_file = get(self.cleaned_data, 'data_file')
@@ -62,9 +70,61 @@ class DatasetUploadForm(CrispyFormMixin, forms.Form):
                 ),
                 css_class='row my-3 align-items-end',
             ),
+            Div(
+                Div(
+                    Field('base', css_class='form-control'),
+                    css_class='col-12 col-md-6',
+                ),
+                css_class='row my-3',
+            ),
             Submit(name='submit', value='Send form', css_id='id_submit'),
         )
 
     @property
     def form_id(self) -> str:
         return 'form-upload-dataset'
+
+
+class DatasetAppendForm(DatasetUploadForm):
+    """
+    Rows appended to a dataset are parsed like its original input, so
+    only the data (and whether it has a header) can be given.
+    """
+    title = None
+    relevant_column = None
+    base = None
+
+    def get_form_layout(self) -> Layout:
+        return Layout(
+            Div(
+                Field('data_file', css_class='form-control'),
+                css_class='row my-3',
+            ),
+            Div(
+                Field('data_raw', css_class='form-control'),
+                css_class='row my-3',
+            ),
+            Div(
+                Div(Field('has_header', css_class='form-check-input'), css_class='form-check'),
+                css_class='row my-3',
+            ),
+            Submit(name='submit', value='Append rows', css_id='id_submit'),
+        )
+
+    @property
+    def form_id(self) -> str:
+        return 'form-append-dataset'
+
+
+class ChunkedUploadForm(forms.Form):
+    """
+    Options of a chunked upload (`benford.uploads`). The data itself is
+    sent later in parts, so the delimiter can't be detected from a whole
+    file; it's detected from the first line unless given.
+    """
+    title = forms.CharField(required=False)
+    relevant_column = forms.IntegerField(min_value=0, max_value=MAX_RELEVANT_COLUMN, required=False)
+    has_header = forms.BooleanField(required=False)
+    base = forms.IntegerField(min_value=3, max_value=36, required=False)
+    delimiter = forms.ChoiceField(
+        choices=[(delimiter, delimiter) for delimiter in ALLOWED_DELIMITERS], required=False)
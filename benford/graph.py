@@ -1,38 +1,194 @@
 import base64
+import hashlib
 import io
+import json
+import os
+import threading
 import urllib
 
-import matplotlib.pyplot as plt
-from matplotlib.pyplot import xticks
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
 from benford.analyzer import BenfordAnalyzer
 from benford.core import get_expected_distribution_flat
+from benford.models import Dataset
+
+# Bump whenever the look of the graph changes to invalidate cached images.
+GRAPH_VERSION = 2
+
+GRAPH_CACHE_DIR = 'graphs'
+
+GRAPH_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+    'json': 'application/json',
+}
+
+GRAPH_BAR_COLOR = '#7C90DB'
+
+# Expected percentages are drawn with an error bar of this size.
+GRAPH_ERROR_MARGIN = 2
+
+
+class GraphRenderer:
+    """
+    Renders graphs with matplotlib's object-oriented API and the Agg canvas,
+    without the global `pyplot` state. Every thread reuses its own
+    preconfigured figure (one per set of digits), so only the data artists
+    are drawn for each graph and the renderer is safe to use from multiple
+    threads.
+    """
+
+    def __init__(self, figsize=(6.4, 4.8), dpi=100):
+        self.figsize = figsize
+        self.dpi = dpi
+        self._local = threading.local()
+
+    def render_png(self, digits: list, observed: list, expected: list) -> bytes:
+        figure, axes = self._get_template(digits)
+        artists = [
+            axes.bar(digits, observed, color=GRAPH_BAR_COLOR),
+            axes.errorbar(
+                digits, expected, yerr=GRAPH_ERROR_MARGIN,
+                color='black', marker='o', linestyle='None'),
+        ]
+        try:
+            top = max(list(observed) + [x + GRAPH_ERROR_MARGIN for x in expected])
+            axes.set_ylim(0, top * 1.05)
+            buffer = io.BytesIO()
+            figure.canvas.print_png(buffer)
+        finally:
+            # Leave the template clean for the next graph.
+            for artist in artists:
+                artist.remove()
+        return buffer.getvalue()
+
+    def _get_template(self, digits: list):
+        templates = self._local.__dict__.setdefault('templates', {})
+        key = tuple(digits)
+        if key not in templates:
+            figure = Figure(figsize=self.figsize, dpi=self.dpi)
+            FigureCanvasAgg(figure)
+            axes = figure.add_subplot()
+            axes.set_xticks(digits)
+            templates[key] = (figure, axes)
+        return templates[key]
+
+
+renderer = GraphRenderer()
+
+
+def get_graph_data(analyzer: BenfordAnalyzer) -> dict:
+    """
+    Values the graph is drawn from: digits with their observed and
+    expected percentages.
+    """
+    digits = list(analyzer.get_digits_list())
+    return {
+        'digits': digits,
+        'observed': [float(x) for x in analyzer.get_observed_distribution_flat()],
+        'expected': [float(x) for x in get_expected_distribution_flat(analyzer.base)],
+    }
 
 
 def create_graph_buffer(analyzer: BenfordAnalyzer):
     assert isinstance(analyzer, BenfordAnalyzer)
-    dataset = analyzer.dataset
-    expected_distribution = get_expected_distribution_flat()
-    x_range = range(1, dataset.base)
-    xticks(x_range)
-    plt.plot(
-        x_range, expected_distribution,
-        color='black', marker='o', linestyle='None')
-    plt.errorbar(
-        x_range, expected_distribution,
-        yerr=2, linestyle='None', color='black')
-    digits = x_range
-
-    # Observed values.
-    percentages = analyzer.get_observed_distribution_flat()
-    plt.bar(digits, percentages, color='#7C90DB')
-
-    fig = plt.gcf()
-    buffer = io.BytesIO()
-    fig.savefig(buffer, format='png')
-    buffer.seek(0)
-    plt.close(fig)
-    return buffer
+    return io.BytesIO(renderer.render_png(**get_graph_data(analyzer)))
+
+
+def create_graph_svg(analyzer: BenfordAnalyzer, width: int = 640, height: int = 480) -> str:
+    """
+    Draws the graph as a plain SVG document, without matplotlib.
+    """
+    data = get_graph_data(analyzer)
+    margin = 40
+    top = max(data['observed'] + [x + GRAPH_ERROR_MARGIN for x in data['expected']] + [1])
+    top = 10 * (int(top) // 10 + 1)
+    plot_width = width - 2 * margin
+    plot_height = height - 2 * margin
+    step = plot_width / len(data['digits'])
+
+    def x(i):
+        return margin + step * (i + 0.5)
+
+    def y(value):
+        return margin + plot_height * (1 - value / top)
+
+    elements = []
+    for tick in range(0, top + 1, 10):
+        elements.append(
+            f'<line x1="{margin}" y1="{y(tick):.1f}" x2="{width - margin}" y2="{y(tick):.1f}" '
+            f'stroke="#e5e5e5"/>'
+            f'<text x="{margin - 6}" y="{y(tick) + 4:.1f}" text-anchor="end">{tick}</text>')
+    for i, (digit, observed, expected) in enumerate(
+            zip(data['digits'], data['observed'], data['expected'])):
+        elements.append(
+            f'<rect x="{x(i) - step * 0.4:.1f}" y="{y(observed):.1f}" width="{step * 0.8:.1f}" '
+            f'height="{y(0) - y(observed):.1f}" fill="{GRAPH_BAR_COLOR}"/>'
+            f'<line x1="{x(i):.1f}" y1="{y(expected + GRAPH_ERROR_MARGIN):.1f}" x2="{x(i):.1f}" '
+            f'y2="{y(max(expected - GRAPH_ERROR_MARGIN, 0)):.1f}" stroke="black"/>'
+            f'<circle cx="{x(i):.1f}" cy="{y(expected):.1f}" r="4"/>'
+            f'<text x="{x(i):.1f}" y="{height - margin + 18}" text-anchor="middle">{digit}</text>')
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="sans-serif" font-size="12">'
+        f'{"".join(elements)}'
+        f'<line x1="{margin}" y1="{y(0):.1f}" x2="{width - margin}" y2="{y(0):.1f}" stroke="black"/>'
+        f'</svg>')
+
+
+def get_graph_spec(analyzer: BenfordAnalyzer) -> dict:
+    """
+    Vega-Lite specification of the graph, so it can be drawn by the browser.
+    """
+    data = get_graph_data(analyzer)
+    return {
+        '$schema': 'https://vega.github.io/schema/vega-lite/v4.json',
+        'data': {
+            'values': [
+                {
+                    'digit': digit, 'observed': observed, 'expected': expected,
+                    'expected_min': expected - GRAPH_ERROR_MARGIN,
+                    'expected_max': expected + GRAPH_ERROR_MARGIN,
+                }
+                for digit, observed, expected in zip(
+                    data['digits'], data['observed'], data['expected'])
+            ],
+        },
+        'encoding': {'x': {'field': 'digit', 'type': 'ordinal'}},
+        'layer': [
+            {
+                'mark': {'type': 'bar', 'color': GRAPH_BAR_COLOR},
+                'encoding': {'y': {'field': 'observed', 'type': 'quantitative'}},
+            },
+            {
+                'mark': {'type': 'rule', 'color': 'black'},
+                'encoding': {
+                    'y': {'field': 'expected_min', 'type': 'quantitative'},
+                    'y2': {'field': 'expected_max'},
+                },
+            },
+            {
+                'mark': {'type': 'point', 'filled': True, 'color': 'black'},
+                'encoding': {'y': {'field': 'expected', 'type': 'quantitative'}},
+            },
+        ],
+    }
+
+
+def render_graph(analyzer: BenfordAnalyzer, graph_format: str) -> bytes:
+    """
+    Returns the graph in one of `GRAPH_FORMATS`. PNG images are cached,
+    the other formats are cheap to build.
+    """
+    if graph_format == 'png':
+        return get_cached_graph(analyzer)
+    if graph_format == 'svg':
+        return create_graph_svg(analyzer).encode('utf-8')
+    return json.dumps(get_graph_spec(analyzer)).encode('utf-8')
 
 
 def get_graph_as_base64(buffer):
@@ -43,3 +199,49 @@ def get_graph_as_base64(buffer):
 
 def get_graph_img_src(analyzer: BenfordAnalyzer):
     return get_graph_as_base64(create_graph_buffer(analyzer=analyzer))
+
+
+def get_graph_digest(analyzer: BenfordAnalyzer) -> str:
+    """
+    Digest of everything the graph is drawn from. It identifies a cached
+    image and serves as its ETag.
+    """
+    payload = json.dumps([
+        GRAPH_VERSION, analyzer.dataset.base, sorted(analyzer.occurences.items())])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def get_graph_cache_name(dataset: Dataset, digest: str) -> str:
+    return f'{GRAPH_CACHE_DIR}/{dataset.slug}/{digest}.png'
+
+
+def get_cached_graph(analyzer: BenfordAnalyzer) -> bytes:
+    """
+    Returns the PNG graph of a saved dataset. It's rendered only once
+    for given digit counts and kept in the default file storage.
+    """
+    name = get_graph_cache_name(analyzer.dataset, get_graph_digest(analyzer))
+    if default_storage.exists(name):
+        with default_storage.open(name, 'rb') as f:
+            return f.read()
+
+    image = create_graph_buffer(analyzer).read()
+    invalidate_graph_cache(analyzer.dataset)
+    saved_name = default_storage.save(name, ContentFile(image))
+    if saved_name != name:
+        # Another process cached the same graph in the meantime.
+        default_storage.delete(saved_name)
+    return image
+
+
+def invalidate_graph_cache(dataset: Dataset) -> None:
+    """
+    Removes all cached graphs of a dataset.
+    """
+    directory = f'{GRAPH_CACHE_DIR}/{dataset.slug}'
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in files:
+        default_storage.delete(os.path.join(directory, name))
@@ -0,0 +1,197 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.forms import Form
+from django.utils import timezone
+from pydash import get
+
+from benford.analyzer import BenfordAnalyzer
+from benford.conf import (
+    DEFAULT_BASE, BENFORD_WORKER_POLL_INTERVAL, BENFORD_JOB_PROGRESS_INTERVAL, BENFORD_GRAPH_FORMAT,
+    BENFORD_JOB_LEASE_TIMEOUT,
+)
+from benford.graph import get_cached_graph
+from benford.models import AnalysisJob, Dataset
+from benford.storage import delete_dataset_rows
+from benford.streams import ChunkedTextReader
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_analysis(form: Form) -> AnalysisJob:
+    """
+    Stores the uploaded (or pasted) data of a valid upload form and queues
+    its analysis. The dataset is created right away, so it can be displayed
+    while the analysis is pending.
+    """
+    data_file = form.cleaned_data['data_file']
+    if not data_file:
+        data_file = ContentFile(
+            form.cleaned_data['data_raw'].encode('utf-8'), name='data_raw.csv')
+
+    with transaction.atomic():
+        dataset = Dataset.objects.create(
+            title=form.cleaned_data['title'],
+            base=get(form.cleaned_data, 'base') or DEFAULT_BASE)
+        job = AnalysisJob(
+            dataset=dataset,
+            relevant_column=get(form.cleaned_data, 'relevant_column'),
+            has_header=get(form.cleaned_data, 'has_header', False),
+            bytes_total=data_file.size)
+        job.data_file.save(data_file.name, data_file, save=False)
+        job.save()
+    return job
+
+
+class JobLost(Exception):
+    """
+    The running job was failed meanwhile, because its heartbeat was stale.
+    """
+
+
+def fail_stale_jobs(timeout: float = BENFORD_JOB_LEASE_TIMEOUT) -> int:
+    """
+    Fails running jobs without a heartbeat for `timeout` seconds, whose
+    worker must have been killed (e.g. out of memory), and removes what
+    they saved so far.
+
+    :return: Number of failed jobs.
+    """
+    stale_jobs = AnalysisJob.objects.filter(
+        status=AnalysisJob.STATUS_RUNNING,
+        heartbeat_at__lt=timezone.now() - timedelta(seconds=timeout))
+    count = 0
+    for job in stale_jobs.select_related('dataset'):
+        failed = AnalysisJob.objects.filter(
+            pk=job.pk, status=AnalysisJob.STATUS_RUNNING, heartbeat_at=job.heartbeat_at,
+        ).update(
+            status=AnalysisJob.STATUS_FAILED, finished_at=timezone.now(),
+            error='The analysis was interrupted.')
+        if failed:
+            logger.error('Analysis of dataset %s was interrupted.', job.dataset.slug)
+            discard_analysis(job.dataset)
+            count += 1
+    return count
+
+
+def discard_analysis(dataset: Dataset) -> None:
+    """
+    Removes rows, digits and results saved by a failed analysis.
+    """
+    delete_dataset_rows(dataset)
+    dataset.significant_digits.all().delete()
+    Dataset.objects.filter(pk=dataset.pk).update(
+        row_storage=Dataset.ROW_STORAGE_ROWS, line_count=0, error_count=0, test_occurences={},
+        total_occurences=0, chisq_statistic=None, p_value=None, is_compliant=None, summary=[])
+    dataset.refresh_from_db()
+
+
+def claim_next_job():
+    """
+    Marks the oldest pending job as running and returns it, or `None`
+    if the queue is empty. Safe to call from concurrent workers: the
+    status change is a conditional UPDATE, so each job is claimed once.
+    Stale running jobs are failed first (see `fail_stale_jobs`).
+    """
+    fail_stale_jobs()
+    while True:
+        job = AnalysisJob.objects.filter(status=AnalysisJob.STATUS_PENDING).first()
+        if job is None:
+            return None
+
+        now = timezone.now()
+        claimed = AnalysisJob.objects.filter(
+            pk=job.pk, status=AnalysisJob.STATUS_PENDING,
+        ).update(status=AnalysisJob.STATUS_RUNNING, started_at=now, heartbeat_at=now)
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run_job(job: AnalysisJob) -> None:
+    """
+    Runs the analysis of a claimed job. Rows are committed batch by batch,
+    so the progress is visible while the job is running. If the analysis
+    fails, everything saved so far is removed.
+    """
+    try:
+        with job.data_file.open('rb') as data_file:
+            reader = ChunkedTextReader(data_file)
+            analyzer = BenfordAnalyzer.open_csv(
+                reader,
+                relevant_column=job.relevant_column,
+                has_header=job.has_header,
+                dataset=job.dataset,
+                progress_callback=_get_progress_callback(job, reader))
+            analyzer.save(atomic=False)
+    except JobLost:
+        # Another worker has failed the job and discarded its results.
+        logger.error('Analysis of dataset %s was failed as stale.', job.dataset.slug)
+        discard_analysis(job.dataset)
+        return
+    except Exception as e:
+        logger.exception('Analysis of dataset %s failed.', job.dataset.slug)
+        discard_analysis(job.dataset)
+        job.status = AnalysisJob.STATUS_FAILED
+        job.error = str(e)
+    else:
+        job.status = AnalysisJob.STATUS_DONE
+        job.bytes_processed = job.bytes_total
+        job.data_file.delete(save=False)
+        if BENFORD_GRAPH_FORMAT == 'png':
+            _render_graph(analyzer)
+
+    job.finished_at = timezone.now()
+    job.save()
+
+
+def _render_graph(analyzer: BenfordAnalyzer) -> None:
+    # Render the graph here, so that it's ready for the dataset page. The
+    # graph view renders it otherwise, so failures don't fail the job.
+    try:
+        get_cached_graph(analyzer)
+    except Exception:
+        logger.exception('Rendering graph of dataset %s failed.', analyzer.dataset.slug)
+
+
+def _get_progress_callback(job: AnalysisJob, reader: ChunkedTextReader):
+    last_update = time.monotonic()
+
+    def progress_callback(lines: int):
+        nonlocal last_update
+        if time.monotonic() - last_update < BENFORD_JOB_PROGRESS_INTERVAL:
+            return
+        last_update = time.monotonic()
+        updated = AnalysisJob.objects.filter(pk=job.pk, status=AnalysisJob.STATUS_RUNNING).update(
+            bytes_processed=reader.bytes_read, heartbeat_at=timezone.now())
+        if not updated:
+            raise JobLost(job.pk)
+
+    return progress_callback
+
+
+def run_pending_jobs() -> int:
+    """
+    Runs queued jobs until the queue is empty.
+
+    :return: Number of processed jobs.
+    """
+    count = 0
+    job = claim_next_job()
+    while job is not None:
+        run_job(job)
+        count += 1
+        job = claim_next_job()
+    return count
+
+
+def run_worker(poll_interval: float = BENFORD_WORKER_POLL_INTERVAL):
+    """
+    Processes queued jobs forever, polling the queue when it's empty.
+    """
+    while True:
+        if not run_pending_jobs():
+            time.sleep(poll_interval)
@@ -0,0 +1,159 @@
+import csv
+import io
+import json
+
+from django.db import connection
+from pydash import get
+
+from benford.conf import BENFORD_ROW_LOADER, BENFORD_ROW_BLOCK_SIZE
+from benford.models import Dataset, DatasetRow, DatasetRowBlock
+from benford.storage import encode_block
+
+
+class BulkCreateRowLoader:
+    """
+    Persists parsed input rows of a dataset as `DatasetRow`s. Every batch
+    is written with a single `bulk_create`, so only one batch of model
+    instances is held in memory at a time.
+    """
+    storage = Dataset.ROW_STORAGE_ROWS
+
+    def __init__(self, dataset: Dataset):
+        self.dataset = dataset
+
+    def write(self, rows: list, error_rows: set):
+        """
+        :param rows: List of `(line, data)` tuples.
+        :param error_rows: Line numbers of rows that couldn't be analyzed.
+        """
+        DatasetRow.objects.bulk_create([
+            DatasetRow(
+                dataset=self.dataset,
+                line=line, data=data,
+                has_error=line in error_rows)
+            for line, data in rows
+        ])
+
+    def close(self):
+        """
+        Writes rows that are still buffered.
+        """
+
+
+class CopyRowLoader(BulkCreateRowLoader):
+    """
+    Streams rows straight into the `DatasetRow` table with PostgreSQL's
+    `COPY ... FROM STDIN`, skipping model instances and INSERT statements.
+    Requires the psycopg2 backend.
+    """
+    columns = ('dataset', 'line', 'data', 'has_error')
+
+    def write(self, rows: list, error_rows: set):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for line, data in rows:
+            writer.writerow((
+                self.dataset.pk, line, json.dumps(data),
+                'true' if line in error_rows else 'false'))
+        buffer.seek(0)
+
+        with connection.cursor() as cursor:
+            cursor.copy_expert(self.get_copy_sql(), buffer)
+
+    def get_copy_sql(self) -> str:
+        quote_name = connection.ops.quote_name
+        opts = DatasetRow._meta
+        columns = ', '.join(
+            quote_name(opts.get_field(name).column) for name in self.columns)
+        return f'COPY {quote_name(opts.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv)'
+
+
+class BlockRowLoader(BulkCreateRowLoader):
+    """
+    Stores rows as compressed `DatasetRowBlock`s of `block_size` consecutive
+    lines instead of one database row per line.
+    """
+    storage = Dataset.ROW_STORAGE_BLOCKS
+
+    def __init__(self, dataset: Dataset, block_size: int = BENFORD_ROW_BLOCK_SIZE):
+        super(BlockRowLoader, self).__init__(dataset)
+        self.block_size = block_size
+        self._first_line = None
+        self._rows = []
+        self._error_lines = []
+
+    def write(self, rows: list, error_rows: set):
+        for line, data in rows:
+            if not self._rows:
+                self._first_line = line
+            self._rows.append(data)
+            if line in error_rows:
+                self._error_lines.append(line)
+            if len(self._rows) >= self.block_size:
+                self._write_block()
+
+    def close(self):
+        if self._rows:
+            self._write_block()
+
+    def _write_block(self):
+        DatasetRowBlock.objects.create(
+            dataset=self.dataset,
+            first_line=self._first_line,
+            row_count=len(self._rows),
+            data=encode_block(self._rows),
+            error_lines=self._error_lines)
+        self._rows = []
+        self._error_lines = []
+
+
+class NoRowLoader:
+    """
+    Doesn't persist rows, for datasets of which only digits are counted.
+    """
+    storage = Dataset.ROW_STORAGE_NONE
+
+    def __init__(self, dataset: Dataset):
+        self.dataset = dataset
+
+    def write(self, rows: list, error_rows: set):
+        pass
+
+    def close(self):
+        pass
+
+
+ROW_LOADERS = {
+    'bulk_create': BulkCreateRowLoader,
+    'copy': CopyRowLoader,
+    'blocks': BlockRowLoader,
+    'none': NoRowLoader,
+}
+
+
+def get_row_loader(dataset: Dataset, name: str = None):
+    """
+    Returns a row loader selected by `name` (`BENFORD_ROW_LOADER` setting
+    by default). With `auto`, `COPY` is used on PostgreSQL and
+    `bulk_create` on other database backends.
+    """
+    name = name or BENFORD_ROW_LOADER
+    if name == 'auto':
+        name = 'copy' if connection.vendor == 'postgresql' else 'bulk_create'
+    assert name in ROW_LOADERS, \
+        f"The row loader must be one of {['auto', *ROW_LOADERS]}. Got `{name}` instead."
+    return ROW_LOADERS[name](dataset)
+
+
+def get_existing_row_loader(dataset: Dataset):
+    """
+    Returns a row loader that stores rows the same way as the rows
+    `dataset` already has, e.g. to append more of them.
+    """
+    name = BENFORD_ROW_LOADER
+    if get(ROW_LOADERS, [name, 'storage'], Dataset.ROW_STORAGE_ROWS) != dataset.row_storage:
+        name = {
+            Dataset.ROW_STORAGE_BLOCKS: 'blocks',
+            Dataset.ROW_STORAGE_NONE: 'none',
+        }.get(dataset.row_storage, 'auto')
+    return get_row_loader(dataset, name)
@@ -0,0 +1,141 @@
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from benford.analyzer import BenfordAnalyzer
+from benford.conf import DEFAULT_BASE
+
+DELIMITERS = {'tab': '\t', 'semicolon': ';', 'comma': ','}
+
+
+def find_files(patterns: list) -> list:
+    """
+    Expands files, directories (their files, not recursively) and glob
+    patterns into a sorted list of file paths without duplicates.
+    """
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.update(
+                os.path.join(pattern, name) for name in os.listdir(pattern)
+                if not name.startswith('.') and os.path.isfile(os.path.join(pattern, name)))
+        elif glob.has_magic(pattern):
+            paths.update(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+        elif os.path.isfile(pattern):
+            paths.add(pattern)
+        else:
+            raise CommandError(f'No such file or directory: {pattern}')
+    return sorted(paths)
+
+
+def analyze_file(path: str, rows: bool = True, workers: int = 1, **kwargs) -> dict:
+    """
+    Saves file at `path` as a new dataset titled by the file name.
+    With `rows=False` only digits are counted, by `workers` processes,
+    and no rows are saved. Returns the dataset's slug and what's needed
+    to report throughput.
+    """
+    started = time.perf_counter()
+    title = os.path.basename(path)
+    if rows:
+        analyzer = BenfordAnalyzer.create_from_path(path, save=True, title=title, **kwargs)
+    else:
+        analyzer = BenfordAnalyzer.create_from_path(path, workers=workers, title=title, **kwargs)
+        analyzer.save()
+    return {
+        'slug': analyzer.dataset.slug,
+        'rows': analyzer.line_count,
+        'size': os.path.getsize(path),
+        'seconds': time.perf_counter() - started,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Analyzes CSV files on disk and saves them as datasets.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='+', metavar='path',
+            help='File, directory or glob pattern (quote it to skip shell expansion).')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Number of files analyzed at once, each in its own process '
+                 '(or processes counting a single file with --without-rows).')
+        parser.add_argument(
+            '--without-rows', action='store_true',
+            help="Only count digits and don't save rows, which is much faster.")
+        parser.add_argument(
+            '--has-header', action='store_true',
+            help='Skip the first line of every file.')
+        parser.add_argument(
+            '--column', type=int, dest='relevant_column',
+            help='Index of the analyzed column (detected from the first line by default).')
+        parser.add_argument(
+            '--delimiter', choices=DELIMITERS,
+            help='Column delimiter (detected from the first line by default).')
+        parser.add_argument(
+            '--base', type=int, default=DEFAULT_BASE,
+            help='Base in which leading digits are examined.')
+
+    def handle(self, *args, **options):
+        paths = find_files(options['paths'])
+        kwargs = {
+            'has_header': options['has_header'],
+            'relevant_column': options['relevant_column'],
+            'delimiter': DELIMITERS.get(options['delimiter']),
+            'base': options['base'],
+            'rows': not options['without_rows'],
+        }
+
+        started = time.perf_counter()
+        total_rows = total_size = failed = 0
+        for path, result in self.analyze_files(paths, options['workers'], kwargs):
+            if isinstance(result, Exception):
+                failed += 1
+                self.stderr.write(f'{path}: {result}')
+                continue
+            total_rows += result['rows']
+            total_size += result['size']
+            self.stdout.write(f"{path}: {format_throughput(**result)} -> {result['slug']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Analyzed {len(paths) - failed} file(s): ' + format_throughput(
+                total_rows, total_size, time.perf_counter() - started)))
+        if failed:
+            raise CommandError(f'{failed} file(s) failed.')
+
+    def analyze_files(self, paths: list, workers: int, kwargs: dict):
+        """
+        Yields `(path, result)` pairs as files are analyzed. `result` is
+        the exception if the analysis failed.
+        """
+        if workers <= 1 or len(paths) <= 1:
+            for path in paths:
+                try:
+                    yield path, analyze_file(path, workers=workers, **kwargs)
+                except Exception as e:
+                    yield path, e
+            return
+
+        # Forked processes must not share the parent's database connection.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+            futures = [(path, executor.submit(analyze_file, path, **kwargs)) for path in paths]
+            for path, future in futures:
+                try:
+                    yield path, future.result()
+                except Exception as e:
+                    yield path, e
+
+
+def format_throughput(rows: int, size: int, seconds: float, **kwargs) -> str:
+    megabytes = size / 2 ** 20
+    seconds = max(seconds, 1e-6)
+    return (
+        f'{rows} rows, {megabytes:.1f} MB in {seconds:.2f}s '
+        f'({rows / seconds:,.0f} rows/s, {megabytes / seconds:.1f} MB/s)')
@@ -0,0 +1,44 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from benford.conf import BENFORD_WORKER_POLL_INTERVAL
+from benford.jobs import run_pending_jobs, run_worker
+
+
+class Command(BaseCommand):
+    help = 'Processes queued dataset analyses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Number of worker processes.')
+        parser.add_argument(
+            '--poll-interval', type=float, default=BENFORD_WORKER_POLL_INTERVAL,
+            help='Seconds to wait before checking an empty queue again.')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Process pending jobs and exit.')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            count = run_pending_jobs()
+            self.stdout.write(f'Processed {count} job(s).')
+            return
+
+        if options['workers'] <= 1:
+            run_worker(poll_interval=options['poll_interval'])
+            return
+
+        # Forked processes must not share the parent's database connection.
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=run_worker, kwargs={'poll_interval': options['poll_interval']})
+            for _ in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
@@ -0,0 +1,90 @@
+"""
+Conformity of digit counts to Benford's law.
+
+Metrics are computed from a count vector, or from a matrix with one count
+vector per row (e.g. a page of datasets), in one vectorized pass.
+"""
+from typing import NamedTuple
+
+import numpy
+from scipy.special import rel_entr
+
+from benford.conf import DEFAULT_BASE
+from benford.core import (
+    FIRST_DIGIT_TEST, SECOND_DIGIT_TEST, FIRST_TWO_DIGITS_TEST,
+    compute_statistics, get_expected_probabilities,
+)
+
+CLOSE_CONFORMITY = 'close'
+ACCEPTABLE_CONFORMITY = 'acceptable'
+MARGINAL_CONFORMITY = 'marginal'
+NONCONFORMITY = 'nonconformity'
+CONFORMITY_LEVELS = (CLOSE_CONFORMITY, ACCEPTABLE_CONFORMITY, MARGINAL_CONFORMITY, NONCONFORMITY)
+
+# Upper MAD bounds of close, acceptable and marginal conformity of
+# decimal digits (Nigrini, Benford's Law, 2012).
+NIGRINI_MAD_BANDS = {
+    FIRST_DIGIT_TEST: (0.006, 0.012, 0.015),
+    SECOND_DIGIT_TEST: (0.008, 0.010, 0.012),
+    FIRST_TWO_DIGITS_TEST: (0.0012, 0.0018, 0.0022),
+}
+
+# Kolmogorov-Smirnov critical value at the 5 % level is this / sqrt(N).
+KS_CRITICAL_COEFFICIENT = 1.36
+
+
+class ConformityMetrics(NamedTuple):
+    total: numpy.ndarray
+    chisq_statistic: numpy.ndarray
+    p_value: numpy.ndarray
+    mad: numpy.ndarray
+    conformity: numpy.ndarray
+    ks_statistic: numpy.ndarray
+    ks_critical_value: numpy.ndarray
+    z_statistics: numpy.ndarray
+    kl_divergence: numpy.ndarray
+
+
+def get_mad_conformity(mad, base=DEFAULT_BASE, test=FIRST_DIGIT_TEST):
+    """
+    Nigrini's conformity level (one of `CONFORMITY_LEVELS`) of each MAD in
+    `mad`. It is None for NaN and for digits without conformity bands.
+    """
+    mad = numpy.asarray(mad, dtype=numpy.float64)
+    bands = NIGRINI_MAD_BANDS.get(test) if base == 10 else None
+    if bands is None:
+        return numpy.full(mad.shape, None, dtype=object)[()]
+    levels = numpy.array(CONFORMITY_LEVELS, dtype=object)[numpy.searchsorted(bands, mad)]
+    return numpy.where(numpy.isnan(mad), None, levels)[()]
+
+
+def compute_conformity_metrics(counts, base=DEFAULT_BASE, test=FIRST_DIGIT_TEST) -> ConformityMetrics:
+    """
+    All conformity metrics of digit `counts` (in the order of
+    `get_digit_test_range`) of a digit `test` in `base`.
+
+    For a count vector the metrics are scalars (and `z_statistics` is a
+    vector); for a count matrix they have one item (row) per row.
+    """
+    counts = numpy.asarray(counts, dtype=numpy.float64)
+    probabilities = get_expected_probabilities(base, test)
+    statistics = compute_statistics(counts, probabilities)
+
+    total = counts.sum(axis=-1)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        observed = counts / total[..., numpy.newaxis]
+        ks_statistic = numpy.abs(numpy.cumsum(observed - probabilities, axis=-1)).max(axis=-1)
+        ks_critical_value = KS_CRITICAL_COEFFICIENT / numpy.sqrt(total)
+        kl_divergence = rel_entr(observed, probabilities).sum(axis=-1)
+
+    return ConformityMetrics(
+        total=total,
+        chisq_statistic=statistics.chisq_statistic,
+        p_value=statistics.p_value,
+        mad=statistics.mad,
+        conformity=get_mad_conformity(statistics.mad, base, test),
+        ks_statistic=ks_statistic,
+        ks_critical_value=ks_critical_value,
+        z_statistics=statistics.z_statistics,
+        kl_divergence=kl_divergence,
+    )
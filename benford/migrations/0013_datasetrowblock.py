@@ -0,0 +1,33 @@
+# Generated by Django 3.1 on 2026-10-17 22:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('benford', '0012_dataset_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='row_storage',
+            field=models.CharField(choices=[('rows', 'Rows'), ('blocks', 'Compressed blocks')], default='rows', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='DatasetRowBlock',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_line', models.PositiveIntegerField()),
+                ('row_count', models.PositiveIntegerField()),
+                ('data', models.BinaryField()),
+                ('error_lines', models.JSONField(blank=True, default=list)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='benford.dataset')),
+            ],
+            options={
+                'unique_together': {('dataset', 'first_line')},
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.1 on 2026-10-17 23:05
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def set_line_count(apps, schema_editor):
+    # Appended rows continue after the last stored line.
+    Dataset = apps.get_model('benford', 'Dataset')
+    DatasetRow = apps.get_model('benford', 'DatasetRow')
+    DatasetRowBlock = apps.get_model('benford', 'DatasetRowBlock')
+    last_lines = DatasetRow.objects.values('dataset').annotate(last_line=Max('line'))
+    for row in last_lines:
+        Dataset.objects.filter(pk=row['dataset']).update(line_count=row['last_line'] + 1)
+    block_ends = DatasetRowBlock.objects.values('dataset').annotate(
+        end=Max(F('first_line') + F('row_count')))
+    for row in block_ends:
+        Dataset.objects.filter(pk=row['dataset']).update(line_count=row['end'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('benford', '0013_datasetrowblock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='delimiter',
+            field=models.CharField(default='\t', max_length=1),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='line_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='relevant_column',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(set_line_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1 on 2026-10-17 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('benford', '0014_dataset_append'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='test_occurences',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.1 on 2026-10-17 23:23
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def set_error_count(apps, schema_editor):
+    Dataset = apps.get_model('benford', 'Dataset')
+    DatasetRow = apps.get_model('benford', 'DatasetRow')
+    DatasetRowBlock = apps.get_model('benford', 'DatasetRowBlock')
+    error_counts = {}
+    for row in DatasetRow.objects.filter(has_error=True).values('dataset').annotate(count=Count('pk')):
+        error_counts[row['dataset']] = row['count']
+    blocks = DatasetRowBlock.objects.exclude(error_lines=[]).values_list('dataset', 'error_lines')
+    for dataset, error_lines in blocks.iterator():
+        error_counts[dataset] = error_counts.get(dataset, 0) + len(error_lines)
+    for dataset, count in error_counts.items():
+        Dataset.objects.filter(pk=dataset).update(error_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('benford', '0015_dataset_test_occurences'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='error_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(set_error_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.1 on 2026-10-17 23:24
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('benford', '0016_dataset_error_count'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='datasetrow',
+            index_together={('dataset', 'has_error', 'line')},
+        ),
+    ]
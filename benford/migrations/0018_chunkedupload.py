@@ -0,0 +1,29 @@
+# Generated by Django 3.1 on 2026-10-17 23:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('benford', '0017_datasetrow_error_line_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delimiter', models.CharField(blank=True, max_length=1)),
+                ('relevant_column', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('has_header', models.BooleanField(default=False)),
+                ('checksums', models.JSONField(blank=True, default=list)),
+                ('bytes_received', models.PositiveBigIntegerField(default=0)),
+                ('remainder', models.BinaryField(blank=True, default=b'')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('dataset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='chunked_upload', to='benford.dataset')),
+            ],
+        ),
+    ]
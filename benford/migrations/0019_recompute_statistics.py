@@ -0,0 +1,79 @@
+import math
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy
+from django.db import migrations
+from scipy.stats import chi2
+
+# The math is inlined, so that later changes of `benford.core` don't change
+# what this migration stores.
+SIGNIFICANCE = 0.1
+
+
+def get_percentages(occurences: dict) -> dict:
+    """
+    Percentages rounded half up to tenths, the last one adjusted so that
+    they sum up to exactly 100.
+    """
+    total = sum(occurences.values())
+    units, used = {}, 0
+    for digit, count in occurences.items():
+        units[digit] = min((2000 * count + total) // (2 * total), max(1000 - used, 0))
+        used += units[digit]
+    if units:
+        units[digit] += 1000 - used
+    return {digit: Decimal(value).scaleb(-1) for digit, value in units.items()}
+
+
+def get_expected_percentage(digit, base) -> Decimal:
+    return Decimal(100 * math.log(1 + 1 / digit, base)).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP)
+
+
+def recompute_statistics(apps, schema_editor):
+    """
+    Statistics stored before the chi-squared test was computed on counts
+    (instead of percentages) are computed again from the digit counts.
+    """
+    Dataset = apps.get_model('benford', 'Dataset')
+    SignificantDigit = apps.get_model('benford', 'SignificantDigit')
+    for dataset in Dataset.objects.exclude(summary=[]).only('pk', 'base').iterator():
+        occurences = dict(
+            SignificantDigit.objects.filter(dataset=dataset).order_by('digit').values_list('digit', 'occurences'))
+        percentages = get_percentages(occurences)
+        total = sum(occurences.values())
+        digits = range(1, dataset.base)
+        statistics = {
+            'total_occurences': total,
+            'chisq_statistic': None,
+            'p_value': None,
+            'is_compliant': False,
+            'summary': [
+                {
+                    'digit': digit,
+                    'occurences': occurences.get(digit, 0),
+                    'percentage': str(percentages.get(digit, 0)),
+                    'expected_percentage': str(get_expected_percentage(digit, dataset.base)),
+                }
+                for digit in digits
+            ],
+        }
+        if total:
+            counts = numpy.array([occurences.get(digit, 0) for digit in digits], dtype=numpy.float64)
+            expected_counts = numpy.array([math.log(1 + 1 / digit, dataset.base) for digit in digits]) * total
+            degrees_of_freedom = len(digits) - 1
+            chisq_statistic = float(numpy.sum((counts - expected_counts) ** 2 / expected_counts))
+            statistics['chisq_statistic'] = chisq_statistic
+            statistics['p_value'] = float(chi2.sf(chisq_statistic, degrees_of_freedom))
+            statistics['is_compliant'] = bool(chisq_statistic <= chi2.isf(SIGNIFICANCE, degrees_of_freedom))
+        Dataset.objects.filter(pk=dataset.pk).update(**statistics)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('benford', '0018_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute_statistics, migrations.RunPython.noop),
+    ]
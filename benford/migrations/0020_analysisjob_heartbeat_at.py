@@ -0,0 +1,25 @@
+# Generated by Django 3.1 on 2026-10-17 23:57
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def set_heartbeat_at(apps, schema_editor):
+    AnalysisJob = apps.get_model('benford', 'AnalysisJob')
+    AnalysisJob.objects.filter(status='running').update(heartbeat_at=F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('benford', '0019_recompute_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(set_heartbeat_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1 on 2026-10-17 23:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('benford', '0020_analysisjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dataset',
+            name='row_storage',
+            field=models.CharField(choices=[('rows', 'Rows'), ('blocks', 'Compressed blocks'), ('none', 'Not stored')], default='rows', max_length=10),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 3.1 on 2026-10-18 00:03
+
+import math
+
+import numpy
+from django.db import migrations, models
+from scipy.special import rel_entr
+from scipy.stats import chi2
+
+# The math of `benford.metrics` is inlined, so that later changes of it
+# don't change what this migration stores.
+SIGNIFICANCE = 0.1
+MAD_BANDS = (('close', 0.006), ('acceptable', 0.012), ('marginal', 0.015))
+KS_CRITICAL_COEFFICIENT = 1.36
+
+
+def set_conformity_metrics(apps, schema_editor):
+    """
+    Stores conformity metrics of datasets with stored statistics, and
+    whether they are compliant with the same degrees of freedom as their
+    p-value.
+    """
+    Dataset = apps.get_model('benford', 'Dataset')
+    datasets = Dataset.objects.exclude(summary=[]).filter(total_occurences__gt=0)
+    for dataset in datasets.only('pk', 'base', 'summary', 'chisq_statistic').iterator():
+        counts = numpy.zeros(dataset.base - 1)
+        for row in dataset.summary:
+            counts[row['digit'] - 1] = row['occurences']
+        probabilities = numpy.array([math.log(1 + 1 / digit, dataset.base) for digit in range(1, dataset.base)])
+        total = counts.sum()
+        observed = counts / total
+
+        mad = float(numpy.abs(observed - probabilities).mean())
+        conformity = ''
+        if dataset.base == 10:
+            conformity = next((level for level, bound in MAD_BANDS if mad <= bound), 'nonconformity')
+        Dataset.objects.filter(pk=dataset.pk).update(
+            is_compliant=bool(dataset.chisq_statistic <= chi2.isf(SIGNIFICANCE, dataset.base - 2)),
+            mad=mad,
+            conformity=conformity,
+            ks_statistic=float(numpy.abs(numpy.cumsum(observed - probabilities)).max()),
+            ks_critical_value=float(KS_CRITICAL_COEFFICIENT / numpy.sqrt(total)),
+            kl_divergence=float(rel_entr(observed, probabilities).sum()),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('benford', '0021_dataset_row_storage_none'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='conformity',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='kl_divergence',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='ks_critical_value',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='ks_statistic',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='mad',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(set_conformity_metrics, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,51 @@
-from django.db import models
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models, connections, transaction
+from django.db.models import F
 from django.urls import reverse
 
 from benford.utils import generate_random_identifier
 
 
 class Dataset(models.Model):
+    ROW_STORAGE_ROWS = 'rows'
+    ROW_STORAGE_BLOCKS = 'blocks'
+    # Only digits were counted (e.g. `benford_analyze --without-rows`).
+    ROW_STORAGE_NONE = 'none'
+    ROW_STORAGE_CHOICES = [
+        (ROW_STORAGE_ROWS, 'Rows'),
+        (ROW_STORAGE_BLOCKS, 'Compressed blocks'),
+        (ROW_STORAGE_NONE, 'Not stored'),
+    ]
+
     slug = models.CharField(
         max_length=10, unique=True, default=generate_random_identifier)
     title = models.CharField(max_length=50, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     base = models.PositiveSmallIntegerField(default=10)
+    row_storage = models.CharField(
+        max_length=10, choices=ROW_STORAGE_CHOICES, default=ROW_STORAGE_ROWS)
+
+    # How the input was parsed, so that more rows can be appended.
+    delimiter = models.CharField(max_length=1, default='\t')
+    relevant_column = models.PositiveSmallIntegerField(null=True, blank=True)
+    line_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+
+    # Analysis results, computed when the dataset is saved.
+    total_occurences = models.PositiveIntegerField(default=0)
+    chisq_statistic = models.FloatField(null=True, blank=True)
+    p_value = models.FloatField(null=True, blank=True)
+    is_compliant = models.BooleanField(null=True, blank=True)
+    summary = models.JSONField(default=list, blank=True)
+    # Conformity metrics of first digits (see `benford.metrics`).
+    mad = models.FloatField(null=True, blank=True)
+    conformity = models.CharField(max_length=20, blank=True)
+    ks_statistic = models.FloatField(null=True, blank=True)
+    ks_critical_value = models.FloatField(null=True, blank=True)
+    kl_divergence = models.FloatField(null=True, blank=True)
+    # Counts of other digit tests than the first digit (see
+    # `benford.core.DIGIT_TESTS`), by test and digits.
+    test_occurences = models.JSONField(default=dict, blank=True)
 
     def display_title(self):
         return self.title or 'Untitled dataset'
@@ -20,16 +56,117 @@ class Dataset(models.Model):
     def get_occurences_summary(self):
         return dict((x.digit, x.occurences) for x in self.significant_digits.all())
 
+    def get_test_occurences(self) -> dict:
+        # JSON object keys are strings.
+        return dict(
+            (test, dict((int(digits), count) for digits, count in occurences.items()))
+            for test, occurences in self.test_occurences.items())
+
+    @property
+    def has_statistics(self) -> bool:
+        return bool(self.summary)
+
+    def get_analysis_job(self):
+        try:
+            return self.analysis_job
+        except ObjectDoesNotExist:
+            return None
+
+    @property
+    def has_rows(self) -> bool:
+        return self.row_storage != self.ROW_STORAGE_NONE
+
+    def get_chunked_upload(self):
+        try:
+            return self.chunked_upload
+        except ObjectDoesNotExist:
+            return None
+
+    @property
+    def is_uploading(self) -> bool:
+        upload = self.get_chunked_upload()
+        return upload is not None and not upload.is_complete
+
+    @property
+    def is_analyzed(self) -> bool:
+        job = self.get_analysis_job()
+        return (job is None or job.status == AnalysisJob.STATUS_DONE) and not self.is_uploading
+
     class Meta:
         ordering = ['-created_at', ]
 
 
+class SignificantDigitManager(models.Manager):
+    def set_occurences(self, dataset: Dataset, occurences: dict):
+        """
+        Stores counts of significant digits of `dataset`, replacing the
+        previous ones, in a constant number of queries.
+        """
+        with transaction.atomic(using=self.db):
+            self.filter(dataset=dataset).exclude(digit__in=list(occurences)).delete()
+            self._upsert(dataset, occurences, increment=False)
+
+    def add_occurences(self, dataset: Dataset, occurences: dict):
+        """
+        Adds `occurences` to the stored counts of significant digits of
+        `dataset` in a constant number of queries.
+        """
+        with transaction.atomic(using=self.db):
+            self._upsert(dataset, occurences, increment=True)
+
+    def _upsert(self, dataset: Dataset, occurences: dict, increment: bool):
+        if not occurences:
+            return
+        if connections[self.db].vendor == 'postgresql':
+            self._upsert_on_conflict(dataset, occurences, increment)
+            return
+
+        # Without `ON CONFLICT` concurrent writers are serialized by locking
+        # the dataset (where the backend supports it).
+        list(Dataset.objects.using(self.db).select_for_update().filter(pk=dataset.pk).values('pk'))
+        existing_digits = list(self.filter(dataset=dataset, digit__in=list(occurences)))
+        for significant_digit in existing_digits:
+            count = occurences[significant_digit.digit]
+            significant_digit.occurences = F('occurences') + count if increment else count
+        self.bulk_update(existing_digits, ['occurences'])
+
+        existing = set(significant_digit.digit for significant_digit in existing_digits)
+        self.bulk_create([
+            self.model(dataset=dataset, digit=digit, occurences=count)
+            for digit, count in occurences.items() if digit not in existing
+        ])
+
+    def _upsert_on_conflict(self, dataset: Dataset, occurences: dict, increment: bool):
+        quote_name = connections[self.db].ops.quote_name
+        opts = self.model._meta
+        table = quote_name(opts.db_table)
+        dataset_column, digit_column, occurences_column = (
+            quote_name(opts.get_field(name).column) for name in ('dataset', 'digit', 'occurences'))
+        value = f'EXCLUDED.{occurences_column}'
+        if increment:
+            value = f'{table}.{occurences_column} + {value}'
+
+        params = []
+        for digit, count in occurences.items():
+            params.extend((dataset.pk, digit, count))
+        placeholders = ', '.join(['(%s, %s, %s)'] * len(occurences))
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({dataset_column}, {digit_column}, {occurences_column}) '
+                f'VALUES {placeholders} '
+                f'ON CONFLICT ({dataset_column}, {digit_column}) '
+                f'DO UPDATE SET {occurences_column} = {value}',
+                params)
+
+
 class SignificantDigit(models.Model):
     dataset = models.ForeignKey(
         'Dataset', on_delete=models.CASCADE, related_name='significant_digits')
     digit = models.PositiveSmallIntegerField()
     occurences = models.PositiveIntegerField()
 
+    objects = SignificantDigitManager()
+
     class Meta:
         unique_together = [
             ('dataset', 'digit'),
@@ -47,8 +184,105 @@ class DatasetRow(models.Model):
 
     class Meta:
         index_together = [
-            ('dataset', 'has_error'),
+            # Erroneous rows are paged by line.
+            ('dataset', 'has_error', 'line'),
         ]
         unique_together = [
             ('dataset', 'line'),
         ]
+
+
+class DatasetRowBlock(models.Model):
+    """
+    Block of consecutive input rows of a dataset, stored compressed
+    (see `benford.storage`) instead of one `DatasetRow` per line.
+    """
+    dataset = models.ForeignKey(
+        'Dataset', related_name='+', on_delete=models.CASCADE)
+    first_line = models.PositiveIntegerField()
+    row_count = models.PositiveIntegerField()
+    data = models.BinaryField()
+    error_lines = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        unique_together = [
+            ('dataset', 'first_line'),
+        ]
+
+
+class AnalysisJob(models.Model):
+    """
+    Analysis of an uploaded dataset queued to be processed by a background
+    worker (see `benford_worker` management command).
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    dataset = models.OneToOneField(
+        'Dataset', on_delete=models.CASCADE, related_name='analysis_job')
+    data_file = models.FileField(upload_to='uploads/', blank=True)
+    relevant_column = models.PositiveSmallIntegerField(null=True, blank=True)
+    has_header = models.BooleanField(default=False)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    bytes_total = models.PositiveBigIntegerField(default=0)
+    bytes_processed = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Updated by the worker along with its progress. Running jobs without
+    # a recent heartbeat have lost their worker (see `benford.jobs`).
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def progress(self) -> int:
+        """
+        Progress of the analysis in percents.
+        """
+        if self.status == self.STATUS_DONE:
+            return 100
+        if not self.bytes_total:
+            return 0
+        return min(100, 100 * self.bytes_processed // self.bytes_total)
+
+    class Meta:
+        ordering = ['created_at', ]
+
+
+class ChunkedUpload(models.Model):
+    """
+    A file uploaded in numbered parts (see `benford.uploads`). Complete
+    lines of every part are analyzed as soon as it arrives; only the
+    incomplete last line is kept until the next part.
+    """
+    dataset = models.OneToOneField(
+        'Dataset', on_delete=models.CASCADE, related_name='chunked_upload')
+    # Parsing options, applied when the first lines arrive. An empty
+    # delimiter is detected.
+    delimiter = models.CharField(max_length=1, blank=True)
+    relevant_column = models.PositiveSmallIntegerField(null=True, blank=True)
+    has_header = models.BooleanField(default=False)
+    # SHA-256 checksums (hex) of the received parts, in order. Parts are
+    # numbered from 1.
+    checksums = models.JSONField(default=list, blank=True)
+    bytes_received = models.PositiveBigIntegerField(default=0)
+    remainder = models.BinaryField(default=b'', blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def next_part(self) -> int:
+        return len(self.checksums) + 1
+
+    @property
+    def is_complete(self) -> bool:
+        return self.completed_at is not None
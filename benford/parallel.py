@@ -0,0 +1,84 @@
+"""
+Analysis of large files on disk by several processes.
+
+The file is split into byte ranges ending at line boundaries. Each range is
+scanned (see `benford.scan`) in a separate process and the results are
+merged, shifting line numbers of error rows by the number of lines in the
+preceding ranges.
+
+Worker processes don't use models, so they don't need the database.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from benford.conf import BENFORD_PARALLEL_CHUNK_SIZE
+from benford.core import merge_occurences, merge_test_occurences
+from benford.scan import scan_file
+
+
+def split_into_line_aligned_chunks(
+        path: str, chunk_size: int = BENFORD_PARALLEL_CHUNK_SIZE) -> list:
+    """
+    Splits file at `path` into `(start, end)` byte ranges of roughly
+    `chunk_size` bytes. Every range except the last one ends right after
+    a newline.
+    """
+    size = os.path.getsize(path)
+    chunks = []
+    start = 0
+    with open(path, 'rb') as f:
+        while start < size:
+            end = min(start + chunk_size, size)
+            if end < size:
+                f.seek(end - 1)
+                end += len(f.readline()) - 1
+            chunks.append((start, end))
+            start = end
+    return chunks
+
+
+def count_chunk(
+        path: str, start: int, end: int, delimiter: str, relevant_column: int, has_header: bool,
+        tests=()):
+    """
+    Counts first significant digits in bytes `start:end` of file at `path`
+    (see `benford.scan.scan_file`). Error rows are numbered from the start
+    of the chunk.
+    """
+    return scan_file(path, delimiter, relevant_column, has_header, start, end, tests=tests)
+
+
+def count_file_in_parallel(
+        path: str, delimiter: str, relevant_column: int, has_header: bool, workers: int,
+        tests=(), chunk_size: int = BENFORD_PARALLEL_CHUNK_SIZE):
+    """
+    Counts first significant digits of file at `path` using `workers`
+    processes. The result is the same as of `BenfordAnalyzer.analyze()`.
+
+    Returns `(occurences, error_rows, line_count, test_occurences)`, or
+    `None` if the file can't be split at line boundaries (quoted values
+    with newlines).
+    """
+    chunks = split_into_line_aligned_chunks(path, chunk_size)
+    occurences = {}
+    test_occurences = dict((test, {}) for test in tests)
+    error_rows = set()
+    line_count = 0
+    if not chunks:
+        return occurences, error_rows, line_count, test_occurences
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            count_chunk,
+            *zip(*[(path, start, end, delimiter, relevant_column, has_header and start == 0, tests)
+                   for start, end in chunks]))
+        for result in results:
+            if result is None:
+                return None
+            chunk_occurences, chunk_error_rows, chunk_line_count, chunk_test_occurences = result
+            merge_occurences(occurences, chunk_occurences)
+            merge_test_occurences(test_occurences, chunk_test_occurences)
+            error_rows.update(line_count + line for line in chunk_error_rows)
+            line_count += chunk_line_count
+
+    return occurences, error_rows, line_count, test_occurences
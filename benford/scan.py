@@ -0,0 +1,170 @@
+"""
+Counting of first significant digits straight from the bytes of a file.
+
+The file is memory-mapped and scanned window by window with NumPy: line and
+field boundaries are found from positions of newline and delimiter bytes,
+and the first `[1-9]` byte of the relevant field is its first significant
+digit. The file is never decoded into `str`, so only the current window is
+held in memory besides the (reclaimable) page cache.
+
+Windows containing quote characters are parsed with `csv` instead, so
+quoted fields are handled the same way as by `BenfordAnalyzer.analyze()`.
+"""
+import csv
+import io
+import mmap
+import os
+
+import numpy
+
+from benford.core import (
+    count_significant_digits, iter_counted_batches, merge_occurences, count_digit_test_values,
+    SECOND_DIGIT_TEST, FIRST_TWO_DIGITS_TEST,
+)
+
+# Files are scanned in windows of about this many bytes (extended to the end
+# of the line), which bounds the size of the temporary arrays.
+SCAN_WINDOW_SIZE = 1024 * 1024
+
+NEWLINE = ord('\n')
+QUOTE = ord('"')
+
+
+def scan_file(
+        path: str, delimiter: str, relevant_column: int, has_header: bool,
+        start: int = 0, end: int = None, window_size: int = SCAN_WINDOW_SIZE, tests=()):
+    """
+    Counts first significant digits in the `relevant_column` of bytes
+    `start:end` of file at `path`. `start` must be at the beginning of
+    a line and lines are numbered from it. Other digit `tests` are counted
+    in the same scan.
+
+    Returns `(occurences, error_rows, line_count, test_occurences)`, or
+    `None` if a quoted value spans several lines, so CSV records and lines
+    can't be matched.
+    """
+    occurences = {}
+    test_occurences = dict((test, {}) for test in tests)
+    error_rows = set()
+    line_count = 0
+
+    with open(path, 'rb') as f:
+        end = os.fstat(f.fileno()).st_size if end is None else end
+        if start >= end:
+            return occurences, error_rows, line_count, test_occurences
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, 'madvise'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+
+            window_start = start
+            while window_start < end:
+                window_end = min(window_start + window_size, end)
+                if window_end < end:
+                    newline = mm.find(b'\n', window_end - 1, end)
+                    window_end = end if newline == -1 else newline + 1
+
+                skip_line = 0 if has_header and window_start == start else None
+                if mm.find(b'"', window_start, window_end) == -1:
+                    window_line_count = _count_window(
+                        mm, window_start, window_end, delimiter, relevant_column, skip_line,
+                        line_count, occurences, error_rows, test_occurences)
+                else:
+                    window_line_count = _count_window_with_csv(
+                        mm[window_start:window_end], delimiter, relevant_column, skip_line,
+                        line_count, occurences, error_rows, test_occurences)
+                    if window_line_count is None:
+                        return None
+
+                line_count += window_line_count
+                window_start = window_end
+
+    return occurences, error_rows, line_count, test_occurences
+
+
+def _count_window(
+        mm, start: int, end: int, delimiter: str, relevant_column: int, skip_line,
+        first_line: int, occurences: dict, error_rows: set, test_occurences: dict) -> int:
+    data = numpy.frombuffer(mm, dtype=numpy.uint8, count=end - start, offset=start)
+    size = len(data)
+
+    # Lines, without their newline.
+    newlines = numpy.flatnonzero(data == NEWLINE)
+    line_ends = newlines if data[-1] == NEWLINE else numpy.append(newlines, size)
+    line_starts = numpy.concatenate(([0], newlines + 1))[:len(line_ends)]
+
+    # Bounds of the relevant field. The delimiter at `size` is a sentinel
+    # past the end of every line.
+    delimiters = numpy.append(numpy.flatnonzero(data == ord(delimiter)), size)
+    first_delimiter = numpy.searchsorted(delimiters, line_starts)
+    last = len(delimiters) - 1
+    if relevant_column:
+        preceding = delimiters[numpy.minimum(first_delimiter + relevant_column - 1, last)]
+        has_column = preceding < line_ends
+        field_starts = preceding + 1
+    else:
+        has_column = numpy.ones(len(line_starts), dtype=bool)
+        field_starts = line_starts
+    field_ends = numpy.minimum(
+        delimiters[numpy.minimum(first_delimiter + relevant_column, last)], line_ends)
+
+    # First `[1-9]` byte of every field.
+    significant = numpy.append(numpy.flatnonzero((data >= ord('1')) & (data <= ord('9'))), size)
+    next_significant = numpy.searchsorted(significant, field_starts)
+    positions = significant[numpy.minimum(next_significant, len(significant) - 1)]
+    found = has_column & (positions < field_ends)
+    digits = numpy.zeros(len(line_starts), dtype=numpy.int8)
+    digits[found] = data[positions[found]] - ord('0')
+
+    counted = numpy.ones(len(line_starts), dtype=bool)
+    if skip_line is not None:
+        counted[skip_line] = False
+    merge_occurences(occurences, count_significant_digits(digits[counted]))
+    error_rows.update((first_line + numpy.flatnonzero(counted & (digits == 0))).tolist())
+    if test_occurences:
+        _count_tests(data, counted & found, positions, field_ends, test_occurences)
+
+    # Views of the map have to go before it's closed.
+    del data
+    return len(line_starts)
+
+
+def _count_tests(
+        data: numpy.ndarray, found: numpy.ndarray, positions: numpy.ndarray,
+        field_ends: numpy.ndarray, test_occurences: dict):
+    """
+    Counts other digit tests (see `benford.core.get_digit_test_values`)
+    of fields whose first significant digit is at `positions`.
+    """
+    digits = numpy.append(numpy.flatnonzero((data >= ord('0')) & (data <= ord('9'))), len(data))
+    second = digits[numpy.minimum(numpy.searchsorted(digits, positions + 1), len(digits) - 1)]
+    has_two = found & (second < field_ends)
+
+    first_digits = data[positions[has_two]].astype(numpy.intp) - ord('0')
+    second_digits = data[second[has_two]].astype(numpy.intp) - ord('0')
+    for test, occurences in test_occurences.items():
+        if test == SECOND_DIGIT_TEST:
+            values = second_digits
+        elif test == FIRST_TWO_DIGITS_TEST:
+            values = 10 * first_digits + second_digits
+        else:
+            last = numpy.searchsorted(digits, field_ends[has_two]) - 1
+            values = (
+                10 * (data[digits[last - 1]].astype(numpy.intp) - ord('0'))
+                + data[digits[last]].astype(numpy.intp) - ord('0'))
+        merge_occurences(occurences, count_digit_test_values(values))
+
+
+def _count_window_with_csv(
+        data: bytes, delimiter: str, relevant_column: int, skip_line,
+        first_line: int, occurences: dict, error_rows: set, test_occurences: dict):
+    reader = csv.reader(io.StringIO(data.decode('utf-8')), delimiter=delimiter)
+    line = first_line
+    for batch in iter_counted_batches(
+            enumerate(reader, first_line), relevant_column, occurences, error_rows, skip_line,
+            test_occurences=test_occurences):
+        line = batch[-1][0] + 1
+
+    line_count = line - first_line
+    physical_line_count = data.count(b'\n') + (0 if data.endswith(b'\n') else 1)
+    return line_count if line_count == physical_line_count else None
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from benford.graph import invalidate_graph_cache
+from benford.models import Dataset
+
+
+@receiver(post_delete, sender=Dataset)
+def invalidate_graph_on_dataset_delete(sender, instance: Dataset, **kwargs):
+    # Digit counts are only written in bulk, which sends no signals. Cached
+    # graphs are keyed by a digest of the counts, so they are never served
+    # stale, and obsolete ones are removed when the graph is rendered again.
+    invalidate_graph_cache(instance)
@@ -0,0 +1,183 @@
+import itertools
+import json
+import zlib
+
+from django.db.models import F, Sum
+from django.utils.functional import cached_property
+
+from benford.conf import BENFORD_EXPORT_CHUNK_SIZE, BENFORD_ROW_BLOCK_SIZE
+from benford.models import Dataset, DatasetRow, DatasetRowBlock
+from pagination.keyset import KeysetPaginator, KeysetPage
+
+
+def encode_block(rows: list) -> bytes:
+    """
+    Compresses a block of rows. Values are laid out column by column
+    (similar values next to each other compress better) along with the
+    width of every row.
+    """
+    widths = [len(row) for row in rows]
+    columns = [
+        [row[i] for row in rows if len(row) > i]
+        for i in range(max(widths, default=0))
+    ]
+    payload = json.dumps({'widths': widths, 'columns': columns}, separators=(',', ':'))
+    return zlib.compress(payload.encode('utf-8'))
+
+
+def decode_block(data: bytes) -> list:
+    payload = json.loads(zlib.decompress(bytes(data)).decode('utf-8'))
+    columns = [iter(column) for column in payload['columns']]
+    return [[next(columns[i]) for i in range(width)] for width in payload['widths']]
+
+
+def get_block_rows(block: DatasetRowBlock) -> list:
+    """
+    Decodes a block into (unsaved) `DatasetRow` instances.
+    """
+    error_lines = set(block.error_lines)
+    return [
+        DatasetRow(
+            dataset_id=block.dataset_id,
+            line=line, data=data,
+            has_error=line in error_lines)
+        for line, data in enumerate(decode_block(block.data), start=block.first_line)
+    ]
+
+
+def iter_dataset_rows(dataset: Dataset, errors_only: bool = False,
+                      chunk_size: int = BENFORD_EXPORT_CHUNK_SIZE):
+    """
+    Yields rows (or only erroneous rows) of a dataset by line. Rows are
+    fetched `chunk_size` at a time with a server-side cursor, so memory use
+    doesn't grow with the dataset.
+    """
+    if dataset.row_storage == Dataset.ROW_STORAGE_BLOCKS:
+        blocks = DatasetRowBlock.objects.filter(dataset=dataset).order_by('first_line')
+        if errors_only:
+            blocks = blocks.exclude(error_lines=[])
+        for block in blocks.iterator(chunk_size=max(1, chunk_size // BENFORD_ROW_BLOCK_SIZE)):
+            for row in get_block_rows(block):
+                if row.has_error or not errors_only:
+                    yield row
+        return
+
+    rows = DatasetRow.objects.filter(dataset=dataset).order_by('line')
+    if errors_only:
+        rows = rows.filter(has_error=True)
+    yield from rows.only('line', 'data', 'has_error').iterator(chunk_size=chunk_size)
+
+
+def get_error_row_paginator(dataset: Dataset, per_page: int) -> KeysetPaginator:
+    """
+    Keyset paginator of erroneous rows of a dataset by line. The stored
+    error count of the dataset is used, so nothing is counted.
+    """
+    if dataset.row_storage == Dataset.ROW_STORAGE_BLOCKS:
+        return BlockErrorRowPaginator(dataset, per_page, count=dataset.error_count)
+    return KeysetPaginator(
+        DatasetRow.objects.filter(dataset=dataset, has_error=True),
+        per_page, key='line', count=dataset.error_count)
+
+
+def delete_dataset_rows(dataset: Dataset) -> None:
+    DatasetRow.objects.filter(dataset=dataset).delete()
+    DatasetRowBlock.objects.filter(dataset=dataset).delete()
+
+
+class BlockRowPaginator(KeysetPaginator):
+    """
+    Pages through rows of a dataset stored in `DatasetRowBlock`s. Only the
+    blocks overlapping the requested page are fetched and decoded. Pages
+    are addressed by line cursors like with `KeysetPaginator`.
+    """
+
+    def __init__(self, dataset: Dataset, per_page: int, count: int = None):
+        super(BlockRowPaginator, self).__init__(
+            DatasetRowBlock.objects.filter(dataset=dataset), per_page, key='line', count=count)
+
+    @cached_property
+    def count(self) -> int:
+        if self._count is not None:
+            return self._count
+        return self.queryset.aggregate(total=Sum('row_count'))['total'] or 0
+
+    def get_page(self, after=None, before=None, last: bool = False) -> KeysetPage:
+        if after is not None:
+            start = int(after) + 1
+        elif before is not None:
+            start = max(0, int(before) - self.per_page)
+        elif last:
+            start = max(0, self.count - self.per_page)
+        else:
+            start = 0
+
+        end = start + self.per_page
+        if before is not None:
+            end = min(end, int(before))
+
+        rows = self.get_rows(start, end)
+        return KeysetPage(
+            rows, self,
+            has_previous=start > 0,
+            has_next=bool(rows) and rows[-1].line + 1 < self.count)
+
+    def get_rows(self, start: int, end: int) -> list:
+        """
+        Rows with `start <= line < end`.
+        """
+        blocks = self.queryset.filter(
+            first_line__lt=end,
+            first_line__gt=start - F('row_count'),
+        ).order_by('first_line')
+        return [
+            row for block in blocks for row in get_block_rows(block)
+            if start <= row.line < end
+        ]
+
+
+class BlockErrorRowPaginator(KeysetPaginator):
+    """
+    Pages through erroneous rows of a dataset stored in `DatasetRowBlock`s.
+    Blocks without errors are skipped and blocks are only fetched (and
+    decoded) until the requested page is full.
+    """
+
+    def __init__(self, dataset: Dataset, per_page: int, count: int = None):
+        super(BlockErrorRowPaginator, self).__init__(
+            DatasetRowBlock.objects.filter(dataset=dataset).exclude(error_lines=[]),
+            per_page, key='line', count=count)
+
+    @cached_property
+    def count(self) -> int:
+        if self._count is not None:
+            return self._count
+        return sum(len(lines) for lines in self.queryset.values_list('error_lines', flat=True))
+
+    def get_page(self, after=None, before=None, last: bool = False) -> KeysetPage:
+        backwards = before is not None or last
+        blocks = self.queryset.order_by('-first_line' if backwards else 'first_line')
+        if after is not None:
+            after = int(after)
+            blocks = blocks.filter(first_line__gt=after + 1 - F('row_count'))
+        if before is not None:
+            before = int(before)
+            blocks = blocks.filter(first_line__lt=before)
+
+        rows = (
+            row
+            for block in blocks.iterator(chunk_size=10)
+            for row in (reversed(get_block_rows(block)) if backwards else get_block_rows(block))
+            if row.has_error
+            and (after is None or row.line > after)
+            and (before is None or row.line < before)
+        )
+        rows = list(itertools.islice(rows, self.per_page + 1))
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if backwards:
+            return KeysetPage(
+                list(reversed(rows)), self,
+                has_previous=has_more, has_next=before is not None)
+        return KeysetPage(rows, self, has_previous=after is not None, has_next=has_more)
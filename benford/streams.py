@@ -0,0 +1,66 @@
+import codecs
+
+from benford.conf import BENFORD_UPLOAD_CHUNK_SIZE
+
+
+class ChunkedTextReader:
+    """
+    Read-only text stream over a binary file (e.g. an uploaded file).
+
+    The file is read `chunk_size` bytes at a time and decoded incrementally,
+    so only the current chunk is held in memory instead of the decoded
+    content of the whole file. It provides the subset of the file API
+    the analyzer (and `csv.reader`) needs: iteration over lines, `readline`
+    and rewinding with `seek(0)`.
+    """
+
+    def __init__(self, binary_file, encoding='utf-8', chunk_size=BENFORD_UPLOAD_CHUNK_SIZE):
+        self._file = binary_file
+        self._encoding = encoding
+        self.chunk_size = chunk_size
+        self.seek(0)
+
+    def seek(self, offset: int):
+        assert offset == 0, 'ChunkedTextReader can only be rewound to the beginning.'
+        self._file.seek(0)
+        self._decoder = codecs.getincrementaldecoder(self._encoding)()
+        self._lines = []
+        self._position = 0
+        self._pending = ''
+        self._eof = False
+        self.bytes_read = 0
+        return 0
+
+    def readline(self) -> str:
+        while self._position >= len(self._lines):
+            if self._eof:
+                return ''
+            self._read_chunk()
+        line = self._lines[self._position]
+        self._position += 1
+        return line
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def _read_chunk(self):
+        data = self._file.read(self.chunk_size)
+        self.bytes_read += len(data)
+        self._eof = not data
+        lines = (self._pending + self._decoder.decode(data, final=self._eof)).split('\n')
+
+        # The last piece is either empty or an incomplete line that
+        # continues in the next chunk.
+        self._pending = lines.pop()
+        self._lines = [line + '\n' for line in lines]
+        self._position = 0
+
+        if self._eof and self._pending:
+            self._lines.append(self._pending)
+            self._pending = ''
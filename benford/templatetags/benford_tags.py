@@ -1,14 +1,23 @@
 from django import template
+from django.urls import reverse
 
 from benford.analyzer import BenfordAnalyzer
-from benford.graph import get_graph_img_src
+from benford.conf import BENFORD_GRAPH_FORMAT
+from benford.graph import get_graph_img_src, get_graph_digest
 
 register = template.Library()
 
 
 @register.inclusion_tag('benford/templatetags/graph.html')
 def graph(analyzer: BenfordAnalyzer):
-    img_src = get_graph_img_src(analyzer=analyzer)
+    dataset = analyzer.dataset
+    if dataset.pk is None:
+        # Unsaved datasets have no graph URL, so the image is inlined.
+        img_src = get_graph_img_src(analyzer=analyzer)
+    else:
+        url = reverse('benford:dataset_graph', kwargs={
+            'slug': dataset.slug, 'graph_format': BENFORD_GRAPH_FORMAT})
+        img_src = f'{url}?v={get_graph_digest(analyzer)}'
     return {
         'img_src': img_src,
     }
@@ -1,5 +1,8 @@
+import io
 from decimal import Decimal
+from importlib import import_module
 
+from django.apps import apps
 from django.test import SimpleTestCase
 from django.test.testcases import TestCase
 
@@ -10,7 +13,7 @@ from benford.analyzer import (
 from benford.core import (
     EXPECTED_BENFORD_LAW_DISTRIBUTION,
 )
-from benford.models import Dataset, SignificantDigit
+from benford.models import Dataset, SignificantDigit, DatasetRow
 
 
 class BenfordAnalyzerTest(TestCase):
@@ -99,8 +102,8 @@ class BenfordAnalyzerTest(TestCase):
         chisq = analyzer.get_chisq_test_statistic()
 
         # An ideal case when all values match the expected distribution
-        # according to Benford's law.
-        self.assertEqual(chisq, 0)
+        # according to Benford's law (up to the rounding to whole counts).
+        self.assertAlmostEqual(chisq, 0, places=2)
         self.assertTrue(analyzer.is_compliant_with_benford_law)
 
     def test_benford_law_compliance_divergence(self):
@@ -110,9 +113,10 @@ class BenfordAnalyzerTest(TestCase):
             7: 18, 8: 13, 9: 10,
         })
 
+        # The statistic is computed on counts, not on rounded percentages.
         chisq = analyzer.get_chisq_test_statistic()
-        self.assertEqual(chisq, 5.226832036302567)
-        self.assertTrue(analyzer.is_compliant_with_benford_law)
+        self.assertAlmostEqual(chisq, 19.9516, places=4)
+        self.assertFalse(analyzer.is_compliant_with_benford_law)
 
     def test_benford_law_compliance_divergence_2(self):
         analyzer = BenfordAnalyzer(occurences={
@@ -122,7 +126,7 @@ class BenfordAnalyzerTest(TestCase):
         })
 
         chisq = analyzer.get_chisq_test_statistic()
-        self.assertEqual(chisq, 146.05630441745905)
+        self.assertAlmostEqual(chisq, 65.7323, places=4)
         self.assertFalse(analyzer.is_compliant_with_benford_law)
 
     def test_digits_summary(self):
@@ -134,6 +138,55 @@ class BenfordAnalyzerTest(TestCase):
         self.assertEqual(summary[0].percentage, Decimal('50'))
         self.assertEqual(summary[0].expected_percentage, Decimal('30.1'))
 
+    def test_stored_statistics(self):
+        analyzer = BenfordAnalyzer(occurences={
+            1: 100, 2: 80, 3: 60,
+            4: 50, 5: 35, 6: 20,
+            7: 18, 8: 13, 9: 10,
+        })
+        dataset = analyzer.save()
+
+        dataset = Dataset.objects.get(pk=dataset.pk)
+        self.assertTrue(dataset.has_statistics)
+        self.assertEqual(dataset.total_occurences, 386)
+        self.assertEqual(dataset.chisq_statistic, analyzer.get_chisq_test_statistic())
+        self.assertAlmostEqual(dataset.p_value, 0.0105, places=4)
+        self.assertFalse(dataset.is_compliant)
+        self.assertEqual(len(dataset.summary), 9)
+
+        # An analyzer loaded from the dataset uses the stored results and
+        # doesn't query significant digits.
+        with self.assertNumQueries(0):
+            loaded = BenfordAnalyzer.create_from_model(dataset)
+            self.assertFalse(loaded.is_compliant_with_benford_law)
+            self.assertDictEqual(loaded.occurences, analyzer.occurences)
+            self.assertDictEqual(loaded.percentages, analyzer.percentages)
+            self.assertEqual(loaded.total_occurences, 386)
+            self.assertListEqual(
+                [vars(row) for row in loaded.get_summary()],
+                [vars(row) for row in analyzer.get_summary()])
+
+    def test_recompute_stored_statistics(self):
+        analyzers = [
+            BenfordAnalyzer(occurences={1: 100, 2: 80, 3: 60, 4: 50, 5: 35, 6: 20, 7: 18, 8: 13, 9: 10}),
+            BenfordAnalyzer(occurences={1: 7, 2: 3, 3: 3, 5: 2, 11: 1}, base=16),
+        ]
+        for analyzer in analyzers:
+            analyzer.save()
+        # Statistics computed from percentages, before they were computed on counts.
+        Dataset.objects.update(chisq_statistic=2.59, p_value=0.96, is_compliant=True)
+        empty = Dataset.objects.create(title='Empty')
+
+        migration = import_module('benford.migrations.0019_recompute_statistics')
+        migration.recompute_statistics(apps, None)
+        for analyzer in analyzers:
+            analyzer.dataset.refresh_from_db()
+            for field, value in analyzer.get_statistics().items():
+                self.assertEqual(getattr(analyzer.dataset, field), value, field)
+        # Datasets without stored statistics are computed when displayed.
+        empty.refresh_from_db()
+        self.assertFalse(empty.has_statistics)
+
     def test_load_from_model(self):
         dataset = Dataset.objects.create(title='My dataset')
         SignificantDigit.objects.bulk_create([
@@ -148,6 +201,97 @@ class BenfordAnalyzerTest(TestCase):
         analyzer = BenfordAnalyzer.create_from_model(dataset)
         self.assertEqual(analyzer.dataset.pk, dataset.pk)
         self.assertEqual(analyzer.title, 'My dataset')
+        self.assertEqual(analyzer.total_occurences, 60)
+
+
+class BenfordAnalyzerDigitTestsTest(TestCase):
+    def test_digit_tests(self):
+        analyzer = BenfordAnalyzer.create_from_string('12\n15\n0.3\n987\n1.5\n')
+        self.assertDictEqual(analyzer.occurences, {1: 3, 3: 1, 9: 1})
+        self.assertDictEqual(analyzer.test_occurences, {
+            'second': {2: 1, 5: 2, 8: 1},
+            'first_two': {12: 1, 15: 2, 98: 1},
+            'last_two': {12: 1, 15: 2, 87: 1},
+        })
+
+        summary = analyzer.get_test_summary('first_two')
+        self.assertListEqual([row.digit for row in summary], list(range(10, 100)))
+        self.assertEqual(summary[5].occurences, 2)
+        self.assertEqual(summary[5].percentage, Decimal('50.00'))
+        self.assertEqual(summary[0].expected_percentage, Decimal('4.14'))
+
+        # Counts are stored and appended rows add to them.
+        analyzer.save()
+        analyzer = BenfordAnalyzer.create_from_model(analyzer.dataset)
+        self.assertEqual(analyzer.test_occurences['first_two'], {12: 1, 15: 2, 98: 1})
+        analyzer.append(io.StringIO('12\n'))
+        self.assertEqual(analyzer.dataset.get_test_occurences()['first_two'], {12: 2, 15: 2, 98: 1})
+
+    def test_first_digit_only(self):
+        analyzer = BenfordAnalyzer.create_from_string('12\n15\n', tests=())
+        self.assertDictEqual(analyzer.test_occurences, {})
+
+
+class BenfordAnalyzerBaseTest(TestCase):
+    def test_base(self):
+        values = [str(int(16 ** (i / 100))) for i in range(100, 500)]
+        analyzer = BenfordAnalyzer.create_from_string('\n'.join(values), base=16)
+        self.assertEqual(analyzer.base, 16)
+        self.assertEqual(analyzer.total_occurences, 400)
+        self.assertEqual(max(analyzer.occurences), 15)
+        self.assertDictEqual(analyzer.test_occurences, {})
+        self.assertEqual(len(analyzer.get_observed_distribution_flat()), 15)
+        self.assertTrue(analyzer.is_compliant_with_benford_law)
+
+        dataset = analyzer.save()
+        self.assertEqual(dataset.base, 16)
+        self.assertListEqual([row['digit'] for row in dataset.summary], list(range(1, 16)))
+        self.assertEqual(dataset.summary[0]['expected_percentage'], '25.0')
+        self.assertTrue(dataset.is_compliant)
+
+        # Appended rows are read in the same base.
+        BenfordAnalyzer.create_from_model(dataset).append(io.StringIO('255\n'))
+        self.assertEqual(dataset.significant_digits.get(digit=15).occurences,
+                         analyzer.occurences[15] + 1)
+
+
+class BenfordAnalyzerAppendTest(TestCase):
+    def test_append(self):
+        dataset = BenfordAnalyzer.create_from_string('a;12\nb;3\n', delimiter=';', save=True).dataset
+        self.assertEqual(dataset.line_count, 2)
+        self.assertEqual(dataset.error_count, 0)
+        self.assertEqual(dataset.relevant_column, 1)
+
+        # The header is skipped and the new rows are parsed like the original ones.
+        analyzer = BenfordAnalyzer.create_from_model(dataset)
+        appended = analyzer.append(io.StringIO('name;value\nc;15\nd;x\n'), has_header=True)
+        self.assertDictEqual(appended.occurences, {1: 1})
+        self.assertSetEqual(appended.error_rows, {4})
+
+        dataset.refresh_from_db()
+        self.assertEqual(dataset.line_count, 5)
+        self.assertEqual(dataset.error_count, 1)
+        self.assertListEqual(
+            list(DatasetRow.objects.filter(dataset=dataset).values_list('line', 'has_error')),
+            [(0, False), (1, False), (2, False), (3, False), (4, True)])
+        self.assertDictEqual(dataset.get_occurences_summary(), {1: 2, 3: 1})
+
+        # Statistics are the same as of the whole input analyzed at once.
+        whole = BenfordAnalyzer.create_from_string('a;12\nb;3\nc;15\n', delimiter=';')
+        self.assertEqual(dataset.total_occurences, 3)
+        self.assertEqual(dataset.chisq_statistic, whole.get_chisq_test()[0])
+        self.assertDictEqual(analyzer.occurences, whole.occurences)
+        self.assertListEqual(dataset.summary, whole.get_statistics()['summary'])
+
+    def test_append_to_first_column(self):
+        dataset = BenfordAnalyzer.create_from_string('12;a\n3;b\n', delimiter=';', save=True).dataset
+        self.assertEqual(dataset.relevant_column, 0)
+
+        # The stored column is kept, even if another one looks numeric.
+        appended = BenfordAnalyzer.create_from_model(dataset).append(io.StringIO('x;5\n7;b\n'))
+        self.assertEqual(appended.relevant_column, 0)
+        self.assertDictEqual(appended.occurences, {7: 1})
+        self.assertSetEqual(appended.error_rows, {2})
 
 
 class AnalyzerHelperFunctionsTest(SimpleTestCase):
@@ -0,0 +1,122 @@
+import io
+import json
+import tempfile
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from benford.analyzer import BenfordAnalyzer
+from benford.api import DatasetCollectionApiView
+from benford.models import Dataset
+
+
+class DatasetApiTest(TestCase):
+    def get_rows(self, dataset, export_format, **params):
+        response = self.client.get(
+            reverse('benford:api_dataset_rows', kwargs={'slug': dataset.slug, 'export_format': export_format}),
+            params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_create_dataset(self):
+        response = self.client.post(
+            reverse('benford:api_datasets'),
+            json.dumps({'title': 'API', 'data_raw': 'a\t12\nb\tx\nc\t3\n'}),
+            content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+
+        data = response.json()
+        dataset = Dataset.objects.get(slug=data['slug'])
+        self.assertEqual(response['Location'], data['url'])
+        self.assertEqual(data['title'], 'API')
+        self.assertEqual(data['status'], 'done')
+        self.assertEqual((data['line_count'], data['error_count']), (3, 1))
+        self.assertEqual(data['statistics']['total_occurences'], 2)
+        self.assertEqual(data['statistics']['chisq_statistic'], dataset.chisq_statistic)
+        self.assertIn('mad', data['statistics'])
+        self.assertDictEqual(data['summary'][0], {
+            'digit': 1, 'occurences': 1, 'percentage': '50.0', 'expected_percentage': '30.1'})
+        self.assertEqual(len(data['tests']['first_two']), 90)
+
+    def test_create_dataset_errors(self):
+        url = reverse('benford:api_datasets')
+        response = self.client.post(url, '{', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(url, '[1]', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+        # Values aren't coerced to the types of the fields.
+        for field, value in [
+                ('data_raw', 5), ('data_raw', ['1']), ('relevant_column', '1'), ('base', True),
+                ('has_header', 1), ('title', {})]:
+            with self.subTest(field=field, value=value):
+                response = self.client.post(
+                    url, {'data_raw': '1', field: value}, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(field, response.json()['errors'])
+
+        response = self.client.post(url, {'title': 'Empty'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()['errors']['__all__'][0]['message'], 'Please provide either file or raw data.')
+        self.assertEqual(Dataset.objects.count(), 0)
+
+    def test_async_create_dataset(self):
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root), \
+                mock.patch.object(DatasetCollectionApiView, 'async_analysis', True):
+            response = self.client.post(reverse('benford:api_datasets'), {'data_raw': '1\n2\n'})
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.json()['status'], 'pending')
+            self.assertIsNone(response.json()['statistics'])
+
+            # Rows aren't available until the dataset is analyzed.
+            dataset = Dataset.objects.get()
+            response = self.client.get(
+                reverse('benford:api_dataset_rows', kwargs={'slug': dataset.slug, 'export_format': 'csv'}))
+            self.assertEqual(response.status_code, 409)
+
+    def test_dataset_etag(self):
+        analyzer = BenfordAnalyzer.create_from_string('12\n3\n', save=True)
+        url = reverse('benford:api_dataset', kwargs={'slug': analyzer.dataset.slug})
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertEqual(response.json()['statistics']['mad'], analyzer.dataset.mad)
+
+        # Stored results are neither computed again nor serialized.
+        with mock.patch('benford.analyzer.compute_conformity_metrics') as compute, \
+                mock.patch('benford.api.serialize_dataset') as serialize:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        compute.assert_not_called()
+        serialize.assert_not_called()
+
+        # Appending rows changes the results.
+        analyzer.append(io.StringIO('45\n'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['line_count'], 3)
+
+    def test_export_rows(self):
+        dataset = BenfordAnalyzer.create_from_string('a;12\nb;x\nc;"3;4"\n', delimiter=';', save=True).dataset
+
+        self.assertEqual(self.get_rows(dataset, 'csv'), 'a;12\nb;x\nc;"3;4"\n')
+        self.assertEqual(self.get_rows(dataset, 'csv', errors=1), 'b;x\n')
+        self.assertListEqual(
+            [json.loads(line) for line in self.get_rows(dataset, 'ndjson').splitlines()],
+            [
+                {'line': 0, 'data': ['a', '12'], 'has_error': False},
+                {'line': 1, 'data': ['b', 'x'], 'has_error': True},
+                {'line': 2, 'data': ['c', '3;4'], 'has_error': False},
+            ])
+
+        url = reverse('benford:api_dataset_rows', kwargs={'slug': dataset.slug, 'export_format': 'csv'})
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    @mock.patch('benford.loaders.BENFORD_ROW_LOADER', 'blocks')
+    def test_export_row_blocks(self):
+        dataset = BenfordAnalyzer.create_from_string('12\nx\n3\n', save=True).dataset
+        self.assertEqual(dataset.row_storage, Dataset.ROW_STORAGE_BLOCKS)
+        self.assertEqual(self.get_rows(dataset, 'csv'), '12\nx\n3\n')
+        self.assertEqual(self.get_rows(dataset, 'csv', errors=1), 'x\n')
@@ -0,0 +1,74 @@
+import asyncio
+import tempfile
+import threading
+from unittest import mock
+
+from asgiref.sync import SyncToAsync, sync_to_async
+from django.test import TransactionTestCase, RequestFactory
+
+from benford import async_views
+from benford.models import Dataset
+from benford.views import DashboardView
+
+
+def render_dashboard():
+    return DashboardView.as_view()(RequestFactory().get('/')).render()
+
+
+class AsyncViewsTest(TransactionTestCase):
+    # Requests are built by `RequestFactory`: `AsyncRequestFactory` of
+    # Django 3.1.0 sends a broken CONTENT_LENGTH with POST data.
+    async def test_upload(self):
+        response = await async_views.upload_dataset(RequestFactory().get('/upload/'))
+        self.assertEqual(response.status_code, 200)
+
+        request = RequestFactory().post('/upload/', {'title': 'Async', 'data_raw': '12\n3\nx\n'})
+        response = await async_views.upload_dataset(request)
+        self.assertEqual(response.status_code, 302)
+
+        dataset = await sync_to_async(Dataset.objects.get)()
+        self.assertEqual(response.url, dataset.get_absolute_url())
+        self.assertEqual((dataset.title, dataset.total_occurences, dataset.error_count), ('Async', 2, 1))
+
+        # Invalid forms are displayed again.
+        response = await async_views.upload_dataset(RequestFactory().post('/upload/', {}))
+        await sync_to_async(response.render)()
+        self.assertContains(response, 'Please provide either file or raw data.')
+
+    async def test_async_analysis(self):
+        request = RequestFactory().post('/upload/', {'data_raw': '12\n'})
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            response = await async_views.upload_dataset(request, async_analysis=True)
+            self.assertEqual(response.status_code, 302)
+            dataset = await sync_to_async(Dataset.objects.get)()
+            self.assertFalse(await sync_to_async(lambda: dataset.is_analyzed)())
+
+    async def test_dashboard_during_upload(self):
+        for step in ('get_upload_form', 'analyze_upload'):
+            with self.subTest(step=step):
+                await self.assert_dashboard_served_during(step)
+
+    async def assert_dashboard_served_during(self, step):
+        started, finish = threading.Event(), threading.Event()
+        original = getattr(async_views, step)
+
+        def slow_step(*args):
+            started.set()
+            finish.wait(10)
+            return original(*args)
+
+        request = RequestFactory().post('/upload/', {'data_raw': '12\n'})
+        with mock.patch.object(async_views, step, slow_step):
+            upload = asyncio.ensure_future(async_views.upload_dataset(request))
+            await sync_to_async(started.wait)(10)
+            try:
+                # The upload is being parsed or analyzed, but the thread the
+                # ASGI handler runs sync views in is free.
+                response = await asyncio.wait_for(asyncio.get_event_loop().run_in_executor(
+                    SyncToAsync.single_thread_executor, render_dashboard), 5)
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(upload.done())
+            finally:
+                finish.set()
+            response = await upload
+        self.assertEqual(response.status_code, 302)
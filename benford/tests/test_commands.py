@@ -0,0 +1,62 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+from django.urls import reverse
+
+from benford.management.commands.benford_analyze import find_files
+from benford.models import Dataset, DatasetRow
+from benford.tests.test_parallel import CENSUS_2009B
+
+
+class BenfordAnalyzeCommandTest(TestCase):
+    def test_analyze_files(self):
+        out = StringIO()
+        call_command('benford_analyze', CENSUS_2009B, '--has-header', '--workers', '1', stdout=out)
+
+        dataset = Dataset.objects.get()
+        self.assertEqual(dataset.title, 'census_2009b')
+        self.assertEqual(dataset.total_occurences, 19507)
+        self.assertEqual(dataset.error_count, 2)
+        self.assertIn(f'{CENSUS_2009B}: 19510 rows', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+        self.assertIn('Analyzed 1 file(s)', out.getvalue())
+
+    def test_without_rows(self):
+        call_command(
+            'benford_analyze', CENSUS_2009B, '--has-header', '--without-rows', '--workers', '2', stdout=StringIO())
+
+        dataset = Dataset.objects.get()
+        self.assertEqual(dataset.row_storage, Dataset.ROW_STORAGE_NONE)
+        self.assertEqual((dataset.line_count, dataset.error_count), (19510, 2))
+        self.assertEqual(dataset.total_occurences, 19507)
+        self.assertIsNotNone(dataset.chisq_statistic)
+        self.assertFalse(DatasetRow.objects.exists())
+
+        response = self.client.get(dataset.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Browse data')
+        self.assertEqual(
+            self.client.get(reverse('benford:dataset_rows', kwargs={'slug': dataset.slug})).status_code, 404)
+
+    def test_failed_file(self):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'a\t1\n\xff\t2\n')
+            f.flush()
+            with self.assertRaisesMessage(CommandError, '1 file(s) failed.'):
+                call_command('benford_analyze', f.name, stdout=StringIO(), stderr=StringIO())
+
+    def test_find_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ('a.csv', 'b.tsv', '.hidden'):
+                open(os.path.join(directory, name), 'w').close()
+            os.mkdir(os.path.join(directory, 'nested'))
+            open(os.path.join(directory, 'nested', 'c.csv'), 'w').close()
+
+            a, b, c = (os.path.join(directory, name) for name in ('a.csv', 'b.tsv', 'nested/c.csv'))
+            self.assertListEqual(find_files([directory]), [a, b])
+            self.assertListEqual(find_files([os.path.join(directory, '**', '*.csv'), a]), [a, c])
+            with self.assertRaises(CommandError):
+                find_files([os.path.join(directory, 'missing.csv')])
@@ -1,10 +1,19 @@
+import random
 from decimal import Decimal
+from unittest import mock
 
+import numpy
+from scipy.stats import chisquare
 from django.test.testcases import TestCase
 
+from benford import core
 from benford.core import (
     get_first_significant_digit, map_significant_digits, count_occurences,
-    count_occurences_with_percentage,
+    count_occurences_with_percentage, get_first_significant_digits, count_significant_digits,
+    get_digit_test_values, count_digit_test_values, get_expected_probability,
+    get_digit_test_range, get_expected_distribution, DIGIT_TESTS, get_expected_distribution_flat,
+    get_expected_percentages, get_compliance_critical_value, get_count_vector,
+    get_expected_probabilities, compute_statistics, iter_counted_batches, MAX_VECTORIZED_VALUE_LENGTH,
 )
 from benford.exceptions import NoSignificantDigitFound
 
@@ -83,4 +92,160 @@ class CoreTest(TestCase):
             1: Decimal('33.3'), 2: Decimal('33.3'), 3: Decimal('33.4'),
         })
 
+        # Rounding is exact: 99.925 % is rounded up.
+        self.assertDictEqual(
+            count_occurences_with_percentage({1: 63952, 2: 48}, 2),
+            {1: Decimal('99.93'), 2: Decimal('0.07')})
+
+    def test_get_first_significant_digits(self):
+        # Strings are scanned like the reference (regex-based) implementation.
+        samples = ['1', '20', '0.3', '-45', 'ABC', '', 'x7', '0', '0.000912', '1e-05', 'żółw 6']
+        expected = [
+            get_first_significant_digit(v) if any(c in '123456789' for c in v) else 0
+            for v in samples]
+        self.assertListEqual(
+            list(get_first_significant_digits(numpy.array(samples, dtype=str))), expected)
+        self.assertListEqual(
+            list(get_first_significant_digits(numpy.array(samples[:10], dtype=bytes))),
+            expected[:10])
+
+        # Floats must give the same results as the reference implementation.
+        random.seed(0)
+        floats = [0.1, 0.3, 0.7, 1000.0, 999.9999999999999, -0.29, 1e-300, 5e-324, 1.7e308]
+        floats += [random.uniform(-1e6, 1e6) for _ in range(1000)]
+        floats += [round(random.uniform(0, 10), random.randint(0, 6)) * 10 ** random.randint(-20, 20)
+                   for _ in range(1000)]
+        self.assertListEqual(
+            list(get_first_significant_digits(numpy.array(floats))),
+            [get_first_significant_digit(v) if v else 0 for v in floats])
+
+        # Zero, NaN and infinity have no significant digit.
+        self.assertListEqual(
+            list(get_first_significant_digits(numpy.array([0.0, numpy.nan, numpy.inf]))),
+            [0, 0, 0])
+
+        # Integers don't lose precision.
+        self.assertListEqual(
+            list(get_first_significant_digits(numpy.array([7, 10, 999999999999999999]))),
+            [7, 1, 9])
+
+    def test_count_significant_digits(self):
+        digits = get_first_significant_digits(
+            numpy.array(['1', '2', '3', '10', '11', 'a', '25'], dtype=str))
+        self.assertDictEqual(count_significant_digits(digits), {1: 3, 2: 2, 3: 1})
+
+    def test_count_long_values(self):
+        padding = 'x' * (MAX_VECTORIZED_VALUE_LENGTH + 1)
+        values = ['12', padding + '0.034', 'abc', '5' + padding + '67', padding]
+        occurences, error_rows = {}, set()
+        test_occurences = {'second': {}, 'last_two': {}}
+        with mock.patch.object(core, '_count_column', wraps=core._count_column) as count_column:
+            list(iter_counted_batches(
+                enumerate([value] for value in values), 0, occurences, error_rows,
+                test_occurences=test_occurences))
+        # Long values don't widen the column of the other ones.
+        self.assertListEqual(
+            [call[0][0] for call in count_column.call_args_list],
+            [['12', 'abc'], [values[1]], [values[3]], [values[4]]])
+        self.assertDictEqual(occurences, {1: 1, 3: 1, 5: 1})
+        self.assertSetEqual(error_rows, {2, 4})
+        self.assertDictEqual(test_occurences, {'second': {2: 1, 4: 1, 6: 1}, 'last_two': {12: 1, 34: 1, 67: 1}})
+
+    def test_get_digit_test_values(self):
+        values = numpy.array(['12.34', '0.05', '-7', 'abc', '100', '0.0203', '$9,870'], dtype=str)
+        test_values = get_digit_test_values(values)
+        self.assertListEqual(list(test_values['first']), [1, 5, 7, -1, 1, 2, 9])
+        self.assertListEqual(list(test_values['second']), [2, -1, -1, -1, 0, 0, 8])
+        self.assertListEqual(list(test_values['first_two']), [12, -1, -1, -1, 10, 20, 98])
+        self.assertListEqual(list(test_values['last_two']), [34, -1, -1, -1, 0, 3, 70])
+
+        # First digits are the same as of `get_first_significant_digits`.
+        first = get_first_significant_digits(values)
+        self.assertListEqual(list(numpy.maximum(test_values['first'], 0)), list(first))
+
+        self.assertDictEqual(count_digit_test_values(test_values['second']), {0: 2, 2: 1, 8: 1})
+        empty = get_digit_test_values(numpy.array([''], dtype=str), ['second'])
+        self.assertListEqual(list(empty['second']), [-1])
+
+    def test_expected_distributions(self):
+        for test in DIGIT_TESTS:
+            for base in (10, 3):
+                digits = get_digit_test_range(test, base)
+                self.assertAlmostEqual(sum(get_expected_probability(d, base, test) for d in digits), 1)
+
+        self.assertEqual(get_expected_distribution(0, test='second', decimal_places=2), Decimal('11.97'))
+        self.assertEqual(get_expected_distribution(9, test='second', decimal_places=2), Decimal('8.50'))
+        self.assertEqual(get_expected_distribution(10, test='first_two', decimal_places=2), Decimal('4.14'))
+        self.assertEqual(get_expected_distribution(99, test='first_two', decimal_places=2), Decimal('0.44'))
+        self.assertEqual(get_expected_distribution(42, test='last_two'), Decimal('1.0'))
+
+    def test_other_bases(self):
+        self.assertEqual(get_first_significant_digit(255, base=16), 15)
+        self.assertEqual(get_first_significant_digit('256', base=16), 1)
+        self.assertEqual(get_first_significant_digit(0.1, base=2), 1)
+        self.assertEqual(get_first_significant_digit('-0.7', base=3), 2)
+        with self.assertRaises(NoSignificantDigitFound):
+            get_first_significant_digit('abc', base=8)
+
+        # Vectorized digits are the same as of the exact implementation,
+        # also for values right at digit boundaries.
+        random.seed(17)
+        values = [str(random.lognormvariate(0, 10)) for _ in range(2000)]
+        values += ['8', '9', '0.125', str(2 ** 60), '1e-300', '0', 'nan', 'abc', '-6']
+        for base in (2, 3, 8, 16, 36):
+            expected = []
+            for value in values:
+                try:
+                    expected.append(get_first_significant_digit(value, base))
+                except NoSignificantDigitFound:
+                    expected.append(0)
+            digits = get_first_significant_digits(numpy.array(values, dtype=str), base)
+            self.assertListEqual(list(digits), expected)
+
+        self.assertListEqual(
+            list(get_first_significant_digits(numpy.array([255, 256, 0, -17, 2 ** 62]), 16)),
+            [15, 1, 0, 1, 4])
+
+    def test_expected_distribution_tables(self):
+        self.assertEqual(len(get_expected_distribution_flat(16)), 15)
+        self.assertEqual(get_expected_distribution_flat(16)[0], Decimal('25.0'))
+        self.assertEqual(get_expected_distribution(1, base=16), Decimal('25.0'))
+
+        # Tables are computed once per base.
+        self.assertIs(get_expected_percentages(8), get_expected_percentages(8))
+        with self.assertRaises(TypeError):
+            get_expected_percentages(8)[1] = Decimal('0')
+
+        self.assertAlmostEqual(get_compliance_critical_value(10), 13.36, places=2)
+        self.assertAlmostEqual(get_compliance_critical_value(16), 21.06, places=2)
+        # Datasets are compliant exactly when the p-value is above the significance level.
+        rng = numpy.random.default_rng(0)
+        for base in (8, 10, 16):
+            probabilities = get_expected_probabilities(base)
+            counts = rng.multinomial(300, 0.8 * probabilities + 0.2 / (base - 1), size=200)
+            statistics = compute_statistics(counts, probabilities)
+            is_compliant = statistics.chisq_statistic <= get_compliance_critical_value(base)
+            self.assertTrue(is_compliant.any() and not is_compliant.all())
+            numpy.testing.assert_array_equal(is_compliant, statistics.p_value >= 0.1)
+
+    def test_compute_statistics(self):
+        occurences = {1: 100, 2: 80, 3: 60, 4: 50, 5: 35, 6: 20, 7: 18, 8: 13, 9: 10}
+        counts = get_count_vector(occurences)
+        numpy.testing.assert_array_equal(counts, [100, 80, 60, 50, 35, 20, 18, 13, 10])
+        numpy.testing.assert_array_equal(
+            get_count_vector({12: 3, 99: 1}, test='first_two')[[2, 89]], [3, 1])
+
+        probabilities = get_expected_probabilities()
+        statistics = compute_statistics(counts, probabilities)
+        expected = chisquare(counts, probabilities * counts.sum())
+        self.assertAlmostEqual(statistics.chisq_statistic, expected[0])
+        self.assertAlmostEqual(statistics.p_value, expected[1])
+        self.assertAlmostEqual(
+            statistics.mad, numpy.abs(counts / 386 - probabilities).mean())
 
+        # Z-statistic of the first digit: (|0.2591 - 0.3010| - 1/772) / 0.0233
+        self.assertAlmostEqual(statistics.z_statistics[0], 1.7418, places=4)
+        # The continuity correction doesn't make Z negative.
+        statistics = compute_statistics(probabilities * 1000, probabilities)
+        self.assertAlmostEqual(statistics.chisq_statistic, 0)
+        numpy.testing.assert_array_equal(statistics.z_statistics, 0)
@@ -35,6 +35,11 @@ class DatasetUploadFormTest(TestCase):
             form.non_field_errors(),
             ErrorList(['Please provide either file or raw data.']))
 
+    def test_relevant_column_range(self):
+        form = DatasetUploadForm({'data_raw': '1', 'relevant_column': 32768})
+        self.assertFalse(form.is_valid())
+        self.assertIn('relevant_column', form.errors)
+
     def test_form_with_raw_data(self):
         payload = {
             'data_raw': RAW_DATA_SAMPLE_1,
@@ -122,3 +127,21 @@ class DatasetUploadFormTest(TestCase):
                 dataset=benford_analyzer.dataset,
                 has_error=True
             ).count(), 2)
+
+        # Erroneous rows are marked by their line in the file (the header is line 0).
+        self.assertListEqual(
+            list(DatasetRow.objects.filter(
+                dataset=benford_analyzer.dataset, has_error=True,
+            ).order_by('line').values_list('line', flat=True)), [1391, 1392])
+
+    def test_save_in_single_pass(self):
+        form = create_census_2009b_form()
+        self.assertTrue(form.is_valid())
+
+        benford_analyzer = BenfordAnalyzer.create_from_form(form, save=True)
+        self.assertIsNotNone(benford_analyzer.dataset.pk)
+        self.assertEqual(benford_analyzer.total_occurences, 19507)
+        self.assertSetEqual(benford_analyzer.error_rows, {1391, 1392})
+        self.assertEqual(benford_analyzer.dataset.significant_digits.count(), 9)
+        self.assertEqual(
+            DatasetRow.objects.filter(dataset=benford_analyzer.dataset).count(), 19510)
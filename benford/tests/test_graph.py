@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import SimpleTestCase
+
+from benford.analyzer import BenfordAnalyzer
+from benford.graph import GraphRenderer, create_graph_svg, get_graph_spec, get_graph_data
+
+
+class GraphTest(SimpleTestCase):
+    def setUp(self):
+        self.analyzer = BenfordAnalyzer(occurences={1: 10, 2: 5, 3: 3})
+
+    def test_renderer(self):
+        renderer = GraphRenderer()
+        data = get_graph_data(self.analyzer)
+        png = renderer.render_png(**data)
+        self.assertTrue(png.startswith(b'\x89PNG'))
+
+        # The figure template is reused and cleaned after each graph.
+        self.assertEqual(renderer.render_png(**data), png)
+
+        # Graphs can be rendered concurrently.
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda _: renderer.render_png(**data), range(8)))
+        self.assertListEqual(results, [png] * 8)
+
+    def test_svg(self):
+        svg = create_graph_svg(self.analyzer)
+        self.assertTrue(svg.startswith('<svg'))
+
+        # One bar and one expected value marker per digit.
+        self.assertEqual(svg.count('<rect'), 9)
+        self.assertEqual(svg.count('<circle'), 9)
+
+    def test_spec(self):
+        spec = get_graph_spec(self.analyzer)
+        values = spec['data']['values']
+        self.assertEqual(len(values), 9)
+        self.assertDictEqual(values[0], {
+            'digit': 1, 'observed': 55.6, 'expected': 30.1,
+            'expected_min': 28.1, 'expected_max': 32.1,
+        })
@@ -0,0 +1,141 @@
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.test.testcases import TestCase
+from django.utils import timezone
+
+from benford.analyzer import BenfordAnalyzer
+from benford.conf import BENFORD_JOB_LEASE_TIMEOUT
+from benford.forms import DatasetUploadForm
+from benford.jobs import enqueue_analysis, claim_next_job, run_job, run_pending_jobs, fail_stale_jobs
+from benford.models import AnalysisJob, DatasetRow
+from benford.tests.common import RAW_DATA_SAMPLE_2
+from benford.tests.test_forms import create_census_2009b_form
+
+
+class AnalysisJobTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_enqueue_and_run(self):
+        form = create_census_2009b_form()
+        self.assertTrue(form.is_valid())
+
+        job = enqueue_analysis(form)
+        self.assertEqual(job.status, AnalysisJob.STATUS_PENDING)
+        self.assertEqual(job.progress, 0)
+        self.assertGreater(job.bytes_total, 0)
+        self.assertFalse(job.dataset.is_analyzed)
+
+        self.assertEqual(run_pending_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_DONE)
+        self.assertEqual(job.progress, 100)
+        self.assertIsNotNone(job.finished_at)
+        self.assertTrue(job.dataset.is_analyzed)
+
+        # The stored upload is removed once it has been analyzed.
+        self.assertFalse(job.data_file)
+
+        self.assertDictEqual(job.dataset.get_occurences_summary(), {
+            1: 5735, 2: 3544, 3: 2341, 4: 1847, 5: 1559,
+            6: 1370, 7: 1166, 8: 1042, 9: 903,
+        })
+        self.assertEqual(DatasetRow.objects.filter(dataset=job.dataset).count(), 19510)
+
+        # Nothing left in the queue.
+        self.assertEqual(run_pending_jobs(), 0)
+
+    def test_raw_data(self):
+        form = DatasetUploadForm({'data_raw': RAW_DATA_SAMPLE_2, 'relevant_column': 2, 'has_header': True})
+        self.assertTrue(form.is_valid())
+
+        job = enqueue_analysis(form)
+        self.assertEqual(claim_next_job(), job)
+        self.assertIsNone(claim_next_job())
+
+        run_job(AnalysisJob.objects.get(pk=job.pk))
+        self.assertEqual(sum(job.dataset.get_occurences_summary().values()), 19)
+
+    def test_failed_job(self):
+        form = DatasetUploadForm({}, {
+            'data_file': SimpleUploadedFile('data.csv', b'a\t1\nb\t\xff\xfe2\n'),
+        })
+        self.assertTrue(form.is_valid())
+
+        job = enqueue_analysis(form)
+        with self.assertLogs('benford.jobs', level='ERROR'):
+            run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+        self.assertIn('utf-8', job.error)
+        self.assertFalse(job.dataset.is_analyzed)
+
+        # Nothing that was saved before the failure is kept.
+        self.assertEqual(DatasetRow.objects.filter(dataset=job.dataset).count(), 0)
+        self.assertEqual(job.dataset.significant_digits.count(), 0)
+        self.assertEqual((job.dataset.line_count, job.dataset.error_count), (0, 0))
+
+    @mock.patch('benford.jobs.get_cached_graph', side_effect=OSError('Storage unavailable'))
+    def test_graph_failure(self, get_cached_graph):
+        form = DatasetUploadForm({'data_raw': '12\n3\n'})
+        self.assertTrue(form.is_valid())
+
+        job = enqueue_analysis(form)
+        with self.assertLogs('benford.jobs', level='ERROR'):
+            run_pending_jobs()
+        get_cached_graph.assert_called_once()
+
+        # The analysis is kept, the graph is rendered on request instead.
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_DONE)
+        self.assertEqual(DatasetRow.objects.filter(dataset=job.dataset).count(), 2)
+
+    def test_stale_job(self):
+        form = DatasetUploadForm({'data_raw': '12\nx\n'})
+        self.assertTrue(form.is_valid())
+        job = enqueue_analysis(form)
+        self.assertEqual(claim_next_job(), job)
+        # The worker saved some rows and was killed.
+        BenfordAnalyzer.open_csv(io.StringIO('12\nx\n'), dataset=job.dataset).save(atomic=False)
+
+        self.assertEqual(fail_stale_jobs(), 0)
+        AnalysisJob.objects.filter(pk=job.pk).update(
+            heartbeat_at=timezone.now() - timedelta(seconds=BENFORD_JOB_LEASE_TIMEOUT + 1))
+        with self.assertLogs('benford.jobs', level='ERROR'):
+            self.assertIsNone(claim_next_job())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(DatasetRow.objects.filter(dataset=job.dataset).count(), 0)
+        self.assertEqual(job.dataset.significant_digits.count(), 0)
+        job.dataset.refresh_from_db()
+        self.assertEqual((job.dataset.line_count, job.dataset.error_count), (0, 0))
+        self.assertFalse(job.dataset.has_statistics)
+
+    def test_job_lost(self):
+        form = DatasetUploadForm({'data_raw': '12\n3\n'})
+        self.assertTrue(form.is_valid())
+        job = enqueue_analysis(form)
+        job = claim_next_job()
+        # The job is failed as stale while it's still running.
+        AnalysisJob.objects.filter(pk=job.pk).update(status=AnalysisJob.STATUS_FAILED)
+
+        with self.assertLogs('benford.jobs', level='ERROR'), \
+                mock.patch('benford.jobs.BENFORD_JOB_PROGRESS_INTERVAL', 0):
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+        self.assertEqual(DatasetRow.objects.filter(dataset=job.dataset).count(), 0)
@@ -0,0 +1,44 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test.testcases import TestCase
+
+from benford.loaders import get_row_loader, BulkCreateRowLoader, CopyRowLoader
+from benford.models import Dataset, DatasetRow
+
+
+class RowLoadersTest(TestCase):
+    def setUp(self):
+        self.dataset = Dataset.objects.create()
+        self.rows = [(0, ['a', '1']), (1, ['b', 'x, "y"']), (2, ['żółw', '3'])]
+
+    def test_get_row_loader(self):
+        self.assertIsInstance(get_row_loader(self.dataset, 'bulk_create'), BulkCreateRowLoader)
+        self.assertIsInstance(get_row_loader(self.dataset, 'copy'), CopyRowLoader)
+
+        # `COPY` is picked automatically only on PostgreSQL.
+        self.assertEqual(
+            isinstance(get_row_loader(self.dataset, 'auto'), CopyRowLoader),
+            connection.vendor == 'postgresql')
+
+        with self.assertRaises(AssertionError):
+            get_row_loader(self.dataset, 'unknown')
+
+    def test_copy_sql(self):
+        sql = CopyRowLoader(self.dataset).get_copy_sql()
+        self.assertIn(DatasetRow._meta.db_table, sql)
+        self.assertTrue(sql.endswith('FROM STDIN WITH (FORMAT csv)'))
+
+    def test_bulk_create_loader(self):
+        self._test_loader(BulkCreateRowLoader(self.dataset))
+
+    @skipUnless(connection.vendor == 'postgresql', 'COPY requires PostgreSQL.')
+    def test_copy_loader(self):
+        self._test_loader(CopyRowLoader(self.dataset))
+
+    def _test_loader(self, loader):
+        loader.write(self.rows, error_rows={1})
+        rows = DatasetRow.objects.filter(dataset=self.dataset).order_by('line')
+        self.assertListEqual(
+            [(r.line, r.data, r.has_error) for r in rows],
+            [(0, ['a', '1'], False), (1, ['b', 'x, "y"'], True), (2, ['żółw', '3'], False)])
@@ -0,0 +1,108 @@
+from importlib import import_module
+
+import numpy
+from django.apps import apps
+from django.test import SimpleTestCase, TestCase
+
+from benford.analyzer import BenfordAnalyzer
+from benford.core import get_expected_probabilities
+from benford.metrics import (
+    compute_conformity_metrics, get_mad_conformity,
+    CLOSE_CONFORMITY, ACCEPTABLE_CONFORMITY, MARGINAL_CONFORMITY, NONCONFORMITY,
+)
+from benford.models import Dataset
+
+IDEAL_COUNTS = [301, 176, 125, 97, 79, 67, 58, 51, 46]
+DIVERGENT_COUNTS = [100, 80, 60, 50, 35, 20, 18, 13, 10]
+
+
+class ConformityMetricsTest(SimpleTestCase):
+    def test_mad_conformity(self):
+        self.assertEqual(get_mad_conformity(0.006), CLOSE_CONFORMITY)
+        self.assertEqual(get_mad_conformity(0.0061), ACCEPTABLE_CONFORMITY)
+        self.assertEqual(get_mad_conformity(0.013), MARGINAL_CONFORMITY)
+        self.assertEqual(get_mad_conformity(0.02), NONCONFORMITY)
+        self.assertEqual(get_mad_conformity(0.001, test='first_two'), CLOSE_CONFORMITY)
+        self.assertIsNone(get_mad_conformity(numpy.nan))
+        # There are no bands for other bases.
+        self.assertIsNone(get_mad_conformity(0.001, base=16))
+        self.assertListEqual(
+            get_mad_conformity([0.001, 0.02]).tolist(), [CLOSE_CONFORMITY, NONCONFORMITY])
+
+    def test_compute_conformity_metrics(self):
+        metrics = compute_conformity_metrics(DIVERGENT_COUNTS)
+        observed = numpy.array(DIVERGENT_COUNTS) / 386
+        probabilities = get_expected_probabilities()
+
+        self.assertEqual(metrics.total, 386)
+        self.assertAlmostEqual(metrics.chisq_statistic, 19.9516, places=4)
+        self.assertAlmostEqual(metrics.mad, numpy.abs(observed - probabilities).mean())
+        self.assertEqual(metrics.conformity, NONCONFORMITY)
+        self.assertAlmostEqual(metrics.ks_statistic, 0.0638, places=4)
+        self.assertAlmostEqual(metrics.ks_critical_value, 1.36 / numpy.sqrt(386))
+        self.assertAlmostEqual(
+            metrics.kl_divergence, numpy.sum(observed * numpy.log(observed / probabilities)))
+        self.assertEqual(metrics.z_statistics.shape, (9,))
+
+        metrics = compute_conformity_metrics(IDEAL_COUNTS)
+        self.assertEqual(metrics.conformity, CLOSE_CONFORMITY)
+        self.assertAlmostEqual(metrics.kl_divergence, 0, places=5)
+
+    def test_count_matrix(self):
+        counts = numpy.array([IDEAL_COUNTS, DIVERGENT_COUNTS, [0] * 9])
+        metrics = compute_conformity_metrics(counts)
+
+        # Each row is evaluated as if it was a count vector.
+        for i in range(2):
+            row = compute_conformity_metrics(counts[i])
+            for name in ('chisq_statistic', 'p_value', 'mad', 'ks_statistic', 'kl_divergence'):
+                self.assertAlmostEqual(getattr(metrics, name)[i], getattr(row, name))
+            numpy.testing.assert_allclose(metrics.z_statistics[i], row.z_statistics)
+
+        self.assertListEqual(
+            metrics.conformity.tolist(), [CLOSE_CONFORMITY, NONCONFORMITY, None])
+        self.assertTrue(numpy.isnan(metrics.mad[2]))
+
+
+class DatasetConformityTest(TestCase):
+    def test_stored_conformity(self):
+        ideal = BenfordAnalyzer(occurences=dict(zip(range(1, 10), IDEAL_COUNTS))).save()
+        divergent = BenfordAnalyzer(occurences=dict(zip(range(1, 10), DIVERGENT_COUNTS))).save()
+        hexadecimal = BenfordAnalyzer(occurences={1: 10}, dataset=Dataset(base=16)).save()
+        empty = BenfordAnalyzer(occurences={}).save()
+
+        self.assertDictEqual(
+            dict(Dataset.objects.values_list('pk', 'conformity')),
+            {ideal.pk: CLOSE_CONFORMITY, divergent.pk: NONCONFORMITY, hexadecimal.pk: '', empty.pk: ''})
+        divergent.refresh_from_db()
+        metrics = compute_conformity_metrics(DIVERGENT_COUNTS)
+        self.assertEqual(divergent.mad, metrics.mad)
+        self.assertEqual(divergent.ks_statistic, metrics.ks_statistic)
+        self.assertEqual(divergent.kl_divergence, metrics.kl_divergence)
+        self.assertIsNone(Dataset.objects.get(pk=empty.pk).mad)
+
+    def test_set_stored_conformity(self):
+        analyzers = [
+            BenfordAnalyzer(occurences=dict(zip(range(1, 10), DIVERGENT_COUNTS))),
+            BenfordAnalyzer(occurences={1: 7, 2: 3, 5: 2, 11: 1}, base=16),
+        ]
+        for analyzer in analyzers:
+            analyzer.save()
+        # Stored before conformity metrics, and compliance with other degrees of freedom.
+        Dataset.objects.update(mad=None, conformity='', ks_statistic=None, kl_divergence=None, is_compliant=None)
+
+        migration = import_module('benford.migrations.0022_dataset_conformity_metrics')
+        migration.set_conformity_metrics(apps, None)
+        for analyzer in analyzers:
+            analyzer.dataset.refresh_from_db()
+            for field, value in analyzer.get_statistics().items():
+                if isinstance(value, float):
+                    self.assertAlmostEqual(getattr(analyzer.dataset, field), value, msg=field)
+                else:
+                    self.assertEqual(getattr(analyzer.dataset, field), value, field)
+
+    def test_analyzer_conformity_metrics(self):
+        analyzer = BenfordAnalyzer.create_from_string('12\n15\n0.3\n987\n1.5\n')
+        self.assertEqual(analyzer.get_conformity_metrics().total, 5)
+        self.assertEqual(analyzer.get_conformity_metrics('first_two').total, 4)
+        self.assertEqual(analyzer.get_conformity_metrics('first_two').z_statistics.shape, (90,))
@@ -1,8 +1,10 @@
 import re
+from unittest import skipUnless
 
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
 from django.test import TransactionTestCase
 from django.test.testcases import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from benford.models import Dataset, SignificantDigit, DatasetRow
 
@@ -53,6 +55,38 @@ class DatasetTest(TestCase):
         self.assertEqual(Dataset.objects.count(), 3)
 
 
+class SignificantDigitManagerTest(TestCase):
+    def test_set_occurences(self):
+        dataset = Dataset.objects.create()
+        SignificantDigit.objects.set_occurences(dataset, {1: 10, 2: 5, 3: 1})
+
+        # Re-saving replaces counts and removes digits that no longer occur.
+        with CaptureQueriesContext(connection) as few_digits:
+            SignificantDigit.objects.set_occurences(dataset, {1: 7, 2: 5, 4: 2})
+        self.assertDictEqual(dataset.get_occurences_summary(), {1: 7, 2: 5, 4: 2})
+
+        # The number of queries doesn't depend on the number of digits.
+        occurences = dict((digit, digit * 10) for digit in (1, 2, 3, 5, 6, 7, 8, 9))
+        with CaptureQueriesContext(connection) as more_digits:
+            SignificantDigit.objects.set_occurences(dataset, occurences)
+        self.assertDictEqual(dataset.get_occurences_summary(), occurences)
+        self.assertEqual(len(more_digits), len(few_digits))
+
+    def test_add_occurences(self):
+        dataset = Dataset.objects.create()
+        SignificantDigit.objects.add_occurences(dataset, {1: 10, 2: 5})
+        SignificantDigit.objects.add_occurences(dataset, {2: 1, 3: 4})
+        self.assertDictEqual(dataset.get_occurences_summary(), {1: 10, 2: 6, 3: 4})
+
+    @skipUnless(connection.vendor == 'postgresql', 'ON CONFLICT upserts are used on PostgreSQL only.')
+    def test_upsert_on_conflict(self):
+        dataset = Dataset.objects.create()
+        SignificantDigit.objects.set_occurences(dataset, {1: 10, 2: 5})
+        with self.assertNumQueries(1):
+            SignificantDigit.objects._upsert(dataset, {2: 1, 3: 4}, increment=True)
+        self.assertDictEqual(dataset.get_occurences_summary(), {1: 10, 2: 6, 3: 4})
+
+
 class DatasetRowTest(TransactionTestCase):
     def test_model(self):
         row = DatasetRow()
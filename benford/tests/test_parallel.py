@@ -0,0 +1,58 @@
+import gc
+import os
+import tempfile
+import warnings
+
+from django.test import SimpleTestCase
+
+from benford.analyzer import BenfordAnalyzer
+from benford.parallel import count_file_in_parallel, split_into_line_aligned_chunks
+
+CENSUS_2009B = 'benford/tests/sample_data/census_2009b'
+
+
+class ParallelAnalysisTest(SimpleTestCase):
+    def test_split_into_line_aligned_chunks(self):
+        chunks = split_into_line_aligned_chunks(CENSUS_2009B, chunk_size=4096)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(chunks[0][0], 0)
+        self.assertEqual(chunks[-1][1], os.path.getsize(CENSUS_2009B))
+
+        with open(CENSUS_2009B, 'rb') as f:
+            for (start, end), (next_start, _) in zip(chunks, chunks[1:]):
+                self.assertEqual(end, next_start)
+                f.seek(end - 1)
+                self.assertEqual(f.read(1), b'\n')
+
+    def test_same_result_as_serial_analysis(self):
+        serial = BenfordAnalyzer.create_from_path(CENSUS_2009B, workers=1, has_header=True)
+        occurences, error_rows, line_count, test_occurences = count_file_in_parallel(
+            CENSUS_2009B, serial.delimiter, serial.relevant_column, has_header=True,
+            workers=2, tests=serial.tests, chunk_size=4096)
+
+        self.assertDictEqual(occurences, serial.occurences)
+        self.assertSetEqual(error_rows, serial.error_rows)
+        self.assertEqual(line_count, serial.line_count)
+        self.assertDictEqual(test_occurences, serial.test_occurences)
+
+        parallel = BenfordAnalyzer.create_from_path(CENSUS_2009B, workers=2, has_header=True)
+        self.assertDictEqual(parallel.occurences, serial.occurences)
+        self.assertSetEqual(parallel.error_rows, serial.error_rows)
+        self.assertDictEqual(parallel.test_occurences, serial.test_occurences)
+        self.assertEqual(parallel.get_chisq_test(), serial.get_chisq_test())
+
+    def test_file_closed(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', ResourceWarning)
+            BenfordAnalyzer.create_from_path(CENSUS_2009B, workers=1, has_header=True)
+            gc.collect()
+        self.assertListEqual([w for w in caught if issubclass(w.category, ResourceWarning)], [])
+
+    def test_quoted_newlines(self):
+        with tempfile.NamedTemporaryFile(suffix='.csv') as f:
+            f.write(b'a\t1\n"b\nc"\t2\nd\t3\n')
+            f.flush()
+            self.assertIsNone(count_file_in_parallel(f.name, '\t', 1, False, workers=2, chunk_size=4))
+
+            analyzer = BenfordAnalyzer.create_from_path(f.name, workers=2, delimiter='\t')
+            self.assertDictEqual(analyzer.occurences, {1: 1, 2: 1, 3: 1})
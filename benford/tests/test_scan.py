@@ -0,0 +1,53 @@
+import tempfile
+
+from django.test import SimpleTestCase
+
+from benford.analyzer import BenfordAnalyzer
+from benford.scan import scan_file
+from benford.tests.test_parallel import CENSUS_2009B
+
+
+def analyze_serially(payload: str, **kwargs):
+    return BenfordAnalyzer.create_from_string(payload, **kwargs)
+
+
+class ScanFileTest(SimpleTestCase):
+    def assertSameAsSerial(self, payload: bytes, window_size=4, **kwargs):
+        serial = analyze_serially(payload.decode('utf-8'), **kwargs)
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(payload)
+            f.flush()
+            result = scan_file(
+                f.name, serial.delimiter, serial.relevant_column, serial.has_header,
+                window_size=window_size, tests=serial.tests)
+        self.assertEqual(
+            result,
+            (serial.occurences, serial.error_rows, serial.line_count, serial.test_occurences))
+
+    def test_census_2009b(self):
+        serial = BenfordAnalyzer.create_from_csv(
+            open(CENSUS_2009B, encoding='utf-8'), has_header=True)
+        for window_size in (1000, 1024 * 1024):
+            result = scan_file(CENSUS_2009B, serial.delimiter, serial.relevant_column, True,
+                               window_size=window_size, tests=serial.tests)
+            self.assertEqual(result, (
+                serial.occurences, serial.error_rows, serial.line_count, serial.test_occurences))
+
+    def test_fields(self):
+        # Missing columns, empty fields and lines, CRLF and no final newline.
+        self.assertSameAsSerial(b'a\t12\nb\t\n\nc\nd\t-0.03\te\r\nf\t9', relevant_column=1)
+        self.assertSameAsSerial(b'12;a\n0.5;b\n;\n', delimiter=';', relevant_column=0)
+        self.assertSameAsSerial(b'name\tvalue\nx\t\xc5\xbe7\n', relevant_column=1, has_header=True)
+        # Values with fewer than two significant digits aren't counted by other tests.
+        self.assertSameAsSerial(b'0.05\n1,234.5\n-20\n7\n00012\n', relevant_column=0)
+
+    def test_quoted_values(self):
+        self.assertSameAsSerial(b'"a\t0"\t7\n"b"\t"8"\n', relevant_column=1, window_size=1024)
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'a\t1\n"b\nc"\t2\n')
+            f.flush()
+            self.assertIsNone(scan_file(f.name, '\t', 1, False))
+
+    def test_empty_file(self):
+        with tempfile.NamedTemporaryFile() as f:
+            self.assertEqual(scan_file(f.name, '\t', 0, False), ({}, set(), 0, {}))
@@ -0,0 +1,139 @@
+import io
+from unittest import mock
+
+from django.test.testcases import TestCase
+
+from benford.loaders import BlockRowLoader
+from benford.models import Dataset, DatasetRow, DatasetRowBlock
+from benford.storage import (
+    encode_block, decode_block, BlockRowPaginator, get_error_row_paginator,
+    get_block_rows, BlockErrorRowPaginator, iter_dataset_rows,
+)
+from benford.tests.test_forms import create_census_2009b_form
+from benford.analyzer import BenfordAnalyzer
+
+
+class BlockStorageTest(TestCase):
+    def setUp(self):
+        self.dataset = Dataset.objects.create(row_storage=Dataset.ROW_STORAGE_BLOCKS)
+
+    def test_encode_block(self):
+        rows = [['a', '1'], [], ['b', '2', 'extra'], ['żółw'], ['c', '3']]
+        self.assertListEqual(decode_block(encode_block(rows)), rows)
+        self.assertListEqual(decode_block(encode_block([])), [])
+
+    def test_loader_and_paginator(self):
+        loader = BlockRowLoader(self.dataset, block_size=4)
+        loader.write([(line, [str(line)]) for line in range(6)], error_rows={2})
+        loader.write([(line, [str(line)]) for line in range(6, 11)], error_rows={2, 9})
+        loader.close()
+
+        # 11 rows in blocks of 4.
+        self.assertListEqual(
+            list(DatasetRowBlock.objects.filter(dataset=self.dataset).order_by(
+                'first_line').values_list('first_line', 'row_count', 'error_lines')),
+            [(0, 4, [2]), (4, 4, []), (8, 3, [9])])
+
+        paginator = BlockRowPaginator(self.dataset, per_page=3)
+        self.assertEqual(paginator.count, 11)
+
+        first = paginator.get_page()
+        self.assertListEqual([(r.line, r.data) for r in first], [(0, ['0']), (1, ['1']), (2, ['2'])])
+        self.assertTrue(first[2].has_error)
+        self.assertFalse(first.has_previous())
+        self.assertTrue(first.has_next())
+
+        # A page spanning two blocks decodes only these blocks.
+        with self.assertNumQueries(1):
+            page = paginator.get_page(after=first.next_cursor)
+            self.assertListEqual([r.line for r in page], [3, 4, 5])
+
+        previous = paginator.get_page(before=page.previous_cursor)
+        self.assertListEqual([r.line for r in previous], [0, 1, 2])
+
+        last = paginator.get_page(last=True)
+        self.assertListEqual([r.line for r in last], [8, 9, 10])
+        self.assertFalse(last.has_next())
+
+        self.assertListEqual([r.line for r in iter_dataset_rows(self.dataset, errors_only=True)], [2, 9])
+
+    def test_error_row_paginator(self):
+        error_rows = {1, 2, 5, 9, 10}
+        loader = BlockRowLoader(self.dataset, block_size=4)
+        loader.write([(line, [str(line)]) for line in range(12)], error_rows=error_rows)
+        loader.close()
+        rows_dataset = Dataset.objects.create(error_count=5)
+        DatasetRow.objects.bulk_create(
+            DatasetRow(dataset=rows_dataset, line=line, data=[str(line)], has_error=line in error_rows)
+            for line in range(12))
+
+        for dataset in (self.dataset, rows_dataset):
+            paginator = get_error_row_paginator(dataset, per_page=2)
+
+            first = paginator.get_page()
+            self.assertListEqual([(r.line, r.data) for r in first], [(1, ['1']), (2, ['2'])])
+            self.assertFalse(first.has_previous())
+            self.assertTrue(first.has_next())
+
+            page = paginator.get_page(after=first.next_cursor)
+            self.assertListEqual([r.line for r in page], [5, 9])
+            self.assertTrue(page.has_previous())
+            self.assertListEqual(
+                [r.line for r in paginator.get_page(after=page.next_cursor)], [10])
+
+            previous = paginator.get_page(before=page.next_cursor)
+            self.assertListEqual([r.line for r in previous], [2, 5])
+            self.assertTrue(previous.has_previous())
+            self.assertTrue(previous.has_next())
+
+            last = paginator.get_page(last=True)
+            self.assertListEqual([r.line for r in last], [9, 10])
+            self.assertFalse(last.has_next())
+
+        # Rows are exported in chunks, with both storages alike.
+        for dataset in (self.dataset, rows_dataset):
+            self.assertListEqual(
+                [r.line for r in iter_dataset_rows(dataset, chunk_size=2)], list(range(12)))
+            self.assertListEqual(
+                [r.line for r in iter_dataset_rows(dataset, errors_only=True, chunk_size=2)],
+                sorted(error_rows))
+
+        # The first page (and the row telling it has a next page) doesn't
+        # need the block of lines 8-11.
+        paginator = get_error_row_paginator(self.dataset, per_page=2)
+        with mock.patch('benford.storage.get_block_rows', wraps=get_block_rows) as decode:
+            paginator.get_page()
+        self.assertEqual(decode.call_count, 2)
+        # The stored error count isn't set on this dataset, so errors are counted.
+        self.assertEqual(BlockErrorRowPaginator(self.dataset, per_page=2).count, 5)
+
+    @mock.patch('benford.loaders.BENFORD_ROW_LOADER', 'blocks')
+    def test_analyzer(self):
+        form = create_census_2009b_form()
+        self.assertTrue(form.is_valid())
+        analyzer = BenfordAnalyzer.create_from_form(form, save=True)
+        dataset = analyzer.dataset
+
+        self.assertEqual(dataset.row_storage, Dataset.ROW_STORAGE_BLOCKS)
+        self.assertEqual(DatasetRow.objects.filter(dataset=dataset).count(), 0)
+        self.assertEqual(BlockRowPaginator(dataset, per_page=100).count, 19510)
+        self.assertListEqual([r.line for r in iter_dataset_rows(dataset, errors_only=True)], [1391, 1392])
+
+    @mock.patch('benford.loaders.BENFORD_ROW_LOADER', 'blocks')
+    def test_append(self):
+        analyzer = BenfordAnalyzer.create_from_string('a\t1\nb\tx\n', save=True)
+        analyzer.append(io.StringIO('c\t2\nd\t\n'))
+
+        dataset = analyzer.dataset
+        self.assertListEqual(
+            list(DatasetRowBlock.objects.filter(dataset=dataset).order_by(
+                'first_line').values_list('first_line', 'row_count', 'error_lines')),
+            [(0, 2, [1]), (2, 2, [3])])
+        self.assertEqual(BlockRowPaginator(dataset, per_page=100).count, 4)
+        self.assertListEqual([r.line for r in iter_dataset_rows(dataset, errors_only=True)], [1, 3])
+
+        # Rows are appended in the dataset's storage whatever the current setting is.
+        with mock.patch('benford.loaders.BENFORD_ROW_LOADER', 'bulk_create'):
+            analyzer.append(io.StringIO('e\t3\n'))
+        self.assertEqual(DatasetRow.objects.filter(dataset=dataset).count(), 0)
+        self.assertEqual(BlockRowPaginator(dataset, per_page=100).count, 5)
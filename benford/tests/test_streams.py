@@ -0,0 +1,32 @@
+import io
+
+from django.test import SimpleTestCase
+
+from benford.analyzer import BenfordAnalyzer
+from benford.streams import ChunkedTextReader
+
+
+class ChunkedTextReaderTest(SimpleTestCase):
+    def test_lines(self):
+        payload = 'a\t1\nżółw\t2\n\nlast\t3'
+        for chunk_size in (1, 2, 3, 5, 1024):
+            reader = ChunkedTextReader(io.BytesIO(payload.encode('utf-8')), chunk_size=chunk_size)
+            self.assertListEqual(list(reader), list(io.StringIO(payload)))
+
+            # We can rewind the stream and read it again.
+            reader.seek(0)
+            self.assertEqual(reader.readline(), 'a\t1\n')
+            # Only the chunks needed for the first line were read.
+            self.assertLess(reader.bytes_read, len('a\t1\n') + chunk_size)
+
+    def test_empty_file(self):
+        reader = ChunkedTextReader(io.BytesIO(b''))
+        self.assertEqual(reader.readline(), '')
+        self.assertListEqual(list(reader), [])
+
+    def test_analyzer(self):
+        payload = 'a\t1\nb\t2\nc\t3\nd\t123\ne\tx'
+        analyzer = BenfordAnalyzer.create_from_file(
+            io.BytesIO(payload.encode('utf-8')), chunk_size=4)
+        self.assertDictEqual(analyzer.occurences, {1: 2, 2: 1, 3: 1})
+        self.assertSetEqual(analyzer.error_rows, {4})
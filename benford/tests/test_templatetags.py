@@ -2,6 +2,7 @@ from django.template import Context, Template
 from django.test import TestCase
 
 from benford.analyzer import BenfordAnalyzer
+from benford.graph import get_graph_digest
 
 
 class TemplateTagsTest(TestCase):
@@ -10,7 +11,6 @@ class TemplateTagsTest(TestCase):
 
     def test_matplotlib_graph(self):
         analyzer = BenfordAnalyzer(occurences={1: 10, 2: 5, 3: 3})
-        analyzer.save()
         context = Context({'analyzer': analyzer})
         template = Template('{% load benford_tags %}{% graph analyzer %}')
         html = template.render(context)
@@ -19,5 +19,17 @@ class TemplateTagsTest(TestCase):
         self.assertIn('<img', html)
         self.assertTrue(html.startswith('<img'))
 
-        # The image should have source in base64 format.
+        # An unsaved dataset has the image source in base64 format.
         self.assertIn('data:image/png;base64,', html)
+
+    def test_graph_url(self):
+        analyzer = BenfordAnalyzer(occurences={1: 10, 2: 5, 3: 3})
+        analyzer.save()
+        context = Context({'analyzer': analyzer})
+        template = Template('{% load benford_tags %}{% graph analyzer %}')
+        html = template.render(context)
+
+        # A saved dataset's graph is served from its own URL, versioned
+        # by the digest of digit counts.
+        self.assertIn(
+            f'src="/dataset/{analyzer.dataset.slug}/graph.png?v={get_graph_digest(analyzer)}"', html)
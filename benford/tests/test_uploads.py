@@ -0,0 +1,126 @@
+import hashlib
+
+from django.test import TestCase
+from django.urls import reverse
+
+from benford.analyzer import BenfordAnalyzer
+from benford.exceptions import ChecksumMismatch, UnexpectedPart, UploadError
+from benford.forms import ChunkedUploadForm
+from benford.models import ChunkedUpload, Dataset
+from benford.storage import iter_dataset_rows
+from benford.uploads import start_upload, receive_part, complete_upload
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ChunkedUploadTest(TestCase):
+    def start(self, **data) -> ChunkedUpload:
+        form = ChunkedUploadForm(data)
+        self.assertTrue(form.is_valid(), form.errors)
+        return start_upload(form)
+
+    def send(self, upload, number, data: bytes) -> ChunkedUpload:
+        return receive_part(upload, number, data, sha256(data))
+
+    def test_upload(self):
+        upload = self.start(title='Parts', has_header=True, relevant_column=1)
+        self.assertFalse(upload.dataset.is_analyzed)
+
+        upload = self.send(upload, 1, b'name;value\na;12\nb;3')
+        # Complete lines are analyzed right away, the last one is kept.
+        self.assertEqual(upload.dataset.line_count, 2)
+        self.assertEqual(bytes(upload.remainder), b'b;3')
+        self.assertEqual((upload.dataset.delimiter, upload.dataset.relevant_column), (';', 1))
+
+        upload = self.send(upload, 2, b'4\nc;x\nd;\xc5\xbe5\n')
+        self.assertEqual(upload.dataset.line_count, 5)
+        self.assertEqual(bytes(upload.remainder), b'')
+        upload = self.send(upload, 3, b'e;67')
+        self.assertEqual(upload.bytes_received, 35)
+
+        upload = complete_upload(upload, part_count=3)
+        dataset = Dataset.objects.get()
+        self.assertTrue(dataset.is_analyzed)
+        self.assertEqual((dataset.line_count, dataset.error_count), (6, 1))
+        self.assertEqual(
+            [row.data for row in iter_dataset_rows(dataset)],
+            [['name', 'value'], ['a', '12'], ['b', '34'], ['c', 'x'], ['d', 'ž5'], ['e', '67']])
+
+        # Same results as the whole file analyzed at once.
+        analyzer = BenfordAnalyzer.create_from_string(
+            'name;value\na;12\nb;34\nc;x\nd;ž5\ne;67', delimiter=';', relevant_column=1, has_header=True)
+        self.assertDictEqual(BenfordAnalyzer.create_from_model(dataset).occurences, analyzer.occurences)
+        self.assertEqual(dataset.chisq_statistic, analyzer.get_statistics()['chisq_statistic'])
+
+    def test_first_column(self):
+        upload = self.start(delimiter=';', relevant_column=0)
+        upload = self.send(upload, 1, b'12;3\n')
+        self.assertEqual(upload.dataset.relevant_column, 0)
+
+        # Later parts are parsed like the first one, even if they start
+        # with an erroneous row.
+        upload = self.send(upload, 2, b'x;5\n7;b\n')
+        complete_upload(upload)
+        dataset = Dataset.objects.get()
+        self.assertEqual(dataset.relevant_column, 0)
+        self.assertDictEqual(dataset.get_occurences_summary(), {1: 1, 7: 1})
+        self.assertEqual(dataset.error_count, 1)
+
+    def test_invalid_parts(self):
+        upload = self.start()
+        with self.assertRaises(ChecksumMismatch):
+            receive_part(upload, 1, b'12\n', sha256(b'13\n'))
+        with self.assertRaises(UnexpectedPart):
+            self.send(upload, 2, b'12\n')
+        with self.assertRaises(UploadError):
+            self.send(upload, 1, b'\xff\n')
+
+        # Parts received already may be sent again, but not changed.
+        upload = self.send(upload, 1, b'12\n')
+        upload = self.send(upload, 1, b'12\n')
+        self.assertEqual((upload.next_part, upload.dataset.line_count), (2, 1))
+        with self.assertRaises(UnexpectedPart):
+            self.send(upload, 1, b'13\n')
+
+        with self.assertRaises(UnexpectedPart):
+            complete_upload(upload, part_count=2)
+        complete_upload(upload)
+        with self.assertRaises(UnexpectedPart):
+            self.send(upload, 2, b'3\n')
+
+    def test_api(self):
+        response = self.client.post(
+            reverse('benford:api_uploads'), {'relevant_column': 32768}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('relevant_column', response.json()['errors'])
+
+        response = self.client.post(
+            reverse('benford:api_uploads'), {'title': 'API', 'delimiter': ','}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        url = response['Location']
+        slug = response.json()['slug']
+
+        def put_part(number, data, checksum=None):
+            return self.client.put(
+                reverse('benford:api_upload_part', kwargs={'slug': slug, 'number': number}), data,
+                content_type='application/octet-stream', HTTP_X_CONTENT_SHA256=checksum or sha256(data))
+
+        self.assertEqual(put_part(1, b'a,12\nb,').status_code, 200)
+        self.assertEqual(put_part(1, b'a,12\nb,', checksum=sha256(b'')).status_code, 400)
+        self.assertEqual(put_part(3, b'3\n').status_code, 409)
+
+        response = self.client.get(url)
+        self.assertEqual(response.json()['next_part'], 2)
+        response = self.client.get(reverse('benford:api_dataset', kwargs={'slug': slug}))
+        self.assertEqual(response.json()['status'], 'uploading')
+
+        self.assertEqual(put_part(2, b'3\n').status_code, 200)
+        response = self.client.post(
+            reverse('benford:api_upload_complete', kwargs={'slug': slug}), {'part_count': 2},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['status'], 'done')
+        self.assertEqual(data['statistics']['total_occurences'], 2)
@@ -1,11 +1,24 @@
+import io
+import json
 import re
+import tempfile
+from unittest import mock
 
-from django.http import HttpResponseRedirect
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.http import HttpResponseRedirect, Http404
 from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.test.testcases import TestCase
 
-from benford.models import Dataset
-from benford.views import DatasetUploadView, DatasetDetailView, DashboardView
+from benford.analyzer import BenfordAnalyzer
+from benford.graph import get_graph_cache_name, get_graph_digest
+from benford.models import Dataset, AnalysisJob
+from benford.views import (
+    DatasetUploadView, DatasetDetailView, DashboardView, DatasetGraphView, DatasetRowListView,
+    DatasetAppendView, DatasetErrorRowListView,
+)
 
 
 class ViewsTest(TestCase):
@@ -17,6 +30,24 @@ class ViewsTest(TestCase):
         context_data = view.get_context_data()
         self.assertIn('page_obj', context_data)
 
+    def test_dashboard_queries(self):
+        def get_query_count(dataset_count):
+            for i in range(dataset_count):
+                BenfordAnalyzer.create_from_string('12\n3\nx\n', save=True)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('benford:dashboard'), {'page': 2})
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        # Rendering a page doesn't query anything per dataset.
+        self.assertEqual(get_query_count(15), get_query_count(20))
+
+        response = self.client.get(reverse('benford:dashboard'))
+        dataset = response.context['object_list'][0]
+        self.assertEqual((dataset.line_count, dataset.error_count), (3, 1))
+        self.assertEqual(dataset.conformity, 'nonconformity')
+        self.assertContains(response, 'MAD: nonconformity')
+
     def test_upload_view(self):
         request = RequestFactory().post('/upload/', data={
             'data_raw': '1',
@@ -28,6 +59,24 @@ class ViewsTest(TestCase):
         self.assertIsNotNone(re.match(r'[a-z]{10}', view.object.slug))
         self.assertIsInstance(response, HttpResponseRedirect)
 
+    def test_async_upload_view(self):
+        request = RequestFactory().post('/upload/', data={
+            'data_raw': '1',
+        })
+        view = DatasetUploadView()
+        view.async_analysis = True
+        view.setup(request)
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            response = view.dispatch(request)
+        self.assertIsInstance(response, HttpResponseRedirect)
+
+        # The analysis is queued and the dataset is displayed as pending.
+        job = view.object.analysis_job
+        self.assertEqual(job.status, AnalysisJob.STATUS_PENDING)
+        request = RequestFactory().get(view.object.get_absolute_url())
+        response = DatasetDetailView.as_view()(request, slug=view.object.slug)
+        self.assertContains(response, 'id="analysis-status"')
+
     def test_detail_view(self):
         self.assertEqual(Dataset.objects.count(), 0)
         Dataset.objects.create(title='My title', slug='abcdefghij')
@@ -42,3 +91,137 @@ class ViewsTest(TestCase):
         self.assertEqual(context['title'], 'My title')
 
         self.assertIn('significant_digits', context)
+
+    def test_detail_view_statistics(self):
+        analyzer = BenfordAnalyzer(occurences={1: 10, 2: 5, 3: 3})
+        dataset = analyzer.save()
+        request = RequestFactory().get(dataset.get_absolute_url())
+
+        # The dataset page doesn't compute any statistics.
+        with mock.patch.object(BenfordAnalyzer, 'get_chisq_test') as get_chisq_test:
+            response = DatasetDetailView.as_view()(request, slug=dataset.slug)
+            response.render()
+        get_chisq_test.assert_not_called()
+        self.assertContains(response, 'The chi-squared test statistic')
+
+    def test_graph_view(self):
+        analyzer = BenfordAnalyzer(occurences={1: 10, 2: 5, 3: 3})
+        dataset = analyzer.save()
+        view = DatasetGraphView.as_view()
+
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            response = view(RequestFactory().get('/'), slug=dataset.slug, graph_format='png')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'image/png')
+            self.assertTrue(response.content.startswith(b'\x89PNG'))
+            self.assertIn('max-age', response['Cache-Control'])
+
+            # The image is cached.
+            cache_name = get_graph_cache_name(dataset, get_graph_digest(analyzer))
+            self.assertTrue(default_storage.exists(cache_name))
+
+            # Clients with an up to date image get "Not Modified".
+            response = view(
+                RequestFactory().get('/', HTTP_IF_NONE_MATCH=response['ETag']),
+                slug=dataset.slug, graph_format='png')
+            self.assertEqual(response.status_code, 304)
+
+            # The browser can draw the graph itself.
+            response = view(RequestFactory().get('/'), slug=dataset.slug, graph_format='svg')
+            self.assertEqual(response['Content-Type'], 'image/svg+xml')
+            response = view(RequestFactory().get('/'), slug=dataset.slug, graph_format='json')
+            self.assertEqual(response['Content-Type'], 'application/json')
+
+            # The graph of changed digit counts replaces the obsolete image.
+            analyzer.append(io.StringIO('4\n'))
+            view(RequestFactory().get('/'), slug=dataset.slug, graph_format='png')
+            self.assertFalse(default_storage.exists(cache_name))
+            self.assertTrue(default_storage.exists(get_graph_cache_name(dataset, get_graph_digest(analyzer))))
+
+    def test_append_view(self):
+        dataset = BenfordAnalyzer.create_from_string('a\t1\nb\t2\n', save=True).dataset
+        view = DatasetAppendView.as_view()
+
+        response = view(RequestFactory().get('/'), slug=dataset.slug)
+        self.assertContains(response, 'Append rows to Untitled dataset')
+        self.assertNotContains(response, 'name="relevant_column"')
+
+        response = view(RequestFactory().post('/', {'data_raw': 'c\t3\nd\t1'}), slug=dataset.slug)
+        self.assertIsInstance(response, HttpResponseRedirect)
+        dataset.refresh_from_db()
+        self.assertEqual(dataset.line_count, 4)
+        self.assertDictEqual(dataset.get_occurences_summary(), {1: 2, 2: 1, 3: 1})
+
+        # Datasets still being analyzed can't be appended to.
+        AnalysisJob.objects.create(dataset=dataset)
+        response = view(RequestFactory().post('/', {'data_raw': '4'}), slug=dataset.slug)
+        self.assertContains(response, 'The dataset is still being analyzed.')
+
+    def test_other_base(self):
+        request = RequestFactory().post('/upload/', data={'data_raw': '255\n7\n16', 'base': 16})
+        view = DatasetUploadView()
+        view.setup(request)
+        view.dispatch(request)
+        dataset = view.object
+        self.assertEqual(dataset.base, 16)
+        self.assertDictEqual(dataset.get_occurences_summary(), {15: 1, 7: 1, 1: 1})
+
+        response = DatasetDetailView.as_view()(RequestFactory().get('/'), slug=dataset.slug)
+        self.assertContains(response, 'Digit (base 16)')
+        response = DatasetGraphView.as_view()(
+            RequestFactory().get('/'), slug=dataset.slug, graph_format='json')
+        self.assertEqual(len(json.loads(response.content)['data']['values']), 15)
+
+    def test_row_list_view(self):
+        analyzer = BenfordAnalyzer.create_from_string('\n'.join(map(str, range(1, 251))))
+        dataset = analyzer.save()
+        view = DatasetRowListView.as_view()
+
+        response = view(RequestFactory().get('/'), slug=dataset.slug)
+        self.assertListEqual([row.line for row in response.context_data['page_obj']], list(range(100)))
+
+        # The stored line count is used, rows aren't counted.
+        with self.assertNumQueries(2):
+            response = view(RequestFactory().get('/', {'after': 199}), slug=dataset.slug)
+            response.render()
+        self.assertEqual(response.context_data['paginator'].count, 250)
+        self.assertListEqual([row.line for row in response.context_data['page_obj']], list(range(200, 250)))
+        self.assertContains(response, '?before=200')
+
+        with self.assertRaises(Http404):
+            view(RequestFactory().get('/', {'after': 'abc'}), slug=dataset.slug)
+
+    def test_download(self):
+        dataset = BenfordAnalyzer.create_from_string('a;12\nb;x\nc;3\n', delimiter=';', save=True).dataset
+        url = reverse('benford:download_dataset', kwargs={'slug': dataset.slug})
+
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="{dataset.slug}.csv"')
+        self.assertEqual(b''.join(response.streaming_content), b'a;12\nb;x\nc;3\n')
+
+        response = self.client.get(url, {'errors': ''})
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="{dataset.slug}-errors.csv"')
+        self.assertEqual(b''.join(response.streaming_content), b'b;x\n')
+
+        response = self.client.get(reverse('benford:dataset_error_rows', kwargs={'slug': dataset.slug}))
+        self.assertContains(response, f'{url}?errors')
+
+    def test_error_rows(self):
+        values = ['x' if line % 2 else str(line + 1) for line in range(50)]
+        dataset = BenfordAnalyzer.create_from_string('\n'.join(values), save=True).dataset
+        self.assertEqual(dataset.error_count, 25)
+
+        # The detail page shows the stored count and the first erroneous rows only.
+        response = self.client.get(dataset.get_absolute_url())
+        rows = response.context['dataset_rows']
+        self.assertListEqual([row.line for row in rows], list(range(1, 20, 2)))
+        self.assertContains(response, 'There were 25 rows')
+        self.assertContains(
+            response, reverse('benford:dataset_error_rows', kwargs={'slug': dataset.slug}) + '?after=19')
+
+        view = DatasetErrorRowListView.as_view()
+        response = view(RequestFactory().get('/', {'after': 19}), slug=dataset.slug)
+        self.assertListEqual(
+            [row.line for row in response.context_data['page_obj']], list(range(21, 50, 2)))
+        self.assertContains(response, 'Erroneous rows')
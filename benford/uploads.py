@@ -0,0 +1,116 @@
+"""
+Chunked, resumable uploads of large files. A file is sent in numbered
+parts, each with its SHA-256 checksum. The complete lines of a part are
+analyzed as soon as it's received, so little work is left when the last
+part arrives. Parts must be sent in order; a part that was already
+received may be sent again (e.g. when its response was lost).
+"""
+import hashlib
+import io
+
+from django.db import transaction
+from django.forms import Form
+from django.utils import timezone
+from pydash import get
+
+from benford.analyzer import BenfordAnalyzer
+from benford.conf import DEFAULT_BASE
+from benford.exceptions import UploadError, ChecksumMismatch, UnexpectedPart
+from benford.models import ChunkedUpload, Dataset
+
+
+def start_upload(form: Form) -> ChunkedUpload:
+    """
+    Creates the dataset and its upload from a valid `ChunkedUploadForm`.
+    """
+    with transaction.atomic():
+        dataset = Dataset.objects.create(
+            title=form.cleaned_data['title'],
+            base=get(form.cleaned_data, 'base') or DEFAULT_BASE)
+        return ChunkedUpload.objects.create(
+            dataset=dataset,
+            delimiter=get(form.cleaned_data, 'delimiter') or '',
+            relevant_column=get(form.cleaned_data, 'relevant_column'),
+            has_header=get(form.cleaned_data, 'has_header', False))
+
+
+def receive_part(upload: ChunkedUpload, number: int, data: bytes, checksum: str) -> ChunkedUpload:
+    """
+    Verifies and analyzes part `number` of the upload. The last line of
+    the part is kept until the next part, unless it's complete.
+
+    :raise ChecksumMismatch: If `checksum` isn't the SHA-256 of `data`.
+    :raise UnexpectedPart: If the part is out of order, or a different
+        part with the same number was received already.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    if digest != checksum.lower():
+        raise ChecksumMismatch('The checksum of the part does not match.')
+
+    with transaction.atomic():
+        # Parts of the same upload are received one at a time.
+        upload = ChunkedUpload.objects.select_for_update().select_related('dataset').get(pk=upload.pk)
+        if number < 1:
+            raise UnexpectedPart('Parts are numbered from 1.')
+        if number < upload.next_part:
+            if upload.checksums[number - 1] != digest:
+                raise UnexpectedPart(f'A different part {number} was received already.')
+            return upload
+        if upload.is_complete:
+            raise UnexpectedPart('The upload is complete.')
+        if number > upload.next_part:
+            raise UnexpectedPart(f'Expected part {upload.next_part}.')
+
+        lines, separator, remainder = (bytes(upload.remainder) + data).rpartition(b'\n')
+        _analyze_lines(upload, lines + separator)
+        upload.remainder = remainder
+        upload.checksums.append(digest)
+        upload.bytes_received += len(data)
+        upload.save(update_fields=['remainder', 'checksums', 'bytes_received'])
+    return upload
+
+
+def complete_upload(upload: ChunkedUpload, part_count: int = None) -> ChunkedUpload:
+    """
+    Analyzes the last line of the upload and marks it as complete.
+
+    :raise UnexpectedPart: If `part_count` is given and other than the
+        number of received parts.
+    """
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().select_related('dataset').get(pk=upload.pk)
+        if upload.is_complete:
+            return upload
+        if part_count is not None and part_count != len(upload.checksums):
+            raise UnexpectedPart(f'Received {len(upload.checksums)} parts, not {part_count}.')
+
+        _analyze_lines(upload, bytes(upload.remainder))
+        upload.remainder = b''
+        upload.completed_at = timezone.now()
+        upload.save(update_fields=['remainder', 'completed_at'])
+    return upload
+
+
+def _analyze_lines(upload: ChunkedUpload, data: bytes) -> None:
+    if not data:
+        return
+    try:
+        # Parts are split at line ends, so no character is split.
+        text = data.decode('utf-8')
+    except UnicodeDecodeError:
+        raise UploadError('The part is not valid UTF-8 text.')
+
+    dataset = upload.dataset
+    if not dataset.line_count:
+        # The first lines are parsed as a new input: the delimiter and the
+        # relevant column are detected from them and stored on the dataset.
+        BenfordAnalyzer.open_csv(
+            io.StringIO(text),
+            delimiter=upload.delimiter or None,
+            relevant_column=upload.relevant_column,
+            has_header=upload.has_header,
+            dataset=dataset,
+        ).save(atomic=False)
+    else:
+        BenfordAnalyzer.create_from_model(dataset).append(io.StringIO(text))
+        dataset.refresh_from_db()
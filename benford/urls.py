@@ -1,12 +1,39 @@
-from django.urls import path
+from django.urls import path, re_path
 
-from benford.views import DashboardView, DatasetUploadView, DatasetDetailView, DatasetRowListView
+from benford import async_views
+from benford.api import (
+    DatasetCollectionApiView, DatasetApiView, DatasetRowsApiView,
+    UploadCollectionApiView, UploadApiView, UploadPartApiView, UploadCompleteApiView,
+)
+from benford.conf import BENFORD_ASYNC_VIEWS
+from benford.views import (
+    DashboardView, DatasetUploadView, DatasetDetailView, DatasetRowListView, DatasetGraphView,
+    DatasetAppendView, DatasetErrorRowListView, DatasetDownloadView,
+)
+
+if BENFORD_ASYNC_VIEWS:
+    upload_view = async_views.upload_dataset
+else:
+    upload_view = DatasetUploadView.as_view()
 
 urlpatterns = [
     path('', DashboardView.as_view(), name='dashboard'),
-    path('upload/', DatasetUploadView.as_view(), name='upload_dataset'),
+    path('upload/', upload_view, name='upload_dataset'),
     path('dataset/<slug:slug>/', DatasetDetailView.as_view(), name='dataset_detail'),
+    re_path(r'^dataset/(?P<slug>[-\w]+)/graph\.(?P<graph_format>png|svg|json)$',
+            DatasetGraphView.as_view(), name='dataset_graph'),
     path('dataset/<slug:slug>/browse/', DatasetRowListView.as_view(), name='dataset_rows'),
+    path('dataset/<slug:slug>/errors/', DatasetErrorRowListView.as_view(), name='dataset_error_rows'),
+    path('dataset/<slug:slug>/download/', DatasetDownloadView.as_view(), name='download_dataset'),
+    path('dataset/<slug:slug>/append/', DatasetAppendView.as_view(), name='append_dataset'),
+    path('api/datasets/', DatasetCollectionApiView.as_view(), name='api_datasets'),
+    path('api/datasets/<slug:slug>/', DatasetApiView.as_view(), name='api_dataset'),
+    re_path(r'^api/datasets/(?P<slug>[-\w]+)/rows\.(?P<export_format>ndjson|csv)$',
+            DatasetRowsApiView.as_view(), name='api_dataset_rows'),
+    path('api/uploads/', UploadCollectionApiView.as_view(), name='api_uploads'),
+    path('api/uploads/<slug:slug>/', UploadApiView.as_view(), name='api_upload'),
+    path('api/uploads/<slug:slug>/parts/<int:number>/', UploadPartApiView.as_view(), name='api_upload_part'),
+    path('api/uploads/<slug:slug>/complete/', UploadCompleteApiView.as_view(), name='api_upload_complete'),
 ]
 
 app_name = 'benford'
@@ -1,4 +1,5 @@
 import decimal
+import itertools
 import random
 import string
 from decimal import Decimal
@@ -23,3 +24,15 @@ def calc_percentage(value, total, decimal_places: int = 1) -> Decimal:
 def generate_random_identifier(length=10):
     letters_and_digits = string.ascii_lowercase
     return ''.join((random.choice(letters_and_digits) for i in range(length)))
+
+
+def iter_batches(iterable, size: int):
+    """
+    Splits `iterable` into lists of at most `size` items.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
@@ -1,42 +1,91 @@
-from django.shortcuts import redirect
-from django.views.generic import FormView, DetailView, ListView
+from django.http import HttpResponse, Http404, StreamingHttpResponse
+from django.shortcuts import redirect, get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.generic import FormView, DetailView, ListView, View
 
 from benford.analyzer import BenfordAnalyzer
-from benford.forms import DatasetUploadForm
+from benford.conf import BENFORD_ASYNC_ANALYSIS, BENFORD_GRAPH_MAX_AGE
+from benford.export import iter_csv
+from benford.forms import DatasetUploadForm, DatasetAppendForm
+from benford.graph import get_graph_digest, render_graph, GRAPH_FORMATS
+from benford.jobs import enqueue_analysis
+from benford.storage import BlockRowPaginator, get_error_row_paginator, iter_dataset_rows
 from benford.models import Dataset, DatasetRow
+from pagination.keyset import KeysetPaginationMixin
 
 
 class DashboardView(ListView):
+    """
+    Lists datasets with their stored results. A page is rendered with
+    a constant number of queries and nothing is computed again.
+    """
     template_name = 'benford/dashboard.html'
-    queryset = Dataset.objects.all()
+    queryset = Dataset.objects.select_related('analysis_job', 'chunked_upload').defer('test_occurences')
     paginate_by = 10
 
 
 class DatasetUploadView(FormView):
     template_name = 'benford/form.html'
     form_class = DatasetUploadForm
+    async_analysis = BENFORD_ASYNC_ANALYSIS
 
     def __init__(self, *args, **kwargs):
         self.object = None
         super(DatasetUploadView, self).__init__(*args, **kwargs)
 
     def create_dataset(self, form):
-        benford_analyzer = BenfordAnalyzer.create_from_form(form)
-        self.object = benford_analyzer.save()
+        if self.async_analysis:
+            self.object = enqueue_analysis(form).dataset
+        else:
+            benford_analyzer = BenfordAnalyzer.create_from_form(form, save=True)
+            self.object = benford_analyzer.dataset
 
     def form_valid(self, form):
         self.create_dataset(form)
         return redirect('benford:dataset_detail', slug=self.object.slug)
 
 
+class DatasetAppendView(FormView):
+    """
+    Appends rows to an analyzed dataset. Only the new rows are parsed,
+    so this is cheap even for large datasets.
+    """
+    template_name = 'benford/form.html'
+    form_class = DatasetAppendForm
+    dataset = None
+
+    def dispatch(self, request, *args, **kwargs):
+        self.dataset = get_object_or_404(Dataset, slug=kwargs['slug'])
+        return super(DatasetAppendView, self).dispatch(request, *args, **kwargs)
+
+    def form_valid(self, form):
+        if not self.dataset.is_analyzed:
+            form.add_error(None, 'The dataset is still being analyzed.')
+            return self.form_invalid(form)
+        BenfordAnalyzer.create_from_model(self.dataset).append_from_form(form)
+        return redirect('benford:dataset_detail', slug=self.dataset.slug)
+
+    def get_context_data(self, **kwargs):
+        ctx = super(DatasetAppendView, self).get_context_data(**kwargs)
+        ctx['title'] = f'Append: {self.dataset.display_title()}'
+        ctx['heading'] = f'Append rows to {self.dataset.display_title()}'
+        return ctx
+
+
 class DatasetDetailView(DetailView):
     template_name = 'benford/dataset/detail.html'
     model = Dataset
     analyzer: BenfordAnalyzer = None
+    # Only the first erroneous rows are shown, see `DatasetErrorRowListView`.
+    error_rows_per_page = 10
 
     def get_object(self, queryset=None):
         obj = super(DatasetDetailView, self).get_object(queryset=queryset)
         self.analyzer = BenfordAnalyzer.create_from_model(obj)
+        if not obj.has_statistics and obj.is_analyzed:
+            # Datasets saved before analysis results were stored.
+            self.analyzer.save_statistics()
         return obj
 
     def get_context_data(self, **kwargs):
@@ -45,27 +94,85 @@ class DatasetDetailView(DetailView):
         ctx['title'] = self.object.title
         ctx['significant_digits'] = self.object.significant_digits.all().order_by('digit')
         ctx['analyzer'] = self.analyzer
+        ctx['analysis_job'] = self.object.get_analysis_job()
         ctx['dataset_rows'] = self.get_erroneous_dataset_rows()
         return ctx
 
     def get_erroneous_dataset_rows(self):
-        return DatasetRow.objects.filter(
-            dataset=self.analyzer.dataset, has_error=True,
-        ).order_by('line')
-
-
-class DatasetRowListView(ListView):
+        dataset = self.analyzer.dataset
+        if not dataset.error_count or not dataset.has_rows:
+            return None
+        return get_error_row_paginator(dataset, self.error_rows_per_page).get_page()
+
+
+class DatasetGraphView(View):
+    """
+    Serves the graph of a dataset as a (cached) PNG image, an SVG image or
+    a Vega-Lite JSON specification. The digest of digit counts is used as
+    ETag, so unchanged graphs aren't sent again.
+    """
+
+    def get(self, request, slug, graph_format='png'):
+        dataset = get_object_or_404(Dataset, slug=slug)
+        analyzer = BenfordAnalyzer.create_from_model(dataset)
+        etag = quote_etag(f'{get_graph_digest(analyzer)}-{graph_format}')
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(
+                render_graph(analyzer, graph_format),
+                content_type=GRAPH_FORMATS[graph_format])
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=BENFORD_GRAPH_MAX_AGE)
+        return response
+
+
+class DatasetDownloadView(View):
+    """
+    Downloads rows (or only erroneous rows with `?errors`) of a dataset as
+    CSV with its stored delimiter. Rows are streamed as they are fetched,
+    so large datasets aren't loaded into memory.
+    """
+
+    def get(self, request, slug):
+        dataset = get_object_or_404(Dataset, slug=slug)
+        if not dataset.is_analyzed:
+            raise Http404('The dataset is still being analyzed.')
+        if not dataset.has_rows:
+            raise Http404('Rows of the dataset are not stored.')
+        errors_only = 'errors' in request.GET
+        response = StreamingHttpResponse(
+            iter_csv(iter_dataset_rows(dataset, errors_only=errors_only), dataset.delimiter),
+            content_type='text/csv')
+        filename = f'{dataset.slug}-errors.csv' if errors_only else f'{dataset.slug}.csv'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class DatasetRowListView(KeysetPaginationMixin, ListView):
     paginate_by = 100
+    keyset_key = 'line'
     template_name = 'benford/dataset/browse_data.html'
     dataset = None
 
     def get(self, *args, **kwargs):
-        self.dataset = Dataset.objects.get(slug=self.get_slug())
+        self.dataset = get_object_or_404(Dataset, slug=self.get_slug())
+        if not self.dataset.has_rows:
+            raise Http404('Rows of the dataset are not stored.')
         return super(DatasetRowListView, self).get(*args, **kwargs)
 
     def get_queryset(self):
         return DatasetRow.objects.filter(dataset=self.dataset).order_by('line')
 
+    def get_keyset_count(self):
+        # Stored, so pages don't count the rows.
+        return self.dataset.line_count
+
+    def get_keyset_paginator(self, queryset, page_size):
+        if self.dataset.row_storage == Dataset.ROW_STORAGE_BLOCKS:
+            return BlockRowPaginator(self.dataset, page_size, count=self.get_keyset_count())
+        return super(DatasetRowListView, self).get_keyset_paginator(queryset, page_size)
+
     def get_context_data(self, *args, **kwargs):
         ctx = super(DatasetRowListView, self).get_context_data(*args, **kwargs)
         ctx['title'] = self.get_view_title()
@@ -78,3 +185,24 @@ class DatasetRowListView(ListView):
 
     def get_view_title(self):
         return f'Browse: {self.dataset.display_title()}'
+
+
+class DatasetErrorRowListView(DatasetRowListView):
+    """
+    Erroneous rows of a dataset, paged by line.
+    """
+
+    def get_queryset(self):
+        return DatasetRow.objects.filter(dataset=self.dataset, has_error=True)
+
+    def get_keyset_paginator(self, queryset, page_size):
+        return get_error_row_paginator(self.dataset, page_size)
+
+    def get_context_data(self, *args, **kwargs):
+        ctx = super(DatasetErrorRowListView, self).get_context_data(*args, **kwargs)
+        ctx['heading'] = 'Erroneous rows'
+        ctx['download_errors'] = True
+        return ctx
+
+    def get_view_title(self):
+        return f'Errors: {self.dataset.display_title()}'
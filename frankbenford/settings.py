@@ -88,6 +88,17 @@ DATABASES = {
     },
 }
 
+# Dataset rows loader: `auto`, `copy` (PostgreSQL COPY), `bulk_create`
+# or `blocks` (compressed blocks of rows).
+BENFORD_ROW_LOADER = os.getenv('BENFORD_ROW_LOADER', 'auto')
+
+# Analyze uploads in background workers (`python manage.py benford_worker`).
+BENFORD_ASYNC_ANALYSIS = bool(os.getenv('BENFORD_ASYNC_ANALYSIS', False))
+
+# Async upload, detail and browsing views, when served by an ASGI server
+# (`uvicorn frankbenford.asgi:application`).
+BENFORD_ASYNC_VIEWS = bool(os.getenv('BENFORD_ASYNC_VIEWS', False))
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -124,6 +135,8 @@ USE_TZ = True
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'static_root/')
 STATIC_URL = '/static/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
+MEDIA_URL = '/media/'
 SASS_PRECISION = 8
 SASS_PROCESSOR_INCLUDE_FILE_PATTERN = r'^.+\.scss$'
 
@@ -1,3 +1,6 @@
 from django.conf import settings
 
 PAGINATION_DEFAULT_OFFSET = getattr(settings, 'PAGINATION_DEFAULT_OFFSET', 3)
+
+# Planner estimates up to this number of rows are replaced with exact counts.
+PAGINATION_KEYSET_EXACT_COUNT_LIMIT = getattr(settings, 'PAGINATION_KEYSET_EXACT_COUNT_LIMIT', 10000)
@@ -0,0 +1,161 @@
+import json
+import math
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import QuerySet
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from pagination.conf import PAGINATION_KEYSET_EXACT_COUNT_LIMIT
+
+
+def estimate_count(queryset: QuerySet) -> int:
+    """
+    Approximate number of rows of a queryset. On PostgreSQL it's taken from
+    the query planner statistics, so no rows are counted. Other backends
+    get an exact `COUNT(*)`.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimate = plan[0]['Plan']['Plan Rows']
+
+    # Estimates of small tables can be way off, but these are cheap to count.
+    if estimate <= PAGINATION_KEYSET_EXACT_COUNT_LIMIT:
+        return queryset.count()
+    return estimate
+
+
+class KeysetPage:
+    """
+    A page of objects returned by `KeysetPaginator`. Neighbouring pages are
+    addressed by cursors (key values of the first and last object) instead
+    of page numbers.
+    """
+
+    def __init__(self, object_list: list, paginator, has_previous: bool, has_next: bool):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __repr__(self):
+        return f'<KeysetPage {self.previous_cursor}..{self.next_cursor}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_other_pages(self) -> bool:
+        return self.has_previous() or self.has_next()
+
+    @property
+    def previous_cursor(self):
+        return self.paginator.get_key(self.object_list[0]) if self.object_list else None
+
+    @property
+    def next_cursor(self):
+        return self.paginator.get_key(self.object_list[-1]) if self.object_list else None
+
+
+class KeysetPaginator:
+    """
+    Paginates a queryset by seeking on a unique, indexed `key` field
+    (`WHERE key > cursor ORDER BY key LIMIT n`) instead of `OFFSET`, so deep
+    pages cost the same as the first one. The total `count` is approximate
+    (see `estimate_count`) unless it's given.
+    """
+
+    def __init__(self, queryset: QuerySet, per_page: int, key: str = 'pk', count: int = None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.key = key
+        self._count = count
+
+    @cached_property
+    def count(self) -> int:
+        if self._count is not None:
+            return self._count
+        return estimate_count(self.queryset)
+
+    @property
+    def num_pages(self) -> int:
+        return max(1, math.ceil(self.count / self.per_page))
+
+    def get_key(self, obj):
+        return getattr(obj, self.key)
+
+    def get_page(self, after=None, before=None, last: bool = False) -> KeysetPage:
+        """
+        Returns the page following the `after` cursor, preceding the
+        `before` cursor, the last page or (by default) the first page.
+        """
+        if before is not None or last:
+            queryset = self.queryset.order_by(f'-{self.key}')
+            if before is not None:
+                queryset = queryset.filter(**{f'{self.key}__lt': before})
+            objects = list(queryset[:self.per_page + 1])
+            has_more = len(objects) > self.per_page
+            return KeysetPage(
+                list(reversed(objects[:self.per_page])), self,
+                has_previous=has_more, has_next=before is not None)
+
+        queryset = self.queryset.order_by(self.key)
+        if after is not None:
+            queryset = queryset.filter(**{f'{self.key}__gt': after})
+        objects = list(queryset[:self.per_page + 1])
+        has_more = len(objects) > self.per_page
+        return KeysetPage(
+            objects[:self.per_page], self,
+            has_previous=after is not None, has_next=has_more)
+
+
+class KeysetPaginationMixin:
+    """
+    `MultipleObjectMixin` (e.g. `ListView`) extension that paginates with
+    `KeysetPaginator`. Pages are selected with `after`, `before` and `last`
+    query parameters.
+    """
+    keyset_key = 'pk'
+
+    def get_keyset_count(self):
+        """
+        Total count of objects if known (e.g. a cached counter), otherwise
+        it's estimated.
+        """
+        return None
+
+    def get_keyset_paginator(self, queryset, page_size) -> KeysetPaginator:
+        return KeysetPaginator(
+            queryset, page_size, key=self.keyset_key, count=self.get_keyset_count())
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.get_keyset_paginator(queryset, page_size)
+        params = self.request.GET
+        try:
+            page = paginator.get_page(
+                after=params.get('after') or None,
+                before=params.get('before') or None,
+                last='last' in params)
+        except (ValueError, ValidationError):
+            raise Http404('Invalid page cursor.')
+        return paginator, page, page.object_list, page.has_other_pages()
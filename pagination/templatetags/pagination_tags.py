@@ -2,6 +2,7 @@ from django import template
 from django.core.paginator import Paginator, Page
 
 from pagination.conf import PAGINATION_DEFAULT_OFFSET
+from pagination.keyset import KeysetPaginator
 
 register = template.Library()
 
@@ -15,6 +16,12 @@ def get_page_number_range(page_number: int, page_max: int, offset: int = None):
 
 @register.inclusion_tag('pagination/templatetags/pagination.html')
 def pagination(paginator: Paginator, page_obj: Page, offset: int = None):
+    if isinstance(paginator, KeysetPaginator):
+        return {
+            'paginator': paginator,
+            'page_obj': page_obj,
+            'keyset': True,
+        }
     return {
         'paginator': paginator,
         'page_obj': page_obj,
@@ -1,7 +1,9 @@
+from django.contrib.auth.models import Permission
 from django.core.paginator import Paginator
 from django.template import Context, Template
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
 
+from pagination.keyset import KeysetPaginator
 from pagination.templatetags.pagination_tags import get_page_number_range
 
 
@@ -38,3 +40,51 @@ class PaginationTest(SimpleTestCase):
         html = t.render(context)
 
         self.assertIn('<nav class="nav-pagination">', html)
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.queryset = Permission.objects.all()
+        self.pks = list(self.queryset.order_by('pk').values_list('pk', flat=True))
+        self.paginator = KeysetPaginator(self.queryset, per_page=5)
+
+    def test_pages(self):
+        self.assertEqual(self.paginator.count, len(self.pks))
+
+        first = self.paginator.get_page()
+        self.assertListEqual([p.pk for p in first], self.pks[:5])
+        self.assertFalse(first.has_previous())
+        self.assertTrue(first.has_next())
+
+        second = self.paginator.get_page(after=first.next_cursor)
+        self.assertListEqual([p.pk for p in second], self.pks[5:10])
+        self.assertTrue(second.has_previous())
+
+        # We can go back.
+        previous = self.paginator.get_page(before=second.previous_cursor)
+        self.assertListEqual([p.pk for p in previous], self.pks[:5])
+        self.assertFalse(previous.has_previous())
+        self.assertTrue(previous.has_next())
+
+        last = self.paginator.get_page(last=True)
+        self.assertListEqual([p.pk for p in last], self.pks[-5:])
+        self.assertFalse(last.has_next())
+        self.assertTrue(last.has_previous())
+
+        # Past the last object.
+        self.assertEqual(len(self.paginator.get_page(after=self.pks[-1])), 0)
+
+    def test_deep_page_queries(self):
+        # A deep page costs a single query, like the first one.
+        with self.assertNumQueries(1):
+            page = self.paginator.get_page(after=self.pks[-7])
+        self.assertListEqual([p.pk for p in page], self.pks[-6:-1])
+
+    def test_render(self):
+        paginator = KeysetPaginator(self.queryset, per_page=5, count=123)
+        page = paginator.get_page(after=self.pks[4])
+        t = Template('{% load pagination_tags %}{% pagination paginator page_obj %}')
+        html = t.render(Context({'paginator': paginator, 'page_obj': page}))
+        self.assertIn(f'?after={self.pks[9]}', html)
+        self.assertIn(f'?before={self.pks[5]}', html)
+        self.assertIn('~123 rows', html)